@@ -11,6 +11,11 @@ class PromptBuilder:
 
     @staticmethod
     def build(subject: SubjectProperty, features: Dict) -> str:
+        radius = features.get("search_radius_miles")
+        search_area = f"within a {radius:g}-mile radius of the property" if radius else f"across {subject.city}"
+        if features.get("estimate_basis") == "market_aggregate":
+            search_area = "recent closed sales in the surrounding neighborhood"
+
         prompt = f"""
 You are a real estate valuation assistant.
 
@@ -28,6 +33,7 @@ Subject Property:
 
 Market Signals (from {subject.city}, {subject.state} area):
 - Number of comparable sales analyzed: {features['total_comparables']}
+- Comparable search area: {search_area}
 - Average sale price of comparables: ${features['average_price']}
 - Average price per square foot: ${features['average_price_per_sqft']}
 - Condition multiplier applied: {features['condition_multiplier']}
@@ -0,0 +1,95 @@
+import logging
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.config.settings import SELECTION_CACHE_PREWARM
+from app.services import mls_service
+from app.services.auth import admin_enabled, is_admin_token
+from app.services.cache import caches
+from app.services.comparable_selector import prewarm_selection_cache
+from app.services.hedonic_model import HedonicModel
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Admin routes need X-Admin-Token = ADMIN_TOKEN; they don't exist without it.
+    """
+    if not admin_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _dataset_status() -> dict:
+    dataset = mls_service.peek_dataset()
+    status = {
+        "cache": mls_service.get_cache_status(),
+        "caches": {name: cache.stats() for name, cache in caches.items()},
+    }
+    if dataset is None:
+        status["dataset"] = None
+        return status
+
+    status["dataset"] = {
+        "version": dataset.version,
+        "records": len(dataset),
+        "cities": len(dataset.shards),
+        "zips": len(dataset.zip_adjacency.centroids),
+        "aggregate_groups": len(dataset.aggregates),
+        "memory_bytes": dataset.memory_usage(),
+        "build_seconds": dataset.build_times,
+    }
+    hedonic_model = HedonicModel.load(dataset.version)
+    status["hedonic_model"] = hedonic_model.status() if hedonic_model else None
+    return status
+
+
+@router.get("/dataset", dependencies=[Depends(require_admin)])
+def dataset_status():
+    """
+    Loaded dataset (version, size, memory, index build times), the hedonic
+    model serving it (age, stale when fitted on an earlier dataset), last
+    refresh (duration, ingest skip reasons) and cache statistics.
+    Reads the current state only; never triggers a fetch.
+    """
+    return _dataset_status()
+
+
+@router.post("/dataset/refresh", dependencies=[Depends(require_admin)])
+def refresh_dataset():
+    """
+    Refetch and re-index the MLS data now, without restarting workers.
+    """
+    previous = mls_service.peek_dataset()
+    started = time.perf_counter()
+    dataset = mls_service.force_refresh()
+    elapsed = time.perf_counter() - started
+
+    if dataset is None or dataset is previous:
+        logger.error("❌ Admin refresh failed after %.1fs", elapsed)
+        raise HTTPException(status_code=502, detail="MLS refresh failed - previous data kept")
+
+    logger.info("✅ Admin refresh: dataset %s in %.1fs", dataset.version, elapsed)
+    return {"refreshed": True, "seconds": round(elapsed, 3), **_dataset_status()}
+
+
+@router.post("/dataset/warmup", dependencies=[Depends(require_admin)])
+def warmup(top_n: int = SELECTION_CACHE_PREWARM or 50):
+    """
+    Pre-warm the selection cache for the top_n most requested subjects,
+    loading the dataset first if needed.
+    """
+    dataset = mls_service.get_dataset()
+    if dataset is None:
+        raise HTTPException(status_code=503, detail="MLS data not available")
+
+    started = time.perf_counter()
+    warmed = prewarm_selection_cache(dataset, top_n)
+    elapsed = time.perf_counter() - started
+    logger.info("✅ Admin warm-up: %d selections in %.1fs", warmed, elapsed)
+    return {"warmed": warmed, "seconds": round(elapsed, 3), "dataset_version": dataset.version}
@@ -1,28 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel, EmailStr
-from typing import Optional
-import os
+from typing import Dict, List, Literal, Optional
+import logging
 import requests
-import traceback
-from dotenv import load_dotenv
 
+from app.config.settings import CLEAN_DATA_POST_URL, VALUATION_TIME_BUDGET_SECONDS, WIX_TIMEOUT_SECONDS
 from app.models.subject_property import SubjectProperty
 from app.services.comparable_selector import ComparableSelector
 from app.services.feature_builder import FeatureBuilder
+from app.services.hedonic_model import HedonicModel
 from app.ai.prompt_builder import PromptBuilder
-from app.services.openai_service import generate_ai_summary
+from app.services.openai_service import SummaryUnavailable, generate_ai_summary
+from app.services.local_price_analyzer import summary_from_features
+from app.services.admission import Overloaded, wix_limiter
+from app.services import deadline
+from app.services.mls_service import DataLoading, get_dataset
+from app.services.metrics import current_timings, stage_timer
+from app.services.profiling import profiling_requested, run_profiled
 
-load_dotenv()
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-RAW_DATA_API_URL = os.getenv("RAW_DATA_API_URL")
-CLEAN_DATA_POST_URL = os.getenv("CLEAN_DATA_POST_URL")
-
-if not RAW_DATA_API_URL:
-    raise ValueError("RAW_DATA_API_URL missing from environment")
-
-if not CLEAN_DATA_POST_URL:
-    raise ValueError("CLEAN_DATA_POST_URL missing from environment")
+# Required settings are checked at startup (app.services.warmup); a missing
+# one fails /ready instead of the import
 
 
 class ValuationRequest(BaseModel):
@@ -41,6 +41,9 @@ class ValuationRequest(BaseModel):
     condition_score: int  # 1-10 scale
     user_notes: str
     email: EmailStr
+    fast_estimate: bool = False  # Use precomputed market aggregates, skip comparable selection
+    selection_mode: Optional[Literal["radius", "knn"]] = None  # Default: COMPARABLE_SELECTION_MODE
+    explain: bool = False  # Include the selection funnel and stage timings in the response
 
 
 class ValuationResponse(BaseModel):
@@ -51,66 +54,161 @@ class ValuationResponse(BaseModel):
     itemId: Optional[str]  # ✅ Compatible with older Python
     price_min: int
     price_max: int
+    explain: Optional[Dict] = None  # Only when requested with explain=true
+    degraded: Optional[List[str]] = None  # Stages replaced by a fallback under load (e.g. "ai_summary")
+    cut_short: Optional[List[str]] = None  # Stages skipped or given less time to stay within the time budget
 
 
-def fetch_clean_mls_data():
+@router.post("/run-valuation", response_model=ValuationResponse)
+def run_valuation(payload: ValuationRequest, request: Request, response: Response):
     """
-    Fetch raw MLS data from Wix database.
-    Returns list of property dictionaries.
+    Main valuation endpoint.
+
+    With X-Profile: 1 (or ?profile=1) and a valid X-Admin-Token, the whole
+    pipeline runs under cProfile; the .prof path is returned in X-Profile-Path.
     """
-    resp = requests.get(RAW_DATA_API_URL, timeout=30)
-    resp.raise_for_status()
-    return resp.json().get("items", [])
+    if not profiling_requested(request):
+        return _run_valuation(payload)
 
+    result, profile_path = run_profiled(_run_valuation, payload)
+    if profile_path:
+        response.headers["X-Profile-Path"] = profile_path
+    return result
 
-@router.post("/run-valuation", response_model=ValuationResponse)
-def run_valuation(payload: ValuationRequest):
+
+def _explain(selector: Optional[ComparableSelector]) -> Dict:
     """
-    Main valuation endpoint.
+    explain=true payload: the selection funnel (candidates left and time
+    per filter stage), the pipeline stage timings so far and the time
+    budget left.
+    """
+    explain = {
+        "stage_timings_ms": [
+            {"stage": stage, "ms": round(seconds * 1000, 3)} for stage, seconds in current_timings()
+        ]
+    }
+    request_deadline = deadline.current()
+    if request_deadline is not None:
+        explain["time_budget"] = {
+            "budget_seconds": request_deadline.budget,
+            "remaining_seconds": round(request_deadline.remaining(), 3),
+            "cut_short": list(request_deadline.cut_short),
+        }
+    if selector is not None:
+        explain.update({
+            "selection_mode": selector.mode,
+            "selection_cache_hit": selector.cache_hit,
+            "radius_used": selector.radius_used,
+            "funnel": selector.funnel.as_list(),
+        })
+    return explain
+
+
+def _run_valuation(payload: ValuationRequest):
+    """
+    Valuation pipeline.
     
     Process:
-    1. Fetch MLS data from Wix
-    2. Select comparables within 1-mile radius
+    1. Load cached MLS data (fetched from Wix, indexed per city)
+    2. Select comparables within 1-mile radius (expanded up to 3 miles if too few),
+       or the most similar sales by k-NN (selection_mode="knn")
     3. Calculate price using distance-based weighting
+       (hedonic model + comp residuals when fitted for this dataset)
+       (fast_estimate: neighborhood aggregates instead of steps 2-3)
     4. Generate AI summary
     5. Save to Wix database
     6. Return results with itemId
+
+    Every stage runs within VALUATION_TIME_BUDGET_SECONDS: timeouts come
+    from what is left, optional stages (geocoding, AI summary) are
+    skipped when it runs low, and cut_short lists what was affected.
     """
+    request_deadline = deadline.start(VALUATION_TIME_BUDGET_SECONDS)
     try:
-        print(f"🔵 Received valuation request for: {payload.address}, {payload.city}, {payload.state} {payload.zip_code}")
+        logger.info("🔵 Received valuation request for: %s, %s, %s %s", payload.address, payload.city, payload.state, payload.zip_code)
         
         # Create subject property object
-        subject = SubjectProperty(**payload.model_dump())
+        with stage_timer("geocode"):
+            subject = SubjectProperty(**payload.model_dump(exclude={"fast_estimate", "selection_mode", "explain"}))
 
-        # Fetch raw MLS data
-        mls_data = fetch_clean_mls_data()
+        # Cached, indexed MLS data (refreshed hourly by mls_service)
+        with stage_timer("mls_data"):
+            mls_data = get_dataset()
         if not mls_data:
             raise Exception("MLS data empty - no properties available")
         
-        print(f"✅ Fetched {len(mls_data)} MLS records")
+        logger.debug("✅ Using %d MLS records", len(mls_data))
 
-        # Select comparables (1-mile radius + filters)
-        selector = ComparableSelector(subject)
-        comparables = selector.select(mls_data)
-        
-        if not comparables:
-            raise Exception(f"No comparables found for {subject.city}, {subject.state}")
-        
-        print(f"✅ Selected {len(comparables)} comparables in {subject.city}, {subject.state}")
+        # O(1) market baseline for the subject's neighborhood (None if too few sales)
+        with stage_timer("market_baseline"):
+            market_baseline = mls_data.aggregates.baseline(
+                subject.latitude,
+                subject.longitude,
+                subject.bedrooms,
+                subject.square_footage
+            )
 
-        # Calculate price features (weighted average)
-        features = FeatureBuilder.build(
-            comparables=comparables,
-            condition_score=subject.condition_score
-        )
+        selector = None
+        if payload.fast_estimate and market_baseline:
+            # Fast estimate: answer from aggregates without touching records
+            features = FeatureBuilder.from_market_baseline(
+                market_baseline,
+                condition_score=subject.condition_score,
+                subject_sqft=subject.square_footage
+            )
+            logger.info("✅ Fast estimate from %d sales in cell %s", market_baseline['count'], market_baseline['geohash'])
+        else:
+            # Select comparables (1-mile radius, widened if too few + filters)
+            selector = ComparableSelector(subject, mode=payload.selection_mode)
+            with stage_timer("select"):
+                comparables = selector.select(mls_data)
+            
+            if not comparables:
+                error_msg = f"No comparables found for {subject.city}, {subject.state}"
+                if payload.explain:
+                    # Show which filter removed the candidates
+                    raise HTTPException(status_code=500, detail={"error": error_msg, "explain": _explain(selector)})
+                raise Exception(error_msg)
+            
+            logger.info(
+                "✅ Selected %d comparables in %s, %s (radius: %s)",
+                len(comparables), subject.city, subject.state, selector.radius_used or 'city-wide'
+            )
+
+            # Hedonic model price + comp residuals, if the offline fit has run for this dataset
+            with stage_timer("hedonic"):
+                hedonic_model = HedonicModel.load(mls_data.version)
+                hedonic_estimate = hedonic_model.estimate(mls_data, subject, comparables) if hedonic_model else None
+            if hedonic_estimate:
+                logger.debug("✅ Hedonic estimate $%s (market %s)", hedonic_estimate['estimated_price'], hedonic_estimate['market'])
+
+            # Calculate price features (weighted average, or hedonic when available)
+            with stage_timer("features"):
+                features = FeatureBuilder.build(
+                    comparables=comparables,
+                    condition_score=subject.condition_score,
+                    search_radius_miles=selector.radius_used,
+                    subject_sqft=subject.square_footage,
+                    market_baseline=market_baseline,
+                    hedonic_estimate=hedonic_estimate
+                )
         
-        print(f"✅ Built features - Price range: ${features['price_range']['min']:,} - ${features['price_range']['max']:,}")
+        logger.info("✅ Built features - Price range: $%s - $%s", features['price_range']['min'], features['price_range']['max'])
 
-        # Generate AI summary
+        # Generate AI summary (template summary when the OpenAI queue is full)
+        degraded = []
         prompt = PromptBuilder.build(subject, features)
-        ai_summary = generate_ai_summary(prompt)
-        
-        print(f"✅ Generated AI summary")
+        with stage_timer("openai"):
+            try:
+                ai_summary = generate_ai_summary(prompt)
+                logger.debug("✅ Generated AI summary")
+            except Overloaded as e:
+                ai_summary = summary_from_features(features)
+                degraded.append("ai_summary")
+                logger.warning("⚠️ %s - using the template summary", e)
+            except SummaryUnavailable as e:
+                ai_summary = summary_from_features(features)
+                logger.warning("⚠️ %s - using the template summary", e)
 
         # Prepare payload for Wix
         wix_payload = {
@@ -125,16 +223,21 @@ def run_valuation(payload: ValuationRequest):
         }
 
         # Save to Wix database
-        print(f"🔵 Posting to Wix: {CLEAN_DATA_POST_URL}")
-        wix_resp = requests.post(
-            CLEAN_DATA_POST_URL,
-            json=wix_payload,
-            timeout=30
-        )
+        logger.debug("🔵 Posting to Wix: %s", CLEAN_DATA_POST_URL)
+        with wix_limiter.slot(), stage_timer("wix_post"):
+            try:
+                wix_resp = requests.post(
+                    CLEAN_DATA_POST_URL,
+                    json=wix_payload,
+                    timeout=deadline.stage_timeout("wix_post", WIX_TIMEOUT_SECONDS)
+                )
+            except requests.exceptions.Timeout:
+                deadline.cut_short("wix_post")
+                raise
         wix_resp.raise_for_status()
         wix_json = wix_resp.json()
         
-        print(f"✅ Wix response: {wix_json}")
+        logger.debug("✅ Wix response: %s", wix_json)
 
         # Extract itemId (try multiple possible locations)
         item_id = (
@@ -144,7 +247,7 @@ def run_valuation(payload: ValuationRequest):
         )
         
         if not item_id:
-            print(f"⚠️ Warning: No item_id found in Wix response")
+            logger.warning("⚠️ Warning: No item_id found in Wix response")
 
         # Prepare response
         response_data = {
@@ -153,30 +256,59 @@ def run_valuation(payload: ValuationRequest):
             "price_min": wix_payload["price_min"],
             "price_max": wix_payload["price_max"]
         }
+        if degraded:
+            response_data["degraded"] = degraded
+        if request_deadline.cut_short:
+            response_data["cut_short"] = list(request_deadline.cut_short)
+        if payload.explain:
+            response_data["explain"] = _explain(selector)
         
-        print(f"✅ Sending response: {response_data}")
+        logger.debug("✅ Sending response: %s", response_data)
         
         # ✅ Return normal response (CORS handled by middleware)
         return response_data
 
+    except HTTPException:
+        raise
+
+    except deadline.DeadlineExceeded as e:
+        logger.error("❌ Valuation out of time: %s (cut short: %s)", e, request_deadline.cut_short)
+        raise HTTPException(
+            status_code=504,
+            detail={"error": f"Time budget of {VALUATION_TIME_BUDGET_SECONDS:g}s exceeded", "cut_short": request_deadline.cut_short}
+        )
+
+    except Overloaded as e:
+        logger.warning("⚠️ Shedding valuation: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service busy ({e.stage}), please retry",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    except DataLoading as e:
+        logger.warning("⚠️ %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail="MLS data is loading, please retry",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
     except requests.exceptions.Timeout:
         error_msg = "Request timeout - external service took too long"
-        print(f"❌ {error_msg}")
+        logger.error("❌ %s (cut short: %s)", error_msg, request_deadline.cut_short)
         raise HTTPException(status_code=504, detail=error_msg)
         
     except requests.exceptions.HTTPError as e:
         error_msg = f"External API error: {e.response.status_code} - {e.response.text}"
-        print(f"❌ {error_msg}")
-        print(traceback.format_exc())
+        logger.exception("❌ %s", error_msg)
         raise HTTPException(status_code=502, detail=error_msg)
     
     except requests.exceptions.RequestException as e:
         error_msg = f"Network error: {str(e)}"
-        print(f"❌ {error_msg}")
-        print(traceback.format_exc())
+        logger.exception("❌ %s", error_msg)
         raise HTTPException(status_code=502, detail=error_msg)
     
     except Exception as e:
-        print("❌ ERROR TRACE:")
-        print(traceback.format_exc())
+        logger.exception("❌ ERROR TRACE:")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
 
 
 # 🔥 UPDATED: Mapping to match actual MLS Grid API field names
@@ -23,6 +23,10 @@ FIELD_MAPPING = {
     "MlsStatus": "status",
     "StandardStatus": "standardStatus",
     "PropertyType": "propertyType",
+
+    # Identity (deduplication at ingest)
+    "ListingKey": "listingKey",
+    "CloseDate": "closeDate",
 }
 
 
@@ -55,6 +59,27 @@ def clean_property(raw_property: Dict) -> Dict:
     return clean_data
 
 
+def clean_pairs(pairs: Iterable[Tuple[str, object]]) -> Dict:
+    """
+    clean_property for a record given as (field, value) pairs, e.g. from
+    json's object_pairs_hook, so the raw record dict is never built.
+    A feed page can then be cleaned while it is decoded.
+    """
+
+    clean_data = {FIELD_MAPPING[raw_key]: value for raw_key, value in pairs if raw_key in FIELD_MAPPING}
+
+    # Same rules as clean_property, applied once every field is in
+    if "bathrooms_full" in clean_data:
+        full_baths = clean_data.pop("bathrooms_full") or 0
+        half_baths = clean_data.get("bathrooms_half", 0) or 0
+        clean_data["bathrooms"] = full_baths + (half_baths * 0.5)
+
+    if "areaSqft" in clean_data:
+        clean_data["areaSqft"] = clean_data["areaSqft"] or clean_data.get("buildingAreaTotal", 0)
+
+    return clean_data
+
+
 def clean_properties(raw_properties: List[Dict]) -> List[Dict]:
     """
     Clean a list of raw MLS properties.
@@ -67,4 +92,5 @@ def clean_properties(raw_properties: List[Dict]) -> List[Dict]:
         if cleaned:
             cleaned_list.append(cleaned)
 
-    return cleaned_list
\ No newline at end of file
+    return cleaned_list
+
@@ -5,4 +5,106 @@ load_dotenv()
 
 RAW_DATA_API_URL = os.getenv("RAW_DATA_API_URL")
 CLEAN_DATA_POST_API_URL = os.getenv("CLEAN_DATA_POST_API_URL")
+CLEAN_DATA_POST_URL = os.getenv("CLEAN_DATA_POST_URL")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Startup: load the MLS dataset, its indexes and the OpenAI SDK in the
+# background; /ready reports 503 until it is done
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Third-party endpoints (overridable, e.g. to point at the loadtest stand-ins;
+# the OpenAI SDK reads OPENAI_BASE_URL itself)
+MLSGRID_API_URL = os.getenv("MLSGRID_API_URL", "https://api.mlsgrid.com/v2/Property")
+MLSGRID_ACCESS_TOKEN = os.getenv("MLSGRID_ACCESS_TOKEN")  # Unset: no MLS Grid geocoding or replication
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+
+# MLS data source: "relay" (RAW_DATA_API_URL) or "snapshot" (local store filled
+# by python -m app.jobs.replicate_mlsgrid)
+MLS_SOURCE = os.getenv("MLS_SOURCE", "relay")
+MLS_STORE = os.getenv("MLS_STORE", "json")  # Local store: "json" (snapshot file) or "sqlite"
+MLS_SNAPSHOT_PATH = os.getenv("MLS_SNAPSHOT_PATH", "data/mls/snapshot.json")
+MLS_SQLITE_PATH = os.getenv("MLS_SQLITE_PATH", "data/mls/mls.sqlite3")
+
+# MLS Grid replication
+MLSGRID_ORIGINATING_SYSTEM = os.getenv("MLSGRID_ORIGINATING_SYSTEM", "carolina")  # Canopy MLS
+MLSGRID_PAGE_SIZE = int(os.getenv("MLSGRID_PAGE_SIZE", "1000"))
+MLSGRID_REQUEST_INTERVAL = float(os.getenv("MLSGRID_REQUEST_INTERVAL", "0.5"))  # Seconds between requests (rate limit)
+
+# Comparable selection
+ZIP_NEIGHBOR_RADIUS_MILES = float(os.getenv("ZIP_NEIGHBOR_RADIUS_MILES", "10"))  # Zip centroid distance for neighbors
+GRID_CELL_DEGREES = float(os.getenv("GRID_CELL_DEGREES", "0.01"))  # Spatial index cell size (~0.7 mile)
+
+# Search radius grows through these steps until MIN_COMPARABLES are found
+COMPARABLE_RADIUS_STEPS = tuple(
+    float(step) for step in os.getenv("COMPARABLE_RADIUS_STEPS", "1,1.5,2,3").split(",")
+)
+MIN_COMPARABLES = int(os.getenv("MIN_COMPARABLES", "3"))
+
+# "radius" (hard filters + radius steps) or "knn" (nearest neighbours in feature space)
+COMPARABLE_SELECTION_MODE = os.getenv("COMPARABLE_SELECTION_MODE", "radius")
+KNN_MAX_DISTANCE = float(os.getenv("KNN_MAX_DISTANCE", "4"))  # Feature units (1 = 1 mile / 25% sqft / 1 bed / ...)
+
+# Selection result cache (subjects quantized to these steps share an entry)
+SELECTION_CACHE_SIZE = int(os.getenv("SELECTION_CACHE_SIZE", "4096"))  # Entries; 0 disables
+SELECTION_CACHE_GRID_DEGREES = float(os.getenv("SELECTION_CACHE_GRID_DEGREES", "0.001"))  # ~100 m
+SELECTION_CACHE_SQFT_BUCKET = int(os.getenv("SELECTION_CACHE_SQFT_BUCKET", "50"))
+SELECTION_CACHE_YEAR_BUCKET = int(os.getenv("SELECTION_CACHE_YEAR_BUCKET", "5"))
+SELECTION_CACHE_PREWARM = int(os.getenv("SELECTION_CACHE_PREWARM", "0"))  # Top-N hot subjects re-selected after refresh
+
+# Other request-path caches (entries; 0 disables)
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "10000"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1000"))
+
+# Admission control: concurrent callers per stage and how many more may queue;
+# beyond that requests fail fast with 429/503 and Retry-After
+VALUATION_MAX_IN_FLIGHT = int(os.getenv("VALUATION_MAX_IN_FLIGHT", "32"))  # Valuations at once, no queue (429 beyond)
+GEOCODE_CONCURRENCY = int(os.getenv("GEOCODE_CONCURRENCY", "8"))
+GEOCODE_QUEUE_SIZE = int(os.getenv("GEOCODE_QUEUE_SIZE", "16"))
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "8"))
+OPENAI_QUEUE_SIZE = int(os.getenv("OPENAI_QUEUE_SIZE", "8"))  # Deeper queue: template summary instead of OpenAI
+WIX_CONCURRENCY = int(os.getenv("WIX_CONCURRENCY", "8"))
+WIX_QUEUE_SIZE = int(os.getenv("WIX_QUEUE_SIZE", "24"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "5"))  # Longest wait for a stage slot
+
+# Per-request time budget: stage timeouts are derived from what is left of it
+VALUATION_TIME_BUDGET_SECONDS = float(os.getenv("VALUATION_TIME_BUDGET_SECONDS", "25"))  # Wix frontend gives up at ~30s
+DEADLINE_RESERVE_SECONDS = float(os.getenv("DEADLINE_RESERVE_SECONDS", "4"))  # Kept from optional stages for the Wix write
+MIN_STAGE_TIMEOUT_SECONDS = float(os.getenv("MIN_STAGE_TIMEOUT_SECONDS", "1"))  # Less left: a required stage is not started
+GEOCODE_TIMEOUT_SECONDS = float(os.getenv("GEOCODE_TIMEOUT_SECONDS", "10"))  # Per geocoder request
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+OPENAI_MIN_SECONDS = float(os.getenv("OPENAI_MIN_SECONDS", "3"))  # Less available: template summary instead
+WIX_TIMEOUT_SECONDS = float(os.getenv("WIX_TIMEOUT_SECONDS", "30"))
+MLS_FETCH_TIMEOUT_SECONDS = float(os.getenv("MLS_FETCH_TIMEOUT_SECONDS", "120"))
+MLS_LOADING_RETRY_AFTER_SECONDS = int(os.getenv("MLS_LOADING_RETRY_AFTER_SECONDS", "15"))  # Retry-After while the first load runs
+
+# Market aggregates (per geohash cell, built at dataset refresh)
+AGGREGATE_GEOHASH_PRECISION = int(os.getenv("AGGREGATE_GEOHASH_PRECISION", "6"))  # ~0.75 x 0.4 mile cells
+AGGREGATE_MIN_COUNT = int(os.getenv("AGGREGATE_MIN_COUNT", "5"))  # Sales needed before a cell is trusted
+
+# Hedonic price model (fitted offline by app.jobs.fit_hedonic)
+HEDONIC_MODEL_DIR = os.getenv("HEDONIC_MODEL_DIR", "data/models")
+HEDONIC_MIN_SALES = int(os.getenv("HEDONIC_MIN_SALES", "30"))  # Closed sales needed to fit a market
+HEDONIC_MAX_STALE_HOURS = float(os.getenv("HEDONIC_MAX_STALE_HOURS", "168"))  # Oldest model used for a newer dataset
+
+# Logging (see app.config.logging_setup)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))  # Share of high-volume lines kept
+
+# Admin access (profiling, dataset admin); admin features are off when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+
+def missing_settings() -> list:
+    """
+    Required environment variables that are not set. Checked at startup
+    (logged, and /ready fails) instead of at import time.
+    """
+    required = {
+        "CLEAN_DATA_POST_URL": CLEAN_DATA_POST_URL,
+        "OPENAI_API_KEY": OPENAI_API_KEY,
+    }
+    if MLS_SOURCE != "snapshot":
+        required["RAW_DATA_API_URL"] = RAW_DATA_API_URL
+    return [name for name, value in required.items() if not value]
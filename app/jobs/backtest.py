@@ -0,0 +1,256 @@
+"""
+Leave-one-out backtest of comparable selection and pricing.
+
+Usage:
+    python -m app.jobs.backtest [--mode radius|knn] [--sample N] [--processes N]
+                                [--synthetic 50k] [--output report.json]
+
+Every closed sale in the dataset becomes a subject (condition 5, its own
+location and features) and is valued by ComparableSelector +
+FeatureBuilder from the rest of the dataset, its own row excluded. The
+report has error distributions overall, per city and per zip, how many
+comps were found and how far the search had to go.
+
+The dataset is built once in the parent; forked workers share it
+copy-on-write and only receive chunks of row numbers.
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.subject_property import SubjectProperty
+from app.services.comparable_selector import SELECTION_MODES, ComparableSelector
+from app.services.feature_builder import FeatureBuilder
+from app.services.mls_dataset import ListingStatus, MLSDataset
+
+CHUNK_SIZE = 250
+MIN_GROUP_SALES = 20  # Cities/zips with fewer valued sales are not listed separately
+
+# Set in the parent before the pool forks; workers read it, never pickle it
+_dataset: Optional[MLSDataset] = None
+_mode = "radius"
+
+
+def subject_rows(dataset: MLSDataset) -> np.ndarray:
+    """
+    Closed sales that can stand in as a valuation request.
+    """
+    price = dataset.column("price")
+    sqft = dataset.column("sqft")
+    beds = dataset.column("bedrooms")
+    baths = dataset.column("bathrooms")
+    year = dataset.column("year_built")
+    usable = (
+        (dataset.column("status") == ListingStatus.CLOSED)
+        & (price > 0) & (sqft > 100) & (beds >= 1) & (baths > 0) & (year >= 1800)
+    )
+    return np.flatnonzero(usable)
+
+
+def subject_for(dataset: MLSDataset, index: int) -> SubjectProperty:
+    """
+    The sale at index as a request. Missing coordinates stay 0.0, which the
+    selector treats as unknown without geocoding.
+    """
+    record = dataset.records[index]
+    zip_code = int(dataset.column("zip")[index])
+    return SubjectProperty(
+        address=str(record.get("address") or f"row {index}"),
+        city=str(record.get("city")).strip(),
+        state=str(record.get("state") or "NC"),
+        zip_code=str(zip_code) if zip_code else "",
+        bedrooms=int(dataset.column("bedrooms")[index]),
+        bathrooms=float(dataset.column("bathrooms")[index]),
+        square_footage=int(dataset.column("sqft")[index]),
+        year_built=int(dataset.column("year_built")[index]),
+        condition_score=5,  # Neutral: no condition adjustment
+        email="backtest@example.com",
+        latitude=float(dataset.latitude[index]),
+        longitude=float(dataset.longitude[index]),
+    )
+
+
+def value_chunk(indices: Sequence[int]) -> List[Tuple]:
+    """
+    (index, estimate, range min, range max, comps, radius, seconds) per subject.
+    """
+    results = []
+    for index in indices:
+        started = time.perf_counter()
+        subject = subject_for(_dataset, index)
+        selector = ComparableSelector(subject, mode=_mode, exclude=(index,))
+        comparables = selector.select(_dataset)
+        estimate = low = high = None
+        if comparables:
+            try:
+                features = FeatureBuilder.build(
+                    comparables=comparables,
+                    condition_score=subject.condition_score,
+                    search_radius_miles=selector.radius_used,
+                    subject_sqft=subject.square_footage
+                )
+                estimate = features["adjusted_estimated_price"]
+                low, high = features["price_range"]["min"], features["price_range"]["max"]
+            except ValueError:
+                pass  # No usable comp prices
+        results.append((
+            index, estimate, low, high, len(comparables), selector.radius_used,
+            time.perf_counter() - started
+        ))
+    return results
+
+
+def error_summary(errors: np.ndarray, in_range: np.ndarray) -> Dict:
+    """
+    Distribution of signed relative errors (estimate / actual - 1).
+    """
+    absolute = np.abs(errors)
+    return {
+        "count": int(len(errors)),
+        "median_error": round(float(np.median(errors)), 4),
+        "median_abs_error": round(float(np.median(absolute)), 4),
+        "mean_abs_error": round(float(absolute.mean()), 4),
+        "p90_abs_error": round(float(np.percentile(absolute, 90)), 4),
+        "within_5pct": round(float((absolute <= 0.05).mean()), 4),
+        "within_10pct": round(float((absolute <= 0.10).mean()), 4),
+        "within_20pct": round(float((absolute <= 0.20).mean()), 4),
+        "actual_in_range": round(float(in_range.mean()), 4),
+    }
+
+
+def _grouped(keys: List, errors: np.ndarray, in_range: np.ndarray) -> Dict:
+    groups = defaultdict(list)
+    for position, key in enumerate(keys):
+        groups[key].append(position)
+    return {
+        str(key): error_summary(errors[positions], in_range[positions])
+        for key, positions in sorted(groups.items(), key=lambda item: -len(item[1]))
+        if len(positions) >= MIN_GROUP_SALES
+    }
+
+
+def build_report(dataset: MLSDataset, results: List[Tuple], mode: str, seconds: float, processes: int) -> Dict:
+    valued = [row for row in results if row[1] is not None]
+    indices = np.array([row[0] for row in valued], dtype=np.intp)
+    estimates = np.array([row[1] for row in valued], dtype=np.float64)
+    actual = dataset.column("price")[indices]
+    errors = estimates / actual - 1
+    in_range = (
+        (np.array([row[2] for row in valued]) <= actual) & (actual <= np.array([row[3] for row in valued]))
+    )
+
+    cities = [dataset.city[index] for index in indices.tolist()]
+    zips = dataset.column("zip")[indices].tolist()
+    select_seconds = np.array([row[6] for row in results])
+
+    return {
+        "dataset_version": dataset.version,
+        "mode": mode,
+        "subjects": len(results),
+        "valued": len(valued),
+        "no_comparables": sum(1 for row in results if row[4] == 0),
+        "overall": error_summary(errors, in_range) if len(valued) else None,
+        "by_city": _grouped(cities, errors, in_range),
+        "by_zip": _grouped([f"{city}|{zip_code}" for city, zip_code in zip(cities, zips)], errors, in_range),
+        "comparable_counts": dict(sorted(Counter(row[4] for row in results).items())),
+        "radius_used": {
+            str(radius): count
+            for radius, count in sorted(
+                Counter(row[5] for row in results).items(), key=lambda item: (item[0] is None, item[0] or 0)
+            )
+        },
+        "timing": {
+            "wall_seconds": round(seconds, 2),
+            "processes": processes,
+            "subjects_per_second": round(len(results) / seconds, 1) if seconds else None,
+            "per_subject_ms_p50": round(float(np.median(select_seconds)) * 1000, 3) if len(results) else None,
+            "per_subject_ms_p99": round(float(np.percentile(select_seconds, 99)) * 1000, 3) if len(results) else None,
+        },
+    }
+
+
+def run_backtest(
+    dataset: MLSDataset,
+    mode: str = "radius",
+    sample: Optional[int] = None,
+    processes: Optional[int] = None,
+    seed: int = 0
+) -> Dict:
+    global _dataset, _mode
+    _dataset, _mode = dataset, mode
+
+    rows = subject_rows(dataset).tolist()
+    if sample and sample < len(rows):
+        rows = sorted(random.Random(seed).sample(rows, sample))
+    chunks = [rows[start:start + CHUNK_SIZE] for start in range(0, len(rows), CHUNK_SIZE)]
+    processes = processes or multiprocessing.cpu_count()
+
+    started = time.perf_counter()
+    if processes == 1:
+        results = [row for chunk in chunks for row in value_chunk(chunk)]
+    else:
+        # fork: workers inherit the indexed dataset instead of rebuilding it
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            results = [row for chunk_results in pool.map(value_chunk, chunks) for row in chunk_results]
+    seconds = time.perf_counter() - started
+
+    return build_report(dataset, results, mode, seconds, processes)
+
+
+def _load_dataset(synthetic: Optional[str]) -> Optional[MLSDataset]:
+    if synthetic:
+        from benchmarks.synthetic import SIZES, relay_records
+        from app.services.mls_service import filter_properties
+        return MLSDataset(filter_properties(relay_records(SIZES[synthetic]))[0])
+
+    from app.services.mls_service import get_dataset
+    return get_dataset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leave-one-out valuation backtest")
+    parser.add_argument("--mode", choices=SELECTION_MODES, default="radius", help="Comparable selection mode")
+    parser.add_argument("--sample", type=int, default=None, help="Value a random sample of N sales (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="Sampling seed")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--synthetic", choices=("50k", "500k", "2m"), help="Use the benchmark generator instead of the MLS feed")
+    parser.add_argument("--output", help="Write the full report (with per-zip errors) as JSON")
+    args = parser.parse_args()
+
+    dataset = _load_dataset(args.synthetic)
+    if not dataset:
+        raise SystemExit("❌ No MLS data available - check RAW_DATA_API_URL")
+
+    report = run_backtest(dataset, args.mode, args.sample, args.processes, args.seed)
+
+    overall = report["overall"] or {}
+    timing = report["timing"]
+    print(f"✅ Backtested {report['subjects']} sales ({args.mode}) on dataset {report['dataset_version']} "
+          f"in {timing['wall_seconds']}s with {timing['processes']} processes "
+          f"({timing['subjects_per_second']}/s)")
+    print(f"   Valued {report['valued']}, no comparables {report['no_comparables']}")
+    if overall:
+        print(f"   Median abs error {overall['median_abs_error']:.1%}, p90 {overall['p90_abs_error']:.1%}, "
+              f"bias {overall['median_error']:+.1%}, within 10% {overall['within_10pct']:.1%}, "
+              f"actual in range {overall['actual_in_range']:.1%}")
+    for city, summary in list(report["by_city"].items())[:10]:
+        print(f"   {city:<16} n={summary['count']:<6} median abs {summary['median_abs_error']:.1%}  "
+              f"p90 {summary['p90_abs_error']:.1%}")
+    print(f"   Comparables found: {report['comparable_counts']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"   Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
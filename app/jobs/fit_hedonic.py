@@ -0,0 +1,39 @@
+"""
+Fit per-market hedonic price coefficients for the current MLS dataset.
+
+Usage:
+    python -m app.jobs.fit_hedonic [--processes N] [--output-dir DIR]
+
+Loads the dataset through mls_service, fits every city and city+zip
+market across worker processes and writes hedonic_<version>.json, which
+the API picks up for requests served from that dataset version.
+"""
+import argparse
+import time
+
+from app.config.settings import HEDONIC_MODEL_DIR
+from app.services.hedonic_model import HedonicModel
+from app.services.mls_service import get_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit hedonic price model per market")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output-dir", default=HEDONIC_MODEL_DIR, help="Where to write the coefficients")
+    args = parser.parse_args()
+
+    dataset = get_dataset()
+    if not dataset:
+        raise SystemExit("❌ No MLS data available - check RAW_DATA_API_URL")
+
+    started = time.perf_counter()
+    model = HedonicModel.fit(dataset, processes=args.processes)
+    path = model.save(args.output_dir)
+
+    print(f"✅ Fitted {len(model.markets)} markets on dataset {dataset.version} "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"   Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
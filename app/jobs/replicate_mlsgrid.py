@@ -0,0 +1,46 @@
+"""
+Replicate MLS Grid Property records into the local snapshot store.
+
+Usage:
+    python -m app.jobs.replicate_mlsgrid [--full] [--store json|sqlite] [--path PATH]
+
+Incremental by default: only records modified after the stored watermark
+are fetched. --full starts over. Run it on a schedule (MLS Grid asks for
+at most hourly replication) and serve it with MLS_SOURCE=snapshot.
+Needs MLSGRID_ACCESS_TOKEN.
+
+The store is MLS_STORE unless --store is given: a JSON snapshot file or
+an SQLite database (MLS_SQLITE_PATH) that API workers read in place.
+"""
+import argparse
+
+from app.config.settings import MLS_SNAPSHOT_PATH, MLS_SQLITE_PATH, MLS_STORE, MLSGRID_ACCESS_TOKEN
+from app.services.mls_store import SnapshotStore, SQLiteStore
+from app.services.mlsgrid_replication import replicate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replicate MLS Grid Property records")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and replicate everything")
+    parser.add_argument("--store", choices=("json", "sqlite"), default=MLS_STORE, help="Local store type")
+    parser.add_argument("--path", help="Store path (default: MLS_SNAPSHOT_PATH or MLS_SQLITE_PATH)")
+    args = parser.parse_args()
+    if not MLSGRID_ACCESS_TOKEN:
+        parser.error("MLSGRID_ACCESS_TOKEN is not set")
+
+    if args.store == "sqlite":
+        store = SQLiteStore(args.path or MLS_SQLITE_PATH)
+    else:
+        store = SnapshotStore(args.path or MLS_SNAPSHOT_PATH)
+    try:
+        stats = replicate(store, full=args.full)
+    finally:
+        store.close()
+
+    print(f"✅ Replicated {stats['records']} changes in {stats['pages']} pages ({stats['seconds']}s): "
+          f"{stats['upserted']} upserted, {stats['deleted']} removed")
+    print(f"   Store now holds {stats['store_records']} records, watermark {stats['watermark']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,34 @@
 import os
+import time
+import uuid
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app.config.logging_setup import configure_logging, request_id
 from app.api.run_valuation import router as valuation_router
+from app.api.admin import router as admin_router
+from app.services import metrics, warmup
+from app.services.admission import Overloaded, valuation_limiter
 
 # Load environment variables
 load_dotenv()
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Validate configuration and start the warm-up (see /ready).
+    """
+    warmup.start()
+    yield
+
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Real Estate AI Valuation API",
     version="2.0.0",  # Updated to reflect 1-mile radius + weight system
     description=(
@@ -17,8 +37,58 @@ app = FastAPI(
     )
 )
 
+@app.middleware("http")
+async def admission_middleware(request: Request, call_next):
+    """
+    Turn valuations beyond VALUATION_MAX_IN_FLIGHT away with 429 before
+    they take a worker thread, instead of queueing them unbounded.
+    Registered before the timing middleware, so it runs inside it (and
+    inside CORS, added last, so its 429s carry the CORS headers).
+    """
+    if request.url.path != "/api/run-valuation" or request.method != "POST":
+        return await call_next(request)
+    try:
+        with valuation_limiter.slot():  # No queue: never blocks
+            return await call_next(request)
+    except Overloaded as e:
+        return JSONResponse(
+            {"detail": "Too many valuations in progress, please retry"},
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    """
+    Collect per-stage timings for the request and return them as a
+    Server-Timing header; record the request latency for /metrics.
+    Tags the request's log lines with its X-Request-ID (generated if absent).
+    """
+    timings = metrics.start_request()
+    correlation_id = request.headers.get("x-request-id", "")[:128] or uuid.uuid4().hex
+    request_id.set(correlation_id)
+
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    timings.append(("total", elapsed))
+    response.headers["Server-Timing"] = metrics.server_timing(timings)
+    response.headers["X-Request-ID"] = correlation_id
+
+    route = request.scope.get("route")
+    metrics.REQUEST_SECONDS.observe(
+        elapsed,
+        route=getattr(route, "path", "unmatched"),
+        method=request.method,
+        status=str(response.status_code)
+    )
+    return response
+
 # 🔥 CRITICAL: CORS MUST BE CONFIGURED BEFORE ROUTES
-# Allows Wix frontend to communicate with this API
+# Allows Wix frontend to communicate with this API.
+# Added after the @app.middleware functions so it is the outermost layer
+# and also covers their responses (e.g. admission 429s).
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,7 +118,9 @@ def root():
         "cors": "enabled",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
             "valuation": "/api/run-valuation",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -64,6 +136,27 @@ def health_check():
         "api_version": "2.0.0"
     }
 
+@app.get("/ready")
+def readiness_check():
+    """
+    Readiness probe: 200 once configuration is complete and the MLS
+    dataset, its indexes and the OpenAI client are loaded; 503 before
+    (or if that failed). /health only says the process is up.
+    """
+    ready, details = warmup.readiness()
+    return JSONResponse(details, status_code=200 if ready else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    """
+    Prometheus scrape endpoint: stage and request latency histograms,
+    cache counters, MLS dataset size and refresh durations.
+    """
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Include valuation router AFTER CORS middleware
 app.include_router(
     valuation_router,
@@ -71,6 +164,13 @@ app.include_router(
     tags=["Valuation"]
 )
 
+# Operational endpoints (require ADMIN_TOKEN)
+app.include_router(
+    admin_router,
+    prefix="/api/admin",
+    tags=["Admin"]
+)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
@@ -1,7 +1,21 @@
+import logging
 from typing import Optional
 from pydantic import BaseModel, Field, model_validator
 import requests
 
+from app.config.settings import GEOCODE_CACHE_SIZE, GEOCODE_TIMEOUT_SECONDS, MIN_STAGE_TIMEOUT_SECONDS, NOMINATIM_URL
+from app.services.admission import geocode_limiter
+from app.services.cache import LRUCache
+from app.services.deadline import cut_short, optional_timeout
+from app.services.metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Successful geocodes by normalized address, shared across requests. An
+# address does not move, so entries stay valid until evicted; failures
+# are not cached and are retried by the next request
+geocode_cache = LRUCache(GEOCODE_CACHE_SIZE, name="geocode")
+
 class SubjectProperty(BaseModel):
     """
     Represents the user's property input from Wix form.
@@ -29,64 +43,86 @@ class SubjectProperty(BaseModel):
         Priority: MLSGrid API (1 call) > Nominatim (free) > None
         """
         if self.latitude is None or self.longitude is None:
-            print(f"🔵 Geocoding: {self.address}, {self.city}, {self.state}")
+            cache_key = (
+                " ".join(self.address.lower().split()),
+                self.city.strip().lower(),
+                self.state.strip().upper(),
+                self.zip_code.strip()
+            )
+            cached = geocode_cache.get(cache_key)
+            if cached is not None:
+                self.latitude, self.longitude = cached
+                logger.debug("✅ Geocode cache hit: %s, %s", self.latitude, self.longitude)
+                return self
+
+            logger.info("🔵 Geocoding: %s, %s, %s", self.address, self.city, self.state)
             
-            # Try MLSGrid first (most accurate, 1 API call)
-            try:
-                from app.services.mlsgrid_geocode import geocode_from_mlsgrid
+            # Bounded concurrency for the external geocoders (Overloaded when the queue is full)
+            with geocode_limiter.slot():
+                # Try MLSGrid first (most accurate, 1 API call)
+                try:
+                    from app.services.mlsgrid_geocode import geocode_from_mlsgrid
                 
-                coords = geocode_from_mlsgrid(
-                    self.address, 
-                    self.city, 
-                    self.state, 
-                    self.zip_code
-                )
+                    coords = geocode_from_mlsgrid(
+                        self.address, 
+                        self.city, 
+                        self.state, 
+                        self.zip_code
+                    )
                 
-                if coords:
-                    self.latitude = coords["latitude"]
-                    self.longitude = coords["longitude"]
-                    print(f"✅ Geocoded via MLSGrid")
-                    return self
-            except Exception as e:
-                print(f"⚠️ MLSGrid geocoding failed: {e}")
+                    if coords:
+                        self.latitude = coords["latitude"]
+                        self.longitude = coords["longitude"]
+                        geocode_cache.put(cache_key, (self.latitude, self.longitude))
+                        logger.debug("✅ Geocoded via MLSGrid")
+                        return self
+                except Exception as e:
+                    logger.warning("⚠️ MLSGrid geocoding failed: %s", e)
             
-            # Fallback to free Nominatim
-            try:
-                full_address = f"{self.address}, {self.city}, {self.state} {self.zip_code}, USA"
+                # Fallback to free Nominatim
+                try:
+                    full_address = f"{self.address}, {self.city}, {self.state} {self.zip_code}, USA"
                 
-                url = "https://nominatim.openstreetmap.org/search"
-                params = {
-                    "q": full_address,
-                    "format": "json",
-                    "limit": 1
-                }
-                headers = {
-                    "User-Agent": "RealEstateValuationAPI/1.0"
-                }
+                    url = NOMINATIM_URL
+                    params = {
+                        "q": full_address,
+                        "format": "json",
+                        "limit": 1
+                    }
+                    headers = {
+                        "User-Agent": "RealEstateValuationAPI/1.0"
+                    }
                 
-                print(f"⚠️ Trying free Nominatim geocoding...")
+                    logger.info("⚠️ Trying free Nominatim geocoding...")
                 
-                response = requests.get(url, params=params, headers=headers, timeout=10)
+                    timeout = optional_timeout("geocode", GEOCODE_TIMEOUT_SECONDS, MIN_STAGE_TIMEOUT_SECONDS)
+                    if timeout is None:
+                        response = None  # Out of time: city-wide search
+                    else:
+                        with stage_timer("geocode_nominatim"):
+                            response = requests.get(url, params=params, headers=headers, timeout=timeout)
                 
-                if response.status_code == 200:
-                    results = response.json()
+                    if response is not None and response.status_code == 200:
+                        results = response.json()
                     
-                    if results and len(results) > 0:
-                        self.latitude = float(results[0]["lat"])
-                        self.longitude = float(results[0]["lon"])
-                        print(f"✅ Geocoded via Nominatim: {self.latitude}, {self.longitude}")
-                        return self
+                        if results and len(results) > 0:
+                            self.latitude = float(results[0]["lat"])
+                            self.longitude = float(results[0]["lon"])
+                            geocode_cache.put(cache_key, (self.latitude, self.longitude))
+                            logger.debug("✅ Geocoded via Nominatim: %s, %s", self.latitude, self.longitude)
+                            return self
                 
-                print(f"⚠️ Nominatim: No results")
+                    logger.warning("⚠️ Nominatim: No results")
                     
-            except Exception as e:
-                print(f"⚠️ Nominatim error: {e}")
+                except Exception as e:
+                    logger.warning("⚠️ Nominatim error: %s", e)
+                    if isinstance(e, requests.exceptions.Timeout):
+                        cut_short("geocode")
             
             # No geocoding worked
-            print(f"⚠️ Could not geocode address")
-            print(f"⚠️ Will fall back to city-wide search (no 1-mile radius)")
+            logger.warning("⚠️ Could not geocode address - falling back to city-wide search (no 1-mile radius)")
         else:
-            print(f"✅ Using provided coordinates: {self.latitude}, {self.longitude}")
+            logger.debug("✅ Using provided coordinates: %s, %s", self.latitude, self.longitude)
         
         return self
 
@@ -0,0 +1,115 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from app.config.settings import (
+    ADMISSION_MAX_WAIT_SECONDS,
+    GEOCODE_CONCURRENCY,
+    GEOCODE_QUEUE_SIZE,
+    OPENAI_CONCURRENCY,
+    OPENAI_QUEUE_SIZE,
+    VALUATION_MAX_IN_FLIGHT,
+    WIX_CONCURRENCY,
+    WIX_QUEUE_SIZE,
+)
+from app.services import deadline
+from app.services.metrics import CallbackCounter, Gauge
+
+
+class Overloaded(Exception):
+    """
+    A stage's queue is full (or the wait for a slot ran out).
+    """
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(f"{stage} is overloaded, retry in {retry_after}s")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class StageLimiter:
+    """
+    At most `concurrency` callers inside a stage, at most `queue_size`
+    more waiting for a slot (each up to max_wait seconds, or what is left
+    of the request's deadline). Anyone beyond that gets Overloaded right
+    away instead of piling up, so a burst fails fast rather than every
+    request timing out together.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, max_wait: float = ADMISSION_MAX_WAIT_SECONDS):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._hold_seconds = 1.0  # Moving average of time spent in the stage
+        self._cond = threading.Condition()
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the current queue has likely drained.
+        """
+        return max(1, math.ceil((self.waiting + 1) / self.concurrency * self._hold_seconds))
+
+    def _reject(self):
+        self.rejected += 1
+        raise Overloaded(self.name, self.retry_after())
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            if self.active >= self.concurrency:
+                if self.waiting >= self.queue_size:
+                    self._reject()
+                request_deadline = deadline.current()
+                max_wait = min(self.max_wait, request_deadline.remaining()) if request_deadline else self.max_wait
+                self.waiting += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self.active < self.concurrency, max_wait)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    self._reject()
+            self.active += 1
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - started
+            with self._cond:
+                self.active -= 1
+                self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held
+                self._cond.notify()
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+
+# Whole valuations (checked before a worker thread is taken; no queue)
+valuation_limiter = StageLimiter("valuation", VALUATION_MAX_IN_FLIGHT, 0)
+# External calls
+geocode_limiter = StageLimiter("geocode", GEOCODE_CONCURRENCY, GEOCODE_QUEUE_SIZE)
+openai_limiter = StageLimiter("openai", OPENAI_CONCURRENCY, OPENAI_QUEUE_SIZE)
+wix_limiter = StageLimiter("wix", WIX_CONCURRENCY, WIX_QUEUE_SIZE)
+
+limiters = {limiter.name: limiter for limiter in (valuation_limiter, geocode_limiter, openai_limiter, wix_limiter)}
+
+
+def _limiter_stat(stat: str):
+    return lambda: {(("stage", name),): getattr(limiter, stat) for name, limiter in limiters.items()}
+
+
+Gauge("admission_active", "Callers inside each admission-controlled stage", _limiter_stat("active"))
+Gauge("admission_waiting", "Callers queued for each admission-controlled stage", _limiter_stat("waiting"))
+CallbackCounter("admission_rejected_total", "Callers turned away by admission control", _limiter_stat("rejected"))
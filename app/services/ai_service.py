@@ -3,7 +3,8 @@ from typing import List, Dict, Optional
 
 def build_ai_input(
     subject_property: Dict,
-    comparable_properties: List[Dict]
+    comparable_properties: List[Dict],
+    search_radius_miles: Optional[float] = 1
 ) -> Dict:
     """
     Build AI-ready input structure for valuation.
@@ -11,6 +12,7 @@ def build_ai_input(
     Args:
         subject_property: The property being valued (with condition_score)
         comparable_properties: List of comparable sales (each with own condition)
+        search_radius_miles: Radius the comparables came from (None = city-wide)
         
     Returns:
         Dictionary ready for AI analysis
@@ -30,8 +32,9 @@ def build_ai_input(
         },
         "comparables": comparable_properties,
         "total_comparables": len(comparable_properties),
+        "search_radius_miles": search_radius_miles,
         "methodology": {
-            "radius": "1 mile maximum",
+            "radius": f"{search_radius_miles:g} mile maximum" if search_radius_miles else "city-wide",
             "weighting": "Distance-based (closer = higher weight)",
             "sorting": "By proximity (closest first)"
         }
@@ -0,0 +1,17 @@
+import hmac
+from typing import Optional
+
+from app.config.settings import ADMIN_TOKEN
+
+
+def admin_enabled() -> bool:
+    return bool(ADMIN_TOKEN)
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """
+    Constant-time check against ADMIN_TOKEN. Always False when it is unset.
+    """
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
@@ -1,6 +1,145 @@
-from typing import List, Dict
-from app.models.subject_property import SubjectProperty
+from typing import Collection, List, Dict, FrozenSet, Iterator, Optional, Sequence, Tuple, Union
+from collections.abc import Mapping
 import math
+import threading
+from app.models.subject_property import SubjectProperty
+from app.services.cache import LRUCache
+from app.services.mls_dataset import (
+    CityShard, ListingStatus, MLSDataset, SelectionFunnel, ZipAdjacency, haversine_miles,
+    iter_bits, normalize_city, parse_zip
+)
+from app.config.settings import (
+    COMPARABLE_RADIUS_STEPS, COMPARABLE_SELECTION_MODE, KNN_MAX_DISTANCE, MIN_COMPARABLES,
+    SELECTION_CACHE_GRID_DEGREES, SELECTION_CACHE_SIZE, SELECTION_CACHE_SQFT_BUCKET,
+    SELECTION_CACHE_YEAR_BUCKET
+)
+import numpy as np
+
+SELECTION_MODES = ("radius", "knn")
+
+
+class HotSubjects:
+    """
+    Request counts per quantized subject, used to pre-warm the selection
+    cache after a refresh. Keeps the latest subject seen for each key and
+    drops the least requested half when it grows past capacity.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counts: Dict[Tuple, int] = {}
+        self._subjects: Dict[Tuple, Tuple[SubjectProperty, str]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Tuple, subject: SubjectProperty, mode: str) -> None:
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._subjects[key] = (subject, mode)
+            if len(self._counts) > self.capacity:
+                for stale in self._ranked()[self.capacity // 2:]:
+                    del self._counts[stale]
+                    del self._subjects[stale]
+
+    def top(self, n: int) -> List[Tuple[SubjectProperty, str]]:
+        with self._lock:
+            return [self._subjects[key] for key in self._ranked()[:n]]
+
+    def _ranked(self) -> List[Tuple]:
+        return sorted(self._counts, key=self._counts.get, reverse=True)
+
+
+# Shared across requests; keys start with the dataset version
+selection_cache = LRUCache(SELECTION_CACHE_SIZE, name="selection")
+hot_subjects = HotSubjects(SELECTION_CACHE_SIZE)
+
+
+def prewarm_selection_cache(dataset: MLSDataset, top_n: int) -> int:
+    """
+    Run selection for the top_n most requested subjects against a freshly
+    loaded dataset. Returns how many selections were cached.
+    """
+    warmed = 0
+    for subject, mode in hot_subjects.top(top_n):
+        ComparableSelector(subject, mode=mode).select(dataset, record_hot=False)
+        warmed += 1
+    return warmed
+
+
+class ComparableMatch(Mapping):
+    """
+    Read-only view of one selected comparable.
+
+    Stores the record's position in the dataset plus the distance and
+    weight computed for this request. The shared MLS record is never
+    modified, so cached data can be reused across concurrent requests.
+
+    Behaves like the record dict it points at, with the per-request
+    "_distance" and "_weight" keys layered on top.
+    """
+
+    __slots__ = ("index", "distance", "weight", "_record")
+
+    def __init__(self, index: int, distance: float, weight: float, record: Dict):
+        object.__setattr__(self, "index", index)
+        object.__setattr__(self, "distance", distance)
+        object.__setattr__(self, "weight", weight)
+        object.__setattr__(self, "_record", record)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ComparableMatch is immutable")
+
+    def __getitem__(self, key):
+        if key == "_distance":
+            return self.distance
+        if key == "_weight":
+            return self.weight
+        return self._record[key]
+
+    def __contains__(self, key) -> bool:
+        return key in ("_distance", "_weight") or key in self._record
+
+    def __iter__(self) -> Iterator:
+        for key in self._record:
+            if key not in ("_distance", "_weight"):
+                yield key
+        yield "_distance"
+        yield "_weight"
+
+    def __len__(self) -> int:
+        return len(self._record) + 2 - sum(
+            1 for key in ("_distance", "_weight") if key in self._record
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"ComparableMatch(index={self.index}, "
+            f"distance={self.distance:.3f}, weight={self.weight})"
+        )
+
+
+class ComparableSet(list):
+    """
+    The ComparableMatch list returned by select(), plus NumPy columns.
+
+    prices and sqft are gathered straight from the dataset's typed
+    columns, so the pricing kernel never rebuilds lists from dicts.
+    """
+
+    def __init__(self, matches: List[ComparableMatch], dataset: MLSDataset):
+        super().__init__(matches)
+        self.dataset = dataset
+        count = len(matches)
+        self.indices = np.fromiter((m.index for m in matches), dtype=np.intp, count=count)
+        self.distances = np.fromiter((m.distance for m in matches), dtype=np.float64, count=count)
+        self.weights = np.fromiter((m.weight for m in matches), dtype=np.float64, count=count)
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self.dataset.column("price")[self.indices]
+
+    @property
+    def sqft(self) -> np.ndarray:
+        return self.dataset.column("sqft")[self.indices]
 
 
 class ComparableSelector:
@@ -9,10 +148,44 @@ class ComparableSelector:
     based on the subject property.
     
     🔥 UPDATED: 1 mile radius, weight system, handles MLS data structure
+
+    The radius starts at the first of radius_steps and widens step by step
+    until min_comparables are found; radius_used records where it stopped
+    (None when the subject has no coordinates and the search is city-wide).
+
+    mode="knn" replaces the hard filters with one nearest-neighbour query
+    in the shard's feature space (see KNNIndex): the most similar closed
+    sales within max_feature_distance, weighted by similarity.
+
+    Every select() records a SelectionFunnel (self.funnel): candidates left
+    after each stage and the time it took, for explain mode.
+
+    exclude holds dataset indices that are never returned (the subject's
+    own sale in a leave-one-out backtest); such selections bypass the cache.
     """
 
-    def __init__(self, subject: SubjectProperty):
+    def __init__(
+        self,
+        subject: SubjectProperty,
+        radius_steps: Sequence[float] = COMPARABLE_RADIUS_STEPS,
+        min_comparables: int = MIN_COMPARABLES,
+        mode: Optional[str] = None,
+        max_feature_distance: float = KNN_MAX_DISTANCE,
+        exclude: Collection[int] = ()
+    ):
+        mode = mode or COMPARABLE_SELECTION_MODE
+        if mode not in SELECTION_MODES:
+            raise ValueError(f"Unknown selection mode: {mode}")
+
         self.subject = subject
+        self.radius_steps = tuple(radius_steps)
+        self.min_comparables = min_comparables
+        self.mode = mode
+        self.max_feature_distance = max_feature_distance
+        self.exclude = frozenset(exclude)
+        self.radius_used: Optional[float] = None
+        self.funnel: Optional[SelectionFunnel] = None
+        self.cache_hit = False
 
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
@@ -21,31 +194,50 @@ class ComparableSelector:
         if not all([lat1, lon1, lat2, lon2]):
             return float('inf')  # Return infinite distance if coordinates missing
 
-        # Convert to radians
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-
-        # Haversine formula
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        
-        a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Radius of Earth in miles
-        radius_miles = 3958.8
-        
-        distance = radius_miles * c
-        return distance
+        return haversine_miles(lat1, lon1, lat2, lon2)
 
-    def is_comparable(self, comp: Dict) -> bool:
+    def is_comparable(
+        self,
+        comp: Dict,
+        allowed_zips: Optional[FrozenSet[int]] = None,
+        radius_miles: float = 1
+    ) -> bool:
         """
         Decide whether a MLS record is a valid comparable.
         
         🔥 UPDATED: Handles MLS data structure (no state field, uses "street" for address)
         """
+        return (
+            self.is_nearby(comp, allowed_zips, radius_miles)
+            and self.has_similar_features(comp)
+        )
+
+    def allowed_zips(
+        self,
+        adjacency: ZipAdjacency,
+        radius_miles: float = 1
+    ) -> Optional[FrozenSet[int]]:
+        """
+        Zip codes a comparable may come from, None for no zip filter.
+
+        With coordinates: every zip that can reach within the radius of the subject.
+        Without: the subject zip's neighbors from the adjacency table.
+        """
+        if self.subject.latitude and self.subject.longitude:
+            return adjacency.zips_near(
+                self.subject.latitude, self.subject.longitude, radius_miles
+            )
+        return adjacency.neighbors_of(parse_zip(self.subject.zip_code))
+
+    def is_nearby(
+        self,
+        comp: Dict,
+        allowed_zips: Optional[FrozenSet[int]] = None,
+        radius_miles: float = 1
+    ) -> bool:
+        """
+        Location filters: city, zip proximity and search radius (1 mile by default).
+        """
 
         # ============================================
         # 🔥 LOCATION FILTERS
@@ -61,20 +253,13 @@ class ComparableSelector:
         # Filter 2: State - Skip check (MLS data doesn't have state field)
         # All Charlotte properties are NC by default
         
-        # Filter 3: Zip code proximity (within same zip or adjacent)
-        comp_zip = str(comp.get("zip", "")).strip()
-        subject_zip = str(self.subject.zip_code).strip()
-        
-        # If zip codes are very different (>100 apart), likely too far
-        if comp_zip and subject_zip:
-            try:
-                zip_diff = abs(int(comp_zip) - int(subject_zip))
-                if zip_diff > 100:  # More than 100 zip codes apart
-                    return False
-            except (ValueError, TypeError):
-                pass  # If zip codes aren't numeric, skip this check
+        # Filter 3: Zip code proximity (same or neighboring zip, see ZipAdjacency)
+        if allowed_zips is not None:
+            comp_zip = parse_zip(comp.get("zip"))
+            if comp_zip and comp_zip not in allowed_zips:
+                return False
         
-        # Filter 4: Distance check - 1 MILE RADIUS MAX (client requirement)
+        # Filter 4: Distance check - 1 MILE RADIUS unless expanded (client requirement)
         if self.subject.latitude and self.subject.longitude:
             comp_lat = comp.get("latitude")
             comp_lon = comp.get("longitude")
@@ -87,8 +272,8 @@ class ComparableSelector:
                     comp_lon
                 )
                 
-                # Reject if more than 1 mile away
-                if distance > 1:
+                # Reject if outside the search radius
+                if distance > radius_miles:
                     return False
             else:
                 # No coordinates in comp - skip this property
@@ -98,6 +283,13 @@ class ComparableSelector:
             # This shouldn't happen but handle gracefully
             pass
 
+        return True
+
+    def has_similar_features(self, comp: Dict) -> bool:
+        """
+        Property filters: beds, baths, sqft, year built and status.
+        """
+
         # ============================================
         # PROPERTY FILTERS
         # ============================================
@@ -128,66 +320,342 @@ class ComparableSelector:
             if abs(year_built - self.subject.year_built) > 20:
                 return False
 
-        # Status filter (only closed sales)
-        status = comp.get("status")
-        if status != "Closed":
+        # Status filter (only closed sales; parsed like the dataset's status index)
+        if ListingStatus.parse(comp.get("status")) != ListingStatus.CLOSED:
             return False
 
         return True
 
-    def select(self, mls_records: List[Dict], limit: int = 25) -> List[Dict]:
+    def distance_weight(self, distance: float) -> float:
+        """
+        Weight system: closer = better (client requirement)
+        """
+        if distance < 0.1:
+            return 10.0  # Very close - immediate neighbors
+        elif distance < 0.25:
+            return 8.0   # Close - same block
+        elif distance < 0.5:
+            return 6.0   # Nearby - walking distance
+        elif distance < 0.75:
+            return 4.0   # Moderate - short drive
+        elif distance <= 1:
+            return 2.0   # Far - edge of 1 mile radius
+        return 1.0       # Beyond 1 mile - only found by an expanded radius
+
+    def similarity_weight(self, feature_distance: float) -> float:
+        """
+        k-NN weight: 10 for an identical home, falling smoothly with feature distance.
+        """
+        return 10.0 / (1.0 + feature_distance)
+
+    def select(
+        self,
+        mls_records: Union[MLSDataset, List[Dict]],
+        limit: int = 25,
+        record_hot: bool = True
+    ) -> ComparableSet:
         """
         Return top relevant comparable properties.
         
         🔥 UPDATED: Distance-based weighting system - closer properties prioritized!
+
+        Records are never mutated: each result is a read-only ComparableMatch
+        (index, distance, weight) over the given records.
+
+        The property and zip filters are answered by the city shard's
+        indexes and the distance check reads the columns normalized at
+        ingest. A plain list is indexed on the fly.
+
+        In knn mode the result is ordered by similarity instead of distance.
+
+        Results are cached per quantized subject (see cache_key), so nearby
+        repeat requests skip the search and only recompute distances. The
+        key is coarser than the filters, so in radius mode a cached
+        selection is checked again against this subject's sqft and year
+        bands and search radius; if that leaves fewer than min_comparables
+        the search runs afresh.
+
+        Each call counts towards hot_subjects unless record_hot is False,
+        as on the pre-warm path, which would otherwise count its own
+        replays and keep the same subjects hot forever.
         """
+        if not isinstance(mls_records, MLSDataset):
+            mls_records = MLSDataset(mls_records)
 
-        selected = []
-
-        for record in mls_records:
-            if self.is_comparable(record):
-                # Calculate distance and add weight to record
-                if self.subject.latitude and self.subject.longitude:
-                    comp_lat = record.get("latitude", 0)
-                    comp_lon = record.get("longitude", 0)
-                    if comp_lat and comp_lon:
-                        distance = self.calculate_distance(
-                            self.subject.latitude,
-                            self.subject.longitude,
-                            comp_lat,
-                            comp_lon
-                        )
-                        record['_distance'] = distance
-                        
-                        # Weight system: closer = better (client requirement)
-                        if distance < 0.1:
-                            record['_weight'] = 10.0  # Very close - immediate neighbors
-                        elif distance < 0.25:
-                            record['_weight'] = 8.0   # Close - same block
-                        elif distance < 0.5:
-                            record['_weight'] = 6.0   # Nearby - walking distance
-                        elif distance < 0.75:
-                            record['_weight'] = 4.0   # Moderate - short drive
-                        else:
-                            record['_weight'] = 2.0   # Far - edge of 1 mile radius
-                    else:
-                        record['_distance'] = float('inf')
-                        record['_weight'] = 1.0
-                else:
-                    record['_distance'] = float('inf')
-                    record['_weight'] = 1.0
-                    
-                selected.append(record)
+        self.funnel = SelectionFunnel(len(mls_records))
+        key = None
+        cached = None
+        if not self.exclude:
+            key = self.cache_key(mls_records, limit)
+            if record_hot:
+                hot_subjects.record(key[1:], self.subject, self.mode)
+            cached = selection_cache.get(key)
+        if cached is not None:
+            indices, weights, radius_used, stages = cached
+            matches = self._rematch(mls_records, indices, weights)
+            if self.mode == "radius":
+                matches = self._refilter(mls_records, matches, radius_used)
+            if len(matches) == len(indices) or len(matches) >= self.min_comparables:
+                # The funnel is the one recorded when the entry was computed
+                self.cache_hit = True
+                self.radius_used = radius_used
+                self.funnel.stages = list(stages)
+                return ComparableSet(matches, mls_records)
+        self.cache_hit = False
+
+        if self.mode == "knn":
+            # Already ranked by similarity
+            selected = self._select_by_similarity(mls_records, limit)
+        else:
+            selected = self._rank(self._select_from_dataset(mls_records))[:limit]
+        self.funnel.record("limit", len(selected))
+
+        if key is None:
+            return ComparableSet(selected, mls_records)
+        selection_cache.put(key, (
+            tuple(match.index for match in selected),
+            tuple(match.weight for match in selected) if self.mode == "knn" else None,
+            self.radius_used,
+            tuple(self.funnel.stages)
+        ))
+        return ComparableSet(selected, mls_records)
+
+    def cache_key(self, dataset: MLSDataset, limit: int) -> Tuple:
+        """
+        Selection cache key: dataset version first, then the subject
+        quantized (location snapped to a fine grid, sqft and year bucketed)
+        and the selection settings.
+        """
+        lat = self.subject.latitude
+        lon = self.subject.longitude
+        has_coords = bool(lat and lon)
+        return (
+            dataset.version,
+            normalize_city(self.subject.city),
+            parse_zip(self.subject.zip_code),
+            round(lat / SELECTION_CACHE_GRID_DEGREES) if has_coords else None,
+            round(lon / SELECTION_CACHE_GRID_DEGREES) if has_coords else None,
+            self.subject.bedrooms,
+            self.subject.bathrooms,
+            round(self.subject.square_footage / SELECTION_CACHE_SQFT_BUCKET),
+            round(self.subject.year_built / SELECTION_CACHE_YEAR_BUCKET),
+            self.mode,
+            self.radius_steps,
+            self.min_comparables,
+            self.max_feature_distance,
+            limit,
+        )
 
-        # 🔥 Sort by distance (closest first)
+    def _rank(self, selected: List[ComparableMatch]) -> List[ComparableMatch]:
+        """
+        Closest first; by square footage difference when the subject has no coordinates.
+        """
         if self.subject.latitude and self.subject.longitude:
-            selected.sort(key=lambda x: x.get('_distance', float('inf')))
+            # 🔥 Sort by distance (closest first)
+            selected.sort(key=lambda match: match.distance)
         else:
             # Fallback: Sort by closest square footage
             selected.sort(
-                key=lambda x: abs(
-                    x.get("areaSqft", 0) - self.subject.square_footage
+                key=lambda match: abs(
+                    match.get("areaSqft", 0) - self.subject.square_footage
                 )
             )
+        return selected
+
+    def _rematch(
+        self,
+        dataset: MLSDataset,
+        indices: Sequence[int],
+        weights: Optional[Sequence[float]]
+    ) -> List[ComparableMatch]:
+        """
+        Rebuild a cached selection for this subject: distances are recomputed
+        from its exact location and, in radius mode, so are the weights.
+        """
+        matches = []
+        for position, index in enumerate(indices):
+            distance = self.calculate_distance(
+                self.subject.latitude, self.subject.longitude,
+                dataset.latitude[index], dataset.longitude[index]
+            )
+            weight = weights[position] if weights is not None else self.distance_weight(distance)
+            matches.append(ComparableMatch(index, distance, weight, dataset.records[index]))
+
+        if self.mode == "knn":
+            return matches
+        return self._rank(matches)
+
+    def _refilter(
+        self,
+        dataset: MLSDataset,
+        matches: List[ComparableMatch],
+        radius_used: Optional[float]
+    ) -> List[ComparableMatch]:
+        """
+        The cached matches that pass this subject's own sqft (±25%) and
+        year (±20, unknown passes) bands and lie within radius_used.
+        """
+        sqft = dataset.column("sqft")
+        years = dataset.column("year_built")
+        lower_sqft = self.subject.square_footage * 0.75
+        upper_sqft = self.subject.square_footage * 1.25
+        return [
+            match for match in matches
+            if lower_sqft <= sqft[match.index] <= upper_sqft
+            and (not years[match.index] or abs(years[match.index] - self.subject.year_built) <= 20)
+            and (radius_used is None or match.distance <= radius_used)
+        ]
+
+    def _city_shard(self, dataset: MLSDataset) -> Optional[CityShard]:
+        shard = dataset.shard(self.subject.city)
+        self.funnel.record("city", len(shard) if shard is not None else 0)
+        return shard
+
+    def _select_from_dataset(self, dataset: MLSDataset) -> List[ComparableMatch]:
+        """
+        Same filters as is_comparable, answered from the dataset's city shard
+        and typed columns instead of the record dicts.
+        """
+        self.radius_used = None
+
+        shard = self._city_shard(dataset)
+        if shard is None:
+            return []
+        # Rows missing sqft/beds/baths are never indexed
+        self.funnel.record("missing_fields", len(shard.index))
+
+        if self.subject.latitude and self.subject.longitude:
+            return self._select_by_radius(dataset, shard)
+
+        # No coordinates: city-wide search, zip neighbors only
+        candidates = shard.candidates(
+            self.subject.bedrooms,
+            self.subject.bathrooms,
+            self.subject.square_footage,
+            self.subject.year_built,
+            zips=self.allowed_zips(dataset.zip_adjacency),
+            funnel=self.funnel
+        )
+        return [
+            ComparableMatch(index, float('inf'), 1.0, dataset.records[index])
+            for index in candidates
+            if index not in self.exclude
+        ]
+
+    def _select_by_radius(self, dataset: MLSDataset, shard: CityShard) -> List[ComparableMatch]:
+        """
+        Ring-by-ring search over the shard's spatial grid.
+
+        Each radius step only visits grid cells not seen by earlier steps.
+        Distances are computed once per row; rows just outside a radius are
+        kept and accepted by a later step if it reaches them.
+        """
+        lat = self.subject.latitude
+        lon = self.subject.longitude
+        max_radius = max(self.radius_steps)
+
+        # Property and zip filters, shared by every ring
+        mask = shard.index.mask(
+            self.subject.bedrooms,
+            self.subject.bathrooms,
+            self.subject.square_footage,
+            self.subject.year_built,
+            zips=self.allowed_zips(dataset.zip_adjacency, max_radius),
+            funnel=self.funnel
+        )
+
+        rows = shard.index.rows
+        lats = dataset.latitude
+        lons = dataset.longitude
+
+        visited = set()
+        outside = []   # (distance, index) seen but beyond the current radius
+        found = []
+
+        for radius in self.radius_steps:
+            self.radius_used = radius
+
+            cells = shard.grid.cells_within(lat, lon, radius) - visited
+            visited |= cells
+
+            for pos in iter_bits(mask & shard.grid.mask(cells)):
+                index = rows[pos]
+                if index in self.exclude:
+                    continue
+                outside.append((haversine_miles(lat, lon, lats[index], lons[index]), index))
+
+            still_outside = []
+            for distance, index in outside:
+                if distance <= radius:
+                    found.append((distance, index))
+                else:
+                    still_outside.append((distance, index))
+            outside = still_outside
+
+            if len(found) >= self.min_comparables:
+                break
+
+        self.funnel.record("distance", len(found))
+
+        # Dataset order for equal distances, like a full scan
+        found.sort()
+        return [
+            ComparableMatch(index, distance, self.distance_weight(distance), dataset.records[index])
+            for distance, index in found
+        ]
+
+    def _select_by_similarity(self, dataset: MLSDataset, limit: int) -> List[ComparableMatch]:
+        """
+        The limit most similar closed sales from one k-NN query.
+
+        A subject without coordinates is placed at its zip's centroid;
+        radius_used is then None and distances are unknown (inf).
+        """
+        self.radius_used = None
+
+        shard = self._city_shard(dataset)
+        if shard is None:
+            return []
+        # Only closed sales with sqft/beds/baths are in the k-NN index
+        self.funnel.record("status", len(shard.knn))
+
+        lat = self.subject.latitude
+        lon = self.subject.longitude
+        has_coords = bool(lat and lon)
+        if not has_coords:
+            lat, lon = dataset.zip_adjacency.centroids.get(
+                parse_zip(self.subject.zip_code), (None, None)
+            )
+
+        indices, feature_distances = shard.knn.query(
+            lat,
+            lon,
+            self.subject.square_footage,
+            self.subject.bedrooms,
+            self.subject.bathrooms,
+            self.subject.year_built,
+            k=limit + len(self.exclude),
+            max_distance=self.max_feature_distance
+        )
+
+        matches = []
+        for index, feature_distance in zip(indices.tolist(), feature_distances.tolist()):
+            if index in self.exclude:
+                continue
+            if len(matches) == limit:
+                break
+            distance = self.calculate_distance(
+                self.subject.latitude, self.subject.longitude,
+                dataset.latitude[index], dataset.longitude[index]
+            )
+            matches.append(ComparableMatch(
+                index, distance, self.similarity_weight(feature_distance), dataset.records[index]
+            ))
+
+        self.funnel.record("similarity", len(matches))
 
-        return selected[:limit]
\ No newline at end of file
+        if has_coords and matches:
+            farthest = max(match.distance for match in matches)
+            if farthest != float('inf'):
+                self.radius_used = math.ceil(farthest * 10) / 10
+        return matches
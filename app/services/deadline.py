@@ -0,0 +1,96 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from app.config.settings import DEADLINE_RESERVE_SECONDS, MIN_STAGE_TIMEOUT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Deadline of the current request; None outside requests (jobs, warm-up)
+_current: ContextVar[Optional["Deadline"]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """
+    A required stage cannot start: the request's time budget is spent.
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"time budget spent before {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    A request's time budget. Stages take their timeout from what is left
+    instead of a fixed number of seconds; stages that were skipped, or
+    timed out on a budget-derived timeout, are listed in cut_short.
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires = time.monotonic() + budget_seconds
+        self.cut_short: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def cut(self, stage: str) -> None:
+        if stage not in self.cut_short:
+            self.cut_short.append(stage)
+
+
+def start(budget_seconds: float) -> Deadline:
+    """
+    Begin a budget for the current request (context).
+    """
+    deadline = Deadline(budget_seconds)
+    _current.set(deadline)
+    return deadline
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def cut_short(stage: str) -> None:
+    """
+    Record that a stage ran out of time (no-op outside requests).
+    """
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.cut(stage)
+
+
+def stage_timeout(stage: str, limit: float) -> float:
+    """
+    Timeout for a required stage: its usual limit, or what is left of
+    the budget if that is less. Raises DeadlineExceeded when not even
+    MIN_STAGE_TIMEOUT_SECONDS remain.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return limit
+    remaining = deadline.remaining()
+    if remaining < MIN_STAGE_TIMEOUT_SECONDS:
+        deadline.cut(stage)
+        raise DeadlineExceeded(stage)
+    return min(limit, remaining)
+
+
+def optional_timeout(stage: str, limit: float, needed: float) -> Optional[float]:
+    """
+    Timeout for an optional stage, or None to skip it. The stage may use
+    the budget minus DEADLINE_RESERVE_SECONDS (kept for the required
+    stages after it); less than `needed` of that and it is dropped.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return limit
+    available = deadline.remaining() - DEADLINE_RESERVE_SECONDS
+    if available < needed:
+        deadline.cut(stage)
+        logger.warning("⚠️ Skipping %s: %.1fs left of the %.0fs budget", stage, deadline.remaining(), deadline.budget)
+        return None
+    return min(limit, available)
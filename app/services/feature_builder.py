@@ -1,5 +1,6 @@
-from typing import List, Dict
-from statistics import mean
+from typing import List, Dict, Optional
+
+from app.services import pricing_kernel
 
 
 class FeatureBuilder:
@@ -13,61 +14,102 @@ class FeatureBuilder:
     """
 
     @staticmethod
-    def build(comparables: List[Dict], condition_score: int) -> Dict:
+    def build(
+        comparables: List[Dict],
+        condition_score: int,
+        search_radius_miles: Optional[float] = None,
+        subject_sqft: Optional[float] = None,
+        market_baseline: Optional[Dict] = None,
+        hedonic_estimate: Optional[Dict] = None
+    ) -> Dict:
         """
         Calculate price features from comparable properties.
         
         Args:
-            comparables: List of comparable properties with prices, sqft, and weights
+            comparables: Selected comparables - a ComparableSet (read as column
+                arrays) or any list of dicts with prices, sqft, and weights
             condition_score: Property condition rating (1-10)
+            search_radius_miles: Radius the comparables came from (None = city-wide)
+            subject_sqft: Subject living area, enables the $/sqft-based estimate
+            market_baseline: MarketAggregates.baseline() for the subject, used
+                as a sanity bound on the estimate
+            hedonic_estimate: HedonicModel.estimate() for the subject; when given
+                it replaces the weighted average as the headline price
             
         Returns:
             Dictionary with price analysis and valuation range
         """
-        prices = []
-        weights = []
-        price_per_sqft = []
+        if hasattr(comparables, "prices"):
+            prices, sqft, weights = comparables.prices, comparables.sqft, comparables.weights
+        else:
+            prices, sqft, weights = pricing_kernel.columns_from_records(comparables)
 
-        for comp in comparables:
-            price = comp.get("price")
-            sqft = comp.get("areaSqft")
-            weight = comp.get("_weight", 1.0)  # Distance-based weight from comparable_selector
+        features = pricing_kernel.price_features(
+            prices, sqft, weights, condition_score, subject_sqft
+        )
+        if features is None:
+            raise ValueError("No valid comparable prices found")
 
-            if price and sqft and sqft > 0:
-                prices.append(price)
-                weights.append(weight)
-                price_per_sqft.append(price / sqft)
+        features["search_radius_miles"] = search_radius_miles
 
-        if not prices:
-            raise ValueError("No valid comparable prices found")
+        if hedonic_estimate:
+            # Model price + comp residuals, band from how well the comps fit the model
+            multiplier = pricing_kernel.condition_multiplier(condition_score)
+            adjusted_price = hedonic_estimate["estimated_price"] * multiplier
+            band = min(max(hedonic_estimate["spread"], 0.04), 0.15)
+            features["adjusted_estimated_price"] = round(adjusted_price)
+            features["price_range"] = {
+                "min": round(adjusted_price * (1 - band)),
+                "max": round(adjusted_price * (1 + band))
+            }
+            features["price_band"] = round(band, 4)
+            features["hedonic_estimate"] = hedonic_estimate
+            features["estimate_basis"] = "hedonic"
 
-        # 🔥 Weighted average price - closer properties have MORE influence
-        if weights and sum(weights) > 0:
-            avg_price = sum(p * w for p, w in zip(prices, weights)) / sum(weights)
-            avg_price_sqft = sum(pps * w for pps, w in zip(price_per_sqft, weights)) / sum(weights)
-        else:
-            # Fallback to equal weight if no weights available
-            avg_price = mean(prices)
-            avg_price_sqft = mean(price_per_sqft)
+        if market_baseline:
+            features["market_baseline"] = market_baseline
+            if subject_sqft:
+                # Sanity bound: 10th-90th percentile $/sqft of nearby closed sales
+                quantiles = market_baseline["price_per_sqft_quantiles"]
+                multiplier = pricing_kernel.condition_multiplier(condition_score)
+                bounds = {
+                    "min": round(quantiles["p10"] * subject_sqft * multiplier),
+                    "max": round(quantiles["p90"] * subject_sqft * multiplier)
+                }
+                features["market_bounds"] = bounds
+                features["within_market_bounds"] = (
+                    bounds["min"] <= features["adjusted_estimated_price"] <= bounds["max"]
+                )
 
-        # Condition multiplier (industry standard: 3% per point from baseline of 5)
-        # Example: Condition 8 = 1.09x multiplier (9% increase)
-        # Example: Condition 3 = 0.94x multiplier (6% decrease)
-        condition_multiplier = 1 + ((condition_score - 5) * 0.03)
+        return features
 
-        # Apply condition adjustment
-        adjusted_price = avg_price * condition_multiplier
+    @staticmethod
+    def from_market_baseline(
+        market_baseline: Dict,
+        condition_score: int,
+        subject_sqft: float
+    ) -> Dict:
+        """
+        Fast estimate from precomputed market aggregates only.
+
+        Median $/sqft of the subject's cell times its square footage, with
+        the usual condition multiplier and ±8% range. Returns the same keys
+        as build() so prompts and responses work unchanged.
+        """
+        median_price_sqft = market_baseline["price_per_sqft_quantiles"]["p50"]
+        multiplier = pricing_kernel.condition_multiplier(condition_score)
+        adjusted_price = median_price_sqft * subject_sqft * multiplier
 
-        # Price range: ±8% (industry standard confidence interval)
         return {
-            "total_comparables": len(prices),
-            "average_price": round(avg_price),
-            "average_price_per_sqft": round(avg_price_sqft, 2),
+            "total_comparables": market_baseline["count"],
+            "average_price": market_baseline["average_price"],
+            "average_price_per_sqft": market_baseline["average_price_per_sqft"],
             "condition_score": condition_score,
-            "condition_multiplier": round(condition_multiplier, 2),
+            "condition_multiplier": round(multiplier, 2),
             "adjusted_estimated_price": round(adjusted_price),
-            "price_range": {
-                "min": round(adjusted_price * 0.92),  # -8%
-                "max": round(adjusted_price * 1.08)   # +8%
-            }
-        }
\ No newline at end of file
+            "price_range": pricing_kernel.price_range(adjusted_price),
+            "median_price_per_sqft": median_price_sqft,
+            "search_radius_miles": None,
+            "market_baseline": market_baseline,
+            "estimate_basis": "market_aggregate",
+        }
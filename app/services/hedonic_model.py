@@ -0,0 +1,339 @@
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import HEDONIC_MAX_STALE_HOURS, HEDONIC_MIN_SALES, HEDONIC_MODEL_DIR
+from app.services.mls_dataset import EARTH_RADIUS_MILES, ListingStatus, MLSDataset, parse_zip
+
+FEATURES = ("intercept", "log_sqft", "bedrooms", "bathrooms", "age", "distance_miles")
+RIDGE_PENALTY = 1.0  # Keeps thin markets stable; intercept is not penalized
+
+logger = logging.getLogger(__name__)
+
+# (dataset version, its model or the stale fallback; None: no usable model).
+# Replaced as a whole, never mutated, so concurrent requests need no lock
+_loaded: Optional[Tuple[str, Optional["HedonicModel"]]] = None
+
+
+def distance_miles(lat: np.ndarray, lon: np.ndarray, center_lat: float, center_lon: float) -> np.ndarray:
+    """
+    Vectorized haversine distance from a center point.
+    """
+    lat1 = np.radians(center_lat)
+    lat2 = np.radians(lat)
+    dlat = lat2 - lat1
+    dlon = np.radians(lon) - np.radians(center_lon)
+    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+    return EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(a))
+
+
+def design_matrix(
+    sqft: np.ndarray,
+    beds: np.ndarray,
+    baths: np.ndarray,
+    year: np.ndarray,
+    distance: np.ndarray,
+    reference_year: int,
+    median_year: float
+) -> np.ndarray:
+    """
+    One row per home, columns in FEATURES order. Unknown years use the market median.
+    """
+    year = np.where(year > 0, year, median_year)
+    return np.column_stack([
+        np.ones(len(sqft)),
+        np.log(sqft),
+        beds,
+        baths,
+        reference_year - year,
+        distance,
+    ])
+
+
+def fit_market(task: Tuple) -> Optional[Tuple[str, Dict]]:
+    """
+    Ridge-regularized least squares of log(price) on FEATURES for one market.
+
+    Runs in a worker process; the task carries only that market's arrays.
+    """
+    key, sqft, beds, baths, year, lat, lon, price, reference_year = task
+    if len(price) < HEDONIC_MIN_SALES:
+        return None
+
+    center_lat = float(lat.mean())
+    center_lon = float(lon.mean())
+    known_years = year[year > 0]
+    median_year = float(np.median(known_years)) if len(known_years) else reference_year - 30
+    distance = distance_miles(lat, lon, center_lat, center_lon)
+
+    X = design_matrix(sqft, beds, baths, year, distance, reference_year, median_year)
+    y = np.log(price)
+
+    penalty = np.eye(X.shape[1]) * RIDGE_PENALTY
+    penalty[0, 0] = 0.0
+    coef = np.linalg.solve(X.T @ X + penalty, X.T @ y)
+
+    residuals = y - X @ coef
+    total = ((y - y.mean())**2).sum()
+    return key, {
+        "coef": [round(float(c), 8) for c in coef],
+        "sales": int(len(price)),
+        "r2": round(float(1 - (residuals**2).sum() / total), 4) if total > 0 else 0.0,
+        "rmse_log": round(float(np.sqrt((residuals**2).mean())), 4),
+        "centroid": [round(center_lat, 6), round(center_lon, 6)],
+        "median_year": median_year,
+        "mean_distance": round(float(distance.mean()), 3),
+    }
+
+
+def _market_tasks(dataset: MLSDataset, reference_year: int) -> List[Tuple]:
+    """
+    One task per city and per city+zip, closed sales with coordinates only.
+    """
+    price = dataset.column("price")
+    sqft = dataset.column("sqft")
+    lat = dataset.column("latitude")
+    lon = dataset.column("longitude")
+    beds = dataset.column("bedrooms")
+    baths = dataset.column("bathrooms")
+    year = dataset.column("year_built")
+    zips = dataset.column("zip")
+
+    usable = (
+        (dataset.column("status") == ListingStatus.CLOSED)
+        & (price > 0) & (sqft > 0) & (lat != 0) & (lon != 0)
+        & (beds == beds) & (baths == baths)
+    )
+
+    tasks = []
+    for city, shard in dataset.shards.items():
+        rows = np.asarray(shard.indices, dtype=np.intp)
+        rows = rows[usable[rows]]
+        if len(rows) < HEDONIC_MIN_SALES:
+            continue
+
+        groups = [(city, rows)]
+        for zip_code in np.unique(zips[rows]).tolist():
+            if zip_code:
+                groups.append((f"{city}|{zip_code}", rows[zips[rows] == zip_code]))
+
+        for key, group in groups:
+            if len(group) >= HEDONIC_MIN_SALES:
+                tasks.append((
+                    key, sqft[group], beds[group], baths[group], year[group],
+                    lat[group], lon[group], price[group], reference_year
+                ))
+    return tasks
+
+
+class HedonicModel:
+    """
+    Per-market log-price regression coefficients, fitted offline.
+
+    Markets are "city|zip" with a city-wide fallback. Fitting runs as a
+    batch job (python -m app.jobs.fit_hedonic) across processes and is
+    saved next to the dataset version it was fitted on. At request time
+    a valuation is a dot product plus the comps' weighted residuals.
+
+    stale is True for a model serving a newer dataset than it was fitted
+    on (every refresh changes the version; see load()).
+    """
+
+    def __init__(self, payload: Dict, stale: bool = False):
+        self.dataset_version = payload["dataset_version"]
+        self.fitted_at = payload["fitted_at"]
+        self.reference_year = payload["reference_year"]
+        self.markets: Dict[str, Dict] = payload["markets"]
+        self.stale = stale
+
+    def status(self) -> Dict:
+        return {
+            "dataset_version": self.dataset_version,
+            "fitted_at": self.fitted_at,
+            "age_seconds": int(time.time() - self.fitted_at),
+            "stale": self.stale,
+            "markets": len(self.markets),
+        }
+
+    @classmethod
+    def fit(cls, dataset: MLSDataset, processes: Optional[int] = None) -> "HedonicModel":
+        reference_year = time.gmtime().tm_year
+        tasks = _market_tasks(dataset, reference_year)
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(fit_market, tasks, chunksize=8))
+
+        return cls({
+            "dataset_version": dataset.version,
+            "fitted_at": int(time.time()),
+            "reference_year": reference_year,
+            "features": list(FEATURES),
+            "markets": dict(result for result in results if result),
+        })
+
+    @staticmethod
+    def path_for(version: str, directory: str = HEDONIC_MODEL_DIR) -> str:
+        return os.path.join(directory, f"hedonic_{version}.json")
+
+    def save(self, directory: str = HEDONIC_MODEL_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = self.path_for(self.dataset_version, directory)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "dataset_version": self.dataset_version,
+                "fitted_at": self.fitted_at,
+                "reference_year": self.reference_year,
+                "features": list(FEATURES),
+                "markets": self.markets,
+            }, f)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, version: str, directory: str = HEDONIC_MODEL_DIR) -> Optional["HedonicModel"]:
+        """
+        Coefficients fitted on this dataset version. Until the job has run
+        for it, the newest model fitted on an earlier version stands in
+        (stale=True) if it is at most HEDONIC_MAX_STALE_HOURS old; None if
+        there is no such model.
+
+        Loaded once per version and kept in memory; while only a stale
+        model is available, each call checks whether the job has written
+        this version's file since.
+        """
+        global _loaded
+        path = cls.path_for(version, directory)
+        loaded = _loaded
+        if loaded is not None and loaded[0] == version:
+            model = loaded[1]
+            if (model is not None and not model.stale) or not os.path.exists(path):
+                return model
+
+        if os.path.exists(path):
+            with open(path) as f:
+                model = cls(json.load(f))
+        else:
+            model = cls._newest(directory)
+            if model is None:
+                logger.info("ℹ️ No hedonic model fitted yet; using weighted comparables")
+            elif time.time() - model.fitted_at > HEDONIC_MAX_STALE_HOURS * 3600:
+                logger.warning(
+                    "⚠️ Newest hedonic model (dataset %s) is %.0fh old; not used for dataset %s",
+                    model.dataset_version, (time.time() - model.fitted_at) / 3600, version
+                )
+                model = None
+            else:
+                model.stale = True
+                logger.warning(
+                    "⚠️ No hedonic model for dataset %s yet; using the one fitted on %s (%.1fh old)",
+                    version, model.dataset_version, (time.time() - model.fitted_at) / 3600
+                )
+        _loaded = (version, model)  # Only the current version is ever needed
+        return model
+
+    @classmethod
+    def _newest(cls, directory: str) -> Optional["HedonicModel"]:
+        """
+        The most recently fitted model in directory, if any.
+        """
+        newest = None
+        for path in glob.glob(os.path.join(directory, "hedonic_*.json")):
+            with open(path) as f:
+                payload = json.load(f)
+            if newest is None or payload["fitted_at"] > newest["fitted_at"]:
+                newest = payload
+        return cls(newest) if newest is not None else None
+
+    def market_for(self, city: str, zip_code: int) -> Optional[Tuple[str, Dict]]:
+        """
+        Zip-level market if fitted, otherwise the city-wide one.
+        """
+        for key in (f"{city}|{zip_code}", city):
+            if key in self.markets:
+                return key, self.markets[key]
+        return None
+
+    def estimate(self, dataset: MLSDataset, subject, comparables) -> Optional[Dict]:
+        """
+        Model price for the subject, adjusted by the comps' weighted residuals.
+
+        comparables is the ComparableSet from the selector; the comps'
+        features are read from the dataset columns.
+        """
+        shard = dataset.shard(subject.city)
+        if shard is None:
+            return None
+        found = self.market_for(shard.city, parse_zip(subject.zip_code))
+        if found is None:
+            return None
+        key, market = found
+
+        coef = np.asarray(market["coef"])
+        center_lat, center_lon = market["centroid"]
+
+        if subject.latitude and subject.longitude:
+            subject_distance = float(distance_miles(
+                np.array([subject.latitude]), np.array([subject.longitude]), center_lat, center_lon
+            )[0])
+        else:
+            subject_distance = market["mean_distance"]
+
+        x_subject = design_matrix(
+            np.array([float(subject.square_footage)]),
+            np.array([float(subject.bedrooms)]),
+            np.array([float(subject.bathrooms)]),
+            np.array([float(subject.year_built)]),
+            np.array([subject_distance]),
+            self.reference_year,
+            market["median_year"]
+        )[0]
+        predicted_log = float(x_subject @ coef)
+
+        adjustment = 0.0
+        spread = market["rmse_log"]
+        rows = comparables.indices if comparables is not None else np.empty(0, dtype=np.intp)
+        prices = dataset.column("price")[rows]
+        sqft = dataset.column("sqft")[rows]
+        usable = (prices > 0) & (sqft > 0)
+        if usable.any():
+            rows = rows[usable]
+            lat = dataset.column("latitude")[rows]
+            lon = dataset.column("longitude")[rows]
+            X = design_matrix(
+                sqft[usable],
+                dataset.column("bedrooms")[rows],
+                dataset.column("bathrooms")[rows],
+                dataset.column("year_built")[rows],
+                np.where(
+                    (lat != 0) & (lon != 0),
+                    distance_miles(lat, lon, center_lat, center_lon),
+                    market["mean_distance"]
+                ),
+                self.reference_year,
+                market["median_year"]
+            )
+            residuals = np.log(prices[usable]) - X @ coef
+            weights = comparables.weights[usable]
+            if weights.sum() <= 0:
+                weights = np.ones(len(residuals))
+            adjustment = float(np.dot(residuals, weights) / weights.sum())
+            if len(residuals) > 1:
+                spread = float(np.sqrt(np.dot((residuals - adjustment)**2, weights) / weights.sum()))
+
+        return {
+            "market": key,
+            "model_price": round(float(np.exp(predicted_log))),
+            "comp_residual_adjustment": round(adjustment, 4),
+            "estimated_price": round(float(np.exp(predicted_log + adjustment))),
+            "spread": round(spread, 4),
+            "sales_in_model": market["sales"],
+            "r2": market["r2"],
+            "model_stale": self.stale,
+        }
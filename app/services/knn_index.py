@@ -0,0 +1,208 @@
+import heapq
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+MILES_PER_DEGREE_LAT = 69.0
+
+# One unit of feature distance = the old hard cutoff on that feature:
+# 1 mile, 25% sqft, 1 bedroom, 1 bathroom, 20 years
+SQFT_SCALE = math.log(1.25)
+YEAR_SCALE = 20.0
+
+
+class KDTree:
+    """
+    Static KD-tree over an (n, d) array, built once and queried read-only.
+
+    Nodes are flat arrays; each stores the bounding box of its points, so
+    a query can prune on the exact box distance. Queries take per-dimension
+    weights, which lets callers switch dimensions off (weight 0) without
+    rebuilding the tree.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 64):
+        self.points = points
+        self.order = np.arange(len(points), dtype=np.intp)
+
+        count = len(points)
+        self.start: List[int] = [0]
+        self.end: List[int] = [count]
+        self.children: List[Optional[Tuple[int, int]]] = [None]
+        lows: List[Optional[np.ndarray]] = [None]
+        highs: List[Optional[np.ndarray]] = [None]
+
+        if not count:
+            self.start, self.end, self.children = [], [], []
+            self.lows = np.empty((0, points.shape[1]))
+            self.highs = np.empty((0, points.shape[1]))
+            return
+
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            start, end = self.start[node], self.end[node]
+            block = points[self.order[start:end]]
+            low = lows[node] = block.min(axis=0)
+            high = highs[node] = block.max(axis=0)
+
+            if end - start <= leaf_size:
+                continue
+
+            # Split the widest dimension at its median
+            dim = int(np.argmax(high - low))
+            if high[dim] == low[dim]:
+                continue
+            middle = start + (end - start) // 2
+            partition = np.argpartition(block[:, dim], middle - start)
+            self.order[start:end] = self.order[start:end][partition]
+
+            left = len(self.start)
+            self.children[node] = (left, left + 1)
+            self.start += [start, middle]
+            self.end += [middle, end]
+            self.children += [None, None]
+            lows += [None, None]
+            highs += [None, None]
+            stack += [left + 1, left]
+
+        self.lows = np.asarray(lows)
+        self.highs = np.asarray(highs)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def query(
+        self,
+        point: np.ndarray,
+        k: int,
+        weights: Optional[np.ndarray] = None,
+        max_distance: float = math.inf
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Up to k nearest points within max_distance, closest first.
+
+        Distance is sqrt(sum(weights * (a - b)**2)). Returns (positions in
+        the original points array, distances).
+        """
+        if weights is None:
+            weights = np.ones(len(point))
+        if not len(self.start) or k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        limit = max_distance * max_distance
+        best_positions = np.empty(0, dtype=np.intp)
+        best_distances = np.empty(0)
+
+        heap = [(float(self._box_distance(0, point, weights)), 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            kth = best_distances[-1] if len(best_distances) == k else limit
+            if bound > kth:
+                break
+
+            children = self.children[node]
+            if children is not None:
+                left, right = children
+                left_bound, right_bound = self._box_distance(slice(left, right + 1), point, weights).tolist()
+                if left_bound <= kth:
+                    heapq.heappush(heap, (left_bound, left))
+                if right_bound <= kth:
+                    heapq.heappush(heap, (right_bound, right))
+                continue
+
+            positions = self.order[self.start[node]:self.end[node]]
+            distances = ((self.points[positions] - point) ** 2 * weights).sum(axis=1)
+            keep = distances <= kth
+            if not keep.any():
+                continue
+            best_positions = np.concatenate([best_positions, positions[keep]])
+            best_distances = np.concatenate([best_distances, distances[keep]])
+            ranked = np.lexsort((best_positions, best_distances))[:k]
+            best_positions = best_positions[ranked]
+            best_distances = best_distances[ranked]
+
+        return best_positions, np.sqrt(best_distances)
+
+    def _box_distance(self, nodes, point: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Squared weighted distance from point to each node's bounding box.
+        """
+        gap = np.maximum(self.lows[nodes] - point, 0) + np.maximum(point - self.highs[nodes], 0)
+        return (gap * gap * weights).sum(axis=-1)
+
+
+class KNNIndex:
+    """
+    Closed sales of one city shard as normalized feature vectors.
+
+    Dimensions are (north miles, east miles, log sqft, beds, baths, year),
+    each scaled so one unit equals the hard cutoff is_comparable uses for
+    that feature. A k-NN query therefore ranks comps by overall similarity
+    instead of rejecting anything just past a single boundary.
+    """
+
+    def __init__(self, dataset, indices: List[int], closed_status: int):
+        rows = np.asarray(indices, dtype=np.intp)
+        sqft = dataset.column("sqft")[rows]
+        beds = dataset.column("bedrooms")[rows]
+        baths = dataset.column("bathrooms")[rows]
+        usable = (
+            (dataset.column("status")[rows] == closed_status)
+            & (sqft > 0) & (beds == beds) & (baths == baths)
+        )
+        self.rows = rows[usable]
+
+        lat = dataset.column("latitude")[self.rows]
+        lon = dataset.column("longitude")[self.rows]
+        located = (lat != 0) & (lon != 0)
+        center_lat = float(lat[located].mean()) if located.any() else 0.0
+        self.lon_miles = MILES_PER_DEGREE_LAT * math.cos(math.radians(center_lat))
+
+        years = dataset.column("year_built")[self.rows]
+        known_years = years[years > 0]
+        self.median_year = float(np.median(known_years)) if len(known_years) else 0.0
+
+        self.tree = KDTree(self.vectors(
+            lat, lon, sqft[usable], beds[usable], baths[usable],
+            np.where(years > 0, years, self.median_year)
+        ))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def vectors(self, lat, lon, sqft, beds, baths, year) -> np.ndarray:
+        return np.column_stack([
+            np.asarray(lat, dtype=np.float64) * MILES_PER_DEGREE_LAT,
+            np.asarray(lon, dtype=np.float64) * self.lon_miles,
+            np.log(np.asarray(sqft, dtype=np.float64)) / SQFT_SCALE,
+            np.asarray(beds, dtype=np.float64),
+            np.asarray(baths, dtype=np.float64),
+            np.asarray(year, dtype=np.float64) / YEAR_SCALE,
+        ])
+
+    def query(
+        self,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        sqft: float,
+        beds: float,
+        baths: float,
+        year: float,
+        k: int,
+        max_distance: float = math.inf
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dataset indices of the k most similar closed sales and their
+        feature distances. Without a location, only the home's features count.
+        """
+        located = bool(latitude and longitude)
+        point = self.vectors(
+            [latitude or 0.0], [longitude or 0.0], [sqft], [beds], [baths],
+            [year or self.median_year]
+        )[0]
+        weights = np.array([1.0, 1.0, 1.0, 1.0, 1.0, 1.0] if located else [0.0, 0.0, 1.0, 1.0, 1.0, 1.0])
+
+        positions, distances = self.tree.query(point, k, weights, max_distance)
+        return self.rows[positions], distances
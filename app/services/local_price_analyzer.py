@@ -1,30 +1,27 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from app.services import pricing_kernel
 
 
 def analyze_price_locally(ai_input: Dict) -> Dict:
     """
     Local price analysis without OpenAI.
     Uses 1-mile radius methodology with distance-based weighting.
-    Matches the logic in feature_builder.py
+    Shares the pricing kernel with feature_builder.py
     """
 
     comparables: List[Dict] = ai_input["comparables"]
     subject = ai_input.get("subject", {})
     condition_score = subject.get("condition_score", 5)
+    radius = ai_input.get("search_radius_miles", 1)
 
     # Extract prices and weights
-    prices = []
-    weights = []
-    
-    for comp in comparables:
-        price = comp.get("price")
-        weight = comp.get("_weight", 1.0)
-        
-        if price and price > 0:
-            prices.append(price)
-            weights.append(weight)
-
-    if not prices:
+    prices, _, weights = pricing_kernel.columns_from_records(comparables)
+    valid = prices > 0
+    prices = prices[valid]
+    weights = weights[valid]
+
+    if not len(prices):
         return {
             "price_min": None,
             "price_max": None,
@@ -32,31 +29,52 @@ def analyze_price_locally(ai_input: Dict) -> Dict:
         }
 
     # Weighted average (closer properties have more influence)
-    if weights and sum(weights) > 0:
-        avg_price = sum(p * w for p, w in zip(prices, weights)) / sum(weights)
-    else:
-        avg_price = sum(prices) / len(prices)
+    avg_price = pricing_kernel.weighted_mean(prices, weights)
 
-    # Condition adjustment (matches feature_builder.py)
-    condition_multiplier = 1 + ((condition_score - 5) * 0.03)
+    # Condition adjustment (shared with feature_builder.py)
+    condition_multiplier = pricing_kernel.condition_multiplier(condition_score)
     estimated_price = avg_price * condition_multiplier
 
-    # Price range (±8% as per feature_builder.py)
-    price_min = round(estimated_price * 0.92)
-    price_max = round(estimated_price * 1.08)
+    # Price range (±8%, shared with feature_builder.py)
+    estimate_range = pricing_kernel.price_range(estimated_price)
+    price_min = estimate_range["min"]
+    price_max = estimate_range["max"]
+
+    summary = summarize(
+        price_min, price_max, len(comparables), avg_price,
+        condition_score, condition_multiplier, radius
+    )
+
+    return {
+        "price_min": price_min,
+        "price_max": price_max,
+        "summary": summary
+    }
+
 
-    # Professional summary mentioning methodology
-    total_comps = len(comparables)
+def summarize(
+    price_min: int,
+    price_max: int,
+    total_comps: int,
+    avg_price: float,
+    condition_score: int,
+    condition_multiplier: float,
+    radius: Optional[float]
+) -> str:
+    """
+    Professional summary mentioning methodology, without OpenAI.
+    """
+    search_area = f"within a {radius:g}-mile radius of the property" if radius else "across the city"
     avg_price_formatted = f"${avg_price:,.0f}"
-    
+
     summary = (
         f"The estimated market value range for the subject property is between "
         f"approximately ${price_min:,} and ${price_max:,}. This estimate is based on "
-        f"analysis of {total_comps} comparable sales within a 1-mile radius of the property. "
+        f"analysis of {total_comps} comparable sales {search_area}. "
         f"Properties closer to the subject property were weighted more heavily in the analysis, "
         f"with an average sale price of {avg_price_formatted}. "
     )
-    
+
     if condition_score != 5:
         if condition_score > 5:
             summary += (
@@ -73,13 +91,24 @@ def analyze_price_locally(ai_input: Dict) -> Dict:
             f"The property's average condition (rated {condition_score}/10) "
             f"is reflected in the standard market analysis. "
         )
-    
+
     summary += (
         "This distance-based methodology ensures accurate neighborhood-level valuation."
     )
+    return summary
 
-    return {
-        "price_min": price_min,
-        "price_max": price_max,
-        "summary": summary
-    }
\ No newline at end of file
+
+def summary_from_features(features: Dict) -> str:
+    """
+    The same template for FeatureBuilder output (used when the OpenAI
+    summary is shed under load).
+    """
+    return summarize(
+        features["price_range"]["min"],
+        features["price_range"]["max"],
+        features["total_comparables"],
+        features["average_price"],
+        features["condition_score"],
+        features["condition_multiplier"],
+        features.get("search_radius_miles")
+    )
@@ -0,0 +1,195 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import AGGREGATE_GEOHASH_PRECISION, AGGREGATE_MIN_COUNT
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Upper bounds of the sqft bands (last band is open-ended)
+SQFT_BAND_EDGES = (1000, 1500, 2000, 2500, 3000, 4000)
+QUANTILES = (10, 25, 50, 75, 90)
+
+
+def geohash_codes(lat: np.ndarray, lon: np.ndarray, precision: int) -> np.ndarray:
+    """
+    Geohash cells as integers (5 bits per character), vectorized.
+    """
+    bits = 5 * precision
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+
+    lat_i = np.clip(((lat + 90) / 180 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+    lon_i = np.clip(((lon + 180) / 360 * (1 << lon_bits)).astype(np.int64), 0, (1 << lon_bits) - 1)
+
+    code = np.zeros(len(lat_i), dtype=np.int64)
+    for bit in range(bits):
+        if bit % 2 == 0:
+            value = (lon_i >> (lon_bits - 1 - bit // 2)) & 1
+        else:
+            value = (lat_i >> (lat_bits - 1 - bit // 2)) & 1
+        code = (code << 1) | value
+    return code
+
+
+def geohash_string(code: int, precision: int) -> str:
+    """
+    Integer geohash back to its base32 text ("dnq8e1", ...).
+    """
+    return "".join(
+        _BASE32[(code >> (5 * (precision - 1 - i))) & 31] for i in range(precision)
+    )
+
+
+def beds_band(bedrooms) -> np.ndarray:
+    """
+    Bedroom band 1-5 (5 = five or more).
+    """
+    return np.clip(np.asarray(bedrooms, dtype=np.float64), 1, 5).astype(np.int64)
+
+
+def sqft_band(sqft) -> np.ndarray:
+    """
+    Index of the sqft band (see SQFT_BAND_EDGES).
+    """
+    return np.searchsorted(SQFT_BAND_EDGES, np.asarray(sqft, dtype=np.float64), side="right")
+
+
+class MarketAggregates:
+    """
+    Closed-sale price statistics per geohash cell and bed/sqft band.
+
+    Built once per dataset refresh. Each group stores count, sum of price,
+    sum of $/sqft and $/sqft quantiles. The whole dataset is in memory at
+    build time, so the quantiles are exact rather than sketched.
+
+    Groups exist at four levels, from most to least specific:
+    cell+bands, cell, parent cell+bands and parent cell. A lookup returns
+    the first level with at least min_count sales. That gives an O(1)
+    market baseline for a subject without touching individual records.
+    """
+
+    def __init__(
+        self,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        bedrooms: np.ndarray,
+        sqft: np.ndarray,
+        price: np.ndarray,
+        closed: np.ndarray,
+        precision: int = AGGREGATE_GEOHASH_PRECISION,
+        min_count: int = AGGREGATE_MIN_COUNT
+    ):
+        self.precision = precision
+        self.min_count = min_count
+
+        usable = closed & (latitude != 0) & (longitude != 0) & (sqft > 0) & (price > 0)
+        usable &= bedrooms == bedrooms  # drop NaN bedrooms
+        lat = latitude[usable]
+        lon = longitude[usable]
+        prices = price[usable]
+        ppsf = prices / sqft[usable]
+
+        cells = geohash_codes(lat, lon, precision)
+        bands = beds_band(bedrooms[usable]) * 8 + sqft_band(sqft[usable])
+
+        self.sales = int(usable.sum())
+        self.groups: Dict[str, Dict[int, Tuple]] = {
+            "cell_band": self._aggregate(cells * 64 + bands, prices, ppsf),
+            "cell": self._aggregate(cells, prices, ppsf),
+            "parent_band": self._aggregate((cells >> 5) * 64 + bands, prices, ppsf),
+            "parent": self._aggregate(cells >> 5, prices, ppsf),
+        }
+
+    @classmethod
+    def from_dataset(cls, dataset, closed_status: int) -> "MarketAggregates":
+        """
+        Build from an MLSDataset's typed columns.
+        """
+        return cls(
+            dataset.column("latitude"),
+            dataset.column("longitude"),
+            dataset.column("bedrooms"),
+            dataset.column("sqft"),
+            dataset.column("price"),
+            dataset.column("status") == closed_status,
+        )
+
+    @staticmethod
+    def _aggregate(keys: np.ndarray, prices: np.ndarray, ppsf: np.ndarray) -> Dict[int, Tuple]:
+        """
+        key -> (count, sum of price, sum of $/sqft, $/sqft quantiles)
+        """
+        if not len(keys):
+            return {}
+
+        unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        price_sums = np.bincount(inverse, weights=prices)
+        ppsf_sums = np.bincount(inverse, weights=ppsf)
+
+        # Sort $/sqft within each group and read the quantiles off each
+        # group's slice (linear interpolation, same as np.percentile)
+        sorted_ppsf = ppsf[np.lexsort((ppsf, inverse))]
+        starts = np.cumsum(counts) - counts
+        quantiles = []
+        for q in QUANTILES:
+            position = starts + (counts - 1) * (q / 100)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, starts + counts - 1)
+            fraction = position - lower
+            quantiles.append(sorted_ppsf[lower] * (1 - fraction) + sorted_ppsf[upper] * fraction)
+        quantiles = np.round(np.column_stack(quantiles), 2)
+
+        return {
+            key: (count, price_sum, ppsf_sum, tuple(q))
+            for key, count, price_sum, ppsf_sum, q in zip(
+                unique.tolist(),
+                counts.tolist(),
+                price_sums.tolist(),
+                ppsf_sums.tolist(),
+                quantiles.tolist(),
+            )
+        }
+
+    def __len__(self) -> int:
+        return len(self.groups["cell_band"])
+
+    def baseline(
+        self,
+        latitude: float,
+        longitude: float,
+        bedrooms: float,
+        square_footage: float
+    ) -> Optional[Dict]:
+        """
+        Market statistics for a subject, from the most specific group with
+        at least min_count closed sales. None if even the parent cell is thinner.
+        """
+        if not (latitude and longitude):
+            return None
+
+        cell = int(geohash_codes(np.array([latitude]), np.array([longitude]), self.precision)[0])
+        band = int(beds_band([bedrooms])[0] * 8 + sqft_band([square_footage])[0])
+        lookups: List[Tuple[str, int, int]] = [
+            ("cell_band", cell * 64 + band, self.precision),
+            ("cell", cell, self.precision),
+            ("parent_band", (cell >> 5) * 64 + band, self.precision - 1),
+            ("parent", cell >> 5, self.precision - 1),
+        ]
+
+        for level, key, precision in lookups:
+            group = self.groups[level].get(key)
+            if group and group[0] >= self.min_count:
+                count, price_sum, ppsf_sum, quantiles = group
+                cell_code = key >> 6 if level.endswith("band") else key
+                return {
+                    "level": level,
+                    "geohash": geohash_string(cell_code, precision),
+                    "count": count,
+                    "average_price": round(price_sum / count),
+                    "average_price_per_sqft": round(ppsf_sum / count, 2),
+                    "price_per_sqft_quantiles": dict(
+                        zip((f"p{q}" for q in QUANTILES), quantiles)
+                    ),
+                }
+        return None
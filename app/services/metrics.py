@@ -0,0 +1,213 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.services.cache import caches
+
+# Stage timings of the current request, read by the Server-Timing middleware
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry: List["Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Metric:
+    """
+    Base for the Prometheus metric types below. Values are kept per label
+    set; every metric registers itself so render() can list them all.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def samples(self) -> Iterator[Tuple[str, Tuple, float]]:
+        return iter(())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, labels, value
+
+
+class Gauge(Counter):
+    """
+    Settable value, or read from a callback at scrape time.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, callback: Optional[Callable[[], Dict]] = None):
+        super().__init__(name, description)
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.callback is None:
+            yield from super().samples()
+            return
+        # Callback returns {label value tuple: value}, e.g. {(("cache", "selection"),): 12}
+        for labels, value in self.callback().items():
+            yield self.name, labels, value
+
+
+class CallbackCounter(Gauge):
+    """
+    Counter whose totals live elsewhere (e.g. LRUCache.hits), read at scrape time.
+    """
+
+    kind = "counter"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if position < len(self.buckets):
+                state[position] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in self._values.items()]
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + (("le", f"{bound:g}"),), cumulative
+            yield f"{self.name}_bucket", labels + (("le", "+Inf"),), state[-1]
+            yield f"{self.name}_sum", labels, state[-2]
+            yield f"{self.name}_count", labels, state[-1]
+
+
+def render() -> str:
+    """
+    All registered metrics in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "valuation_stage_seconds", "Time spent in each valuation pipeline stage"
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and status"
+)
+MLS_REFRESH_SECONDS = Histogram(
+    "mls_refresh_seconds", "MLS data refresh duration (fetch, filter and index)",
+    buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+)
+MLS_REFRESHES = Counter("mls_refreshes_total", "MLS data refreshes by outcome")
+MLS_DATASET_RECORDS = Gauge("mls_dataset_records", "Records in the cached MLS dataset")
+
+
+def _cache_stat(stat: str) -> Callable[[], Dict]:
+    return lambda: {(("cache", name),): getattr(cache, stat) for name, cache in caches.items()}
+
+
+CallbackCounter("cache_hits_total", "Cache lookups that found an entry", _cache_stat("hits"))
+CallbackCounter("cache_misses_total", "Cache lookups that found nothing", _cache_stat("misses"))
+CallbackCounter("cache_evictions_total", "Entries dropped by LRU eviction", _cache_stat("evictions"))
+Gauge("cache_entries", "Entries currently cached", lambda: {
+    (("cache", name),): len(cache) for name, cache in caches.items()
+})
+
+
+def start_request() -> List[Tuple[str, float]]:
+    """
+    Begin collecting stage timings for the current request.
+    """
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def current_timings() -> List[Tuple[str, float]]:
+    """
+    Stage timings recorded so far in the current request.
+    """
+    return list(_request_timings.get() or [])
+
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    """
+    Server-Timing header value ("select;dur=3.2, openai;dur=812.0").
+    """
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    Time a pipeline stage: recorded in the stage histogram and, inside a
+    request, in its Server-Timing header.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
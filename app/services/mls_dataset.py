@@ -0,0 +1,579 @@
+import hashlib
+import math
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from enum import IntEnum
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.config.settings import GRID_CELL_DEGREES, ZIP_NEIGHBOR_RADIUS_MILES
+from app.services.knn_index import KNNIndex
+from app.services.market_aggregates import MarketAggregates
+
+EARTH_RADIUS_MILES = 3958.8
+
+
+class ListingStatus(IntEnum):
+    """
+    Compact status codes stored per record at ingest.
+    """
+    UNKNOWN = 0
+    CLOSED = 1
+    ACTIVE = 2
+    PENDING = 3
+    ACTIVE_UNDER_CONTRACT = 4
+    COMING_SOON = 5
+    EXPIRED = 6
+    WITHDRAWN = 7
+    CANCELED = 8
+
+    @classmethod
+    def parse(cls, value) -> "ListingStatus":
+        """
+        Map an MLS status string ("Closed", "Active Under Contract", ...) to a code.
+        """
+        if isinstance(value, str):
+            key = value.strip().upper().replace(" ", "_")
+            if key == "CANCELLED":
+                key = "CANCELED"
+            return cls.__members__.get(key, cls.UNKNOWN)
+        return cls.UNKNOWN
+
+
+def normalize_city(city) -> Optional[str]:
+    """
+    Interned lower-case city id ("Charlotte " -> "charlotte").
+    """
+    if not isinstance(city, str):
+        return None
+    return sys.intern(city.strip().lower())
+
+
+def parse_zip(value) -> int:
+    """
+    Integer zip code, 0 if missing or not numeric. ZIP+4 keeps the first 5 digits.
+    """
+    if value is None:
+        return 0
+    text = str(value).strip()
+    if len(text) > 5 and text[5] == "-":
+        text = text[:5]
+    try:
+        return int(text)
+    except ValueError:
+        return 0
+
+
+def _to_float(value, default: float) -> float:
+    if value is None or isinstance(value, bool):
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two coordinates in miles.
+    """
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = math.radians(lon2) - math.radians(lon1)
+
+    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
+    return EARTH_RADIUS_MILES * 2 * math.asin(math.sqrt(a))
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """
+    Yield the positions of the set bits in mask, lowest first.
+    """
+    bits = bin(mask)[:1:-1]  # LSB first, without the "0b" prefix
+    pos = bits.find("1")
+    while pos != -1:
+        yield pos
+        pos = bits.find("1", pos + 1)
+
+
+def bitset(positions: List[int]) -> int:
+    """
+    Pack row positions into an int with those bits set.
+    """
+    if not positions:
+        return 0
+    buf = bytearray(max(positions) // 8 + 1)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _bitsets(groups: Dict) -> Dict:
+    return {key: bitset(positions) for key, positions in groups.items()}
+
+
+class SelectionFunnel:
+    """
+    How many candidates each selection stage removed and how long it took.
+
+    Stages are recorded in the order they run, each with the number of
+    candidates left afterwards. Counting a bitset is one popcount, so
+    this is cheap enough to keep on for every request.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.stages: List[Tuple[str, int, int, float]] = []  # (stage, removed, remaining, seconds)
+        self._remaining = total
+        self._started = time.perf_counter()
+
+    def record(self, stage: str, remaining: int) -> None:
+        now = time.perf_counter()
+        self.stages.append((stage, self._remaining - remaining, remaining, now - self._started))
+        self._remaining = remaining
+        self._started = now
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    def as_list(self) -> List[Dict]:
+        return [
+            {"stage": stage, "removed": removed, "remaining": remaining, "ms": round(seconds * 1000, 3)}
+            for stage, removed, remaining, seconds in self.stages
+        ]
+
+
+class AttributeIndex:
+    """
+    Secondary index over the records of one city shard.
+
+    Rows are stored sorted by square footage, so the sqft ±25% filter
+    is a bisect into one contiguous block. Beds, baths, year built and
+    status are kept as bitsets (Python ints, one bit per row), so the
+    remaining range filters resolve by OR-ing and AND-ing masks instead
+    of checking records one by one.
+    """
+
+    def __init__(self, dataset: "MLSDataset", indices: List[int]):
+        sqft_col = dataset.sqft
+        beds_col = dataset.bedrooms
+        baths_col = dataset.bathrooms
+
+        # Rows that can never pass the property filters stay out of the index
+        # (NaN marks a value that was present but not numeric)
+        rows = sorted(
+            (sqft_col[i], i) for i in indices
+            if sqft_col[i] > 0 and beds_col[i] == beds_col[i] and baths_col[i] == baths_col[i]
+        )
+        self.rows: List[int] = [i for _, i in rows]       # position -> dataset index
+        self.sqft: List[float] = [sqft for sqft, _ in rows]
+
+        beds: Dict[float, List[int]] = {}
+        baths: Dict[float, List[int]] = {}
+        years: Dict[int, List[int]] = {}
+        status: Dict[int, List[int]] = {}
+        zips: Dict[int, List[int]] = {}
+
+        for pos, i in enumerate(self.rows):
+            beds.setdefault(beds_col[i], []).append(pos)
+            baths.setdefault(baths_col[i], []).append(pos)
+            years.setdefault(dataset.year_built[i], []).append(pos)
+            status.setdefault(dataset.status[i], []).append(pos)
+            zips.setdefault(dataset.zip[i], []).append(pos)
+
+        self.beds: Dict[float, int] = _bitsets(beds)
+        self.baths: Dict[float, int] = _bitsets(baths)
+        self.years: Dict[int, int] = _bitsets(years)      # 0 = unknown year
+        self.status: Dict[int, int] = _bitsets(status)
+        self.zips: Dict[int, int] = _bitsets(zips)        # 0 = unknown zip
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def sqft_mask(self, lower: float, upper: float) -> int:
+        """
+        Rows with lower <= sqft <= upper.
+        """
+        start = bisect_left(self.sqft, lower)
+        end = bisect_right(self.sqft, upper)
+        if end <= start:
+            return 0
+        return ((1 << end) - 1) ^ ((1 << start) - 1)
+
+    @staticmethod
+    def range_mask(bitsets: Dict, lower: float, upper: float) -> int:
+        """
+        OR of the bitsets whose key lies within [lower, upper].
+        """
+        mask = 0
+        for key, bits in bitsets.items():
+            if lower <= key <= upper:
+                mask |= bits
+        return mask
+
+    def mask(
+        self,
+        bedrooms: float,
+        bathrooms: float,
+        square_footage: float,
+        year_built: int,
+        status: ListingStatus = ListingStatus.CLOSED,
+        zips: Optional[Iterable[int]] = None,
+        funnel: Optional[SelectionFunnel] = None,
+    ) -> int:
+        """
+        Bitset of the index positions passing the property filters.
+
+        Same rules as ComparableSelector.has_similar_features: beds ±1,
+        baths ±1, sqft ±25%, year ±20 (unknown year passes) and status.
+        If zips is given, rows in other zips are dropped as whole blocks
+        (rows with an unknown zip are kept).
+
+        With a funnel, the candidates left after each filter are recorded.
+        """
+        mask = self.status.get(status, 0)
+        if funnel is not None:
+            funnel.record("status", mask.bit_count())
+        if mask and zips is not None:
+            zip_mask = self.zips.get(0, 0)
+            for zip_code in zips:
+                zip_mask |= self.zips.get(zip_code, 0)
+            mask &= zip_mask
+        if funnel is not None:
+            funnel.record("zip", mask.bit_count())
+        if mask:
+            mask &= self.sqft_mask(square_footage * 0.75, square_footage * 1.25)
+        if funnel is not None:
+            funnel.record("sqft", mask.bit_count())
+        if mask:
+            mask &= self.range_mask(self.beds, bedrooms - 1, bedrooms + 1)
+        if funnel is not None:
+            funnel.record("beds", mask.bit_count())
+        if mask:
+            mask &= self.range_mask(self.baths, bathrooms - 1, bathrooms + 1)
+        if funnel is not None:
+            funnel.record("baths", mask.bit_count())
+        if mask:
+            # Records without a year built are not filtered on it
+            mask &= self.years.get(0, 0) | self.range_mask(
+                self.years, year_built - 20, year_built + 20
+            )
+        if funnel is not None:
+            funnel.record("year", mask.bit_count())
+
+        return mask
+
+    def candidates(self, *args, **kwargs) -> List[int]:
+        """
+        Dataset indices passing the property filters (see mask), in dataset order.
+        """
+        return sorted(self.rows[pos] for pos in iter_bits(self.mask(*args, **kwargs)))
+
+
+class SpatialGrid:
+    """
+    Fixed lat/lon grid over the rows of an AttributeIndex.
+
+    Each cell holds a bitset over the same positions as the attribute
+    index, so a radius query is "OR the cells in the bounding box, AND
+    with the attribute mask". Rows without coordinates are not gridded.
+    """
+
+    def __init__(self, dataset: "MLSDataset", rows: List[int], cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for pos, i in enumerate(rows):
+            lat = dataset.latitude[i]
+            lon = dataset.longitude[i]
+            if lat and lon:
+                cells.setdefault(self.cell_of(lat, lon), []).append(pos)
+        self.cells: Dict[Tuple[int, int], int] = _bitsets(cells)
+
+    def cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def cells_within(self, lat: float, lon: float, radius_miles: float) -> Set[Tuple[int, int]]:
+        """
+        Non-empty cells overlapping the bounding box of a circle.
+        """
+        dlat = math.degrees(radius_miles / EARTH_RADIUS_MILES) * 1.01
+        dlon = dlat / max(math.cos(math.radians(lat)), 0.01)
+        lat_lo, lon_lo = self.cell_of(lat - dlat, lon - dlon)
+        lat_hi, lon_hi = self.cell_of(lat + dlat, lon + dlon)
+
+        return {
+            (cell_lat, cell_lon)
+            for cell_lat in range(lat_lo, lat_hi + 1)
+            for cell_lon in range(lon_lo, lon_hi + 1)
+            if (cell_lat, cell_lon) in self.cells
+        }
+
+    def mask(self, cells: Iterable[Tuple[int, int]]) -> int:
+        mask = 0
+        for cell in cells:
+            mask |= self.cells[cell]
+        return mask
+
+
+class ZipAdjacency:
+    """
+    Zip code neighbor table derived from record coordinates.
+
+    Each zip's centroid is the mean position of its records and its extent
+    the farthest record from that centroid. Two zips are neighbors when
+    their centroids are within radius_miles. Zips are plain ints, so the
+    zip filter is a set lookup instead of comparing zip numbers.
+    """
+
+    def __init__(self, dataset: "MLSDataset", radius_miles: float = ZIP_NEIGHBOR_RADIUS_MILES):
+        self.radius_miles = radius_miles
+
+        sums: Dict[int, List[float]] = {}
+        for zip_code, lat, lon in zip(dataset.zip, dataset.latitude, dataset.longitude):
+            if zip_code and lat and lon:
+                acc = sums.setdefault(zip_code, [0.0, 0.0, 0])
+                acc[0] += lat
+                acc[1] += lon
+                acc[2] += 1
+
+        self.centroids: Dict[int, Tuple[float, float]] = {
+            zip_code: (lat / count, lon / count)
+            for zip_code, (lat, lon, count) in sums.items()
+        }
+
+        self.extents: Dict[int, float] = dict.fromkeys(self.centroids, 0.0)
+        for zip_code, lat, lon in zip(dataset.zip, dataset.latitude, dataset.longitude):
+            if zip_code and lat and lon:
+                c_lat, c_lon = self.centroids[zip_code]
+                distance = haversine_miles(c_lat, c_lon, lat, lon)
+                if distance > self.extents[zip_code]:
+                    self.extents[zip_code] = distance
+
+        self.neighbors: Dict[int, FrozenSet[int]] = {}
+        for zip_code, (lat, lon) in self.centroids.items():
+            self.neighbors[zip_code] = frozenset(
+                other for other, (o_lat, o_lon) in self.centroids.items()
+                if haversine_miles(lat, lon, o_lat, o_lon) <= radius_miles
+            )
+
+    def __len__(self) -> int:
+        return len(self.centroids)
+
+    def neighbors_of(self, zip_code: int) -> Optional[FrozenSet[int]]:
+        """
+        Zips near zip_code (itself included), None if the zip has no located records.
+        """
+        return self.neighbors.get(zip_code)
+
+    def zips_near(self, lat: float, lon: float, radius_miles: float) -> FrozenSet[int]:
+        """
+        Zips that may hold records within radius_miles of a point.
+
+        Uses each zip's extent, so no record inside the radius is ever excluded.
+        """
+        return frozenset(
+            zip_code for zip_code, (c_lat, c_lon) in self.centroids.items()
+            if haversine_miles(lat, lon, c_lat, c_lon) <= radius_miles + self.extents[zip_code]
+        )
+
+
+class CityShard:
+    """
+    All records of one city plus their attribute index, spatial grid
+    and k-NN feature index.
+    """
+
+    def __init__(self, city: str, dataset: "MLSDataset", indices: List[int]):
+        self.city = city
+        self.indices = indices
+        self.index = AttributeIndex(dataset, indices)
+        self.grid = SpatialGrid(dataset, self.index.rows)
+        self.knn = KNNIndex(dataset, indices, ListingStatus.CLOSED)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def candidates(self, *args, **kwargs) -> List[int]:
+        return self.index.candidates(*args, **kwargs)
+
+
+COLUMN_NAMES = ("zip", "status", "latitude", "longitude", "bedrooms",
+                "bathrooms", "sqft", "year_built", "price")
+
+
+class DatasetColumns:
+    """
+    Typed columns for MLSDataset, filled one record at a time.
+
+    append() takes raw field values and normalizes them; append_record()
+    feeds it from a relay-shaped dict (the dataset build and the SQLite
+    store's listing columns both go through it).
+    """
+
+    def __init__(self):
+        self.city: List[Optional[str]] = []
+        self.zip = array("l")
+        self.status = array("b")
+        self.latitude = array("d")        # 0.0 = missing
+        self.longitude = array("d")
+        self.bedrooms = array("d")        # NaN = not numeric
+        self.bathrooms = array("d")
+        self.sqft = array("d")
+        self.year_built = array("l")      # 0 = unknown
+        self.price = array("d")           # 0.0 = missing
+
+    def __len__(self) -> int:
+        return len(self.city)
+
+    def append(self, city, zip_code, status, latitude, longitude, bedrooms, bathrooms, sqft, year_built, price):
+        nan = float("nan")
+        self.city.append(normalize_city(city))
+        self.zip.append(parse_zip(zip_code))
+        self.status.append(ListingStatus.parse(status))
+        self.latitude.append(_to_float(latitude, 0.0))
+        self.longitude.append(_to_float(longitude, 0.0))
+        self.bedrooms.append(_to_float(bedrooms, nan))
+        self.bathrooms.append(_to_float(bathrooms, nan))
+        self.sqft.append(_to_float(sqft, 0.0))
+        year = _to_float(year_built, 0.0)
+        self.year_built.append(int(year) if year == year else 0)
+        self.price.append(_to_float(price, 0.0))
+
+    def append_record(self, record: Dict):
+        """
+        One record in the relay shape (city, zip, areaSqft, yearBuilt, ...).
+        """
+        get = record.get
+        self.append(
+            get("city"), get("zip"), get("status"), get("latitude"), get("longitude"),
+            get("bedrooms", 0), get("bathrooms", 0), get("areaSqft", 0), get("yearBuilt"), get("price")
+        )
+
+
+class MLSDataset:
+    """
+    MLS records normalized once at ingest and partitioned by city.
+
+    The fields used for selection are parsed into typed columns (interned
+    city ids, integer zips, status codes, floats), so a request never
+    re-parses strings and only ever touches its own city's shard.
+    The original record dicts are kept for display and are shared
+    read-only between requests.
+
+    Built once per cache refresh in mls_service.
+    """
+
+    def __init__(self, records: Sequence[Dict]):
+        self.records = records
+        self.build_times: Dict[str, float] = {}  # Seconds per build step, for the admin status
+        started = time.perf_counter()
+
+        columns = DatasetColumns()
+        for record in records:
+            columns.append_record(record)
+
+        self.city = columns.city
+        for name in COLUMN_NAMES:
+            setattr(self, name, getattr(columns, name))
+
+        by_city: Dict[str, List[int]] = {}
+        for i, city in enumerate(self.city):
+            if city is not None:
+                by_city.setdefault(city, []).append(i)
+
+        started = self._timed("columns", started)
+
+        self._arrays: Dict[str, np.ndarray] = {}
+        self.shards: Dict[str, CityShard] = {
+            city: CityShard(city, self, indices)
+            for city, indices in by_city.items()
+        }
+        started = self._timed("shard_indexes", started)
+        self.zip_adjacency = ZipAdjacency(self)
+        started = self._timed("zip_adjacency", started)
+        self.aggregates = MarketAggregates.from_dataset(self, ListingStatus.CLOSED)
+        started = self._timed("aggregates", started)
+        self.version = self._fingerprint()
+        self._timed("fingerprint", started)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _timed(self, step: str, started: float) -> float:
+        now = time.perf_counter()
+        self.build_times[step] = round(now - started, 4)
+        return now
+
+    def memory_usage(self, sample_size: int = 1000) -> Dict[str, int]:
+        """
+        Approximate bytes held by the dataset, per component.
+
+        Columns and k-NN trees are exact buffer sizes; bitsets are summed
+        per int; record dicts are extrapolated from a sample.
+        """
+        columns = sum(
+            getattr(self, name).buffer_info()[1] * getattr(self, name).itemsize
+            for name in COLUMN_NAMES
+        ) + sys.getsizeof(self.city)
+
+        bitsets = 0
+        knn = 0
+        for shard in self.shards.values():
+            index = shard.index
+            for group in (index.beds, index.baths, index.years, index.status, index.zips):
+                bitsets += sum(sys.getsizeof(mask) for mask in group.values())
+            bitsets += sum(sys.getsizeof(mask) for mask in shard.grid.cells.values())
+            tree = shard.knn.tree
+            knn += tree.points.nbytes + tree.order.nbytes + tree.lows.nbytes + tree.highs.nbytes
+            knn += shard.knn.rows.nbytes
+
+        sample = self.records[:sample_size]
+        per_record = (
+            sum(sys.getsizeof(r) + sum(sys.getsizeof(v) for v in r.values()) for r in sample) / len(sample)
+            if sample else 0
+        )
+
+        usage = {
+            "columns": columns,
+            "bitset_indexes": bitsets,
+            "knn_trees": knn,
+            "records_estimate": int(per_record * len(self.records)),
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def _fingerprint(self) -> str:
+        """
+        Content hash of the normalized columns. Identical data gives the same
+        version across restarts, so derived artifacts (fitted models,
+        caches) can be keyed by it.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update("\n".join(city or "" for city in self.city).encode())
+        for name in COLUMN_NAMES:
+            digest.update(getattr(self, name).tobytes())
+        return digest.hexdigest()
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Zero-copy NumPy view of a typed column ("price", "sqft", ...).
+        """
+        view = self._arrays.get(name)
+        if view is None:
+            values = getattr(self, name)
+            view = np.frombuffer(values, dtype=np.dtype(values.typecode)) if len(values) else np.empty(0)
+            self._arrays[name] = view
+        return view
+
+    def shard(self, city: str) -> Optional[CityShard]:
+        """
+        Shard for a city, matched case-insensitively.
+        """
+        return self.shards.get(normalize_city(city))
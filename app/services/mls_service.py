@@ -1,49 +1,253 @@
+import logging
 import os
+import re
 import requests
+import threading
 import time
-from typing import Dict, List
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app.config.settings import (
+    MLS_FETCH_TIMEOUT_SECONDS, MLS_LOADING_RETRY_AFTER_SECONDS, MLS_SOURCE, MLS_STORE, SELECTION_CACHE_PREWARM
+)
+from app.services import deadline
+from app.services.comparable_selector import prewarm_selection_cache, selection_cache
+from app.services.mls_dataset import ListingStatus, MLSDataset
+from app.services.mls_store import open_store
+from app.services.metrics import (
+    MLS_DATASET_RECORDS, MLS_REFRESH_SECONDS, MLS_REFRESHES, stage_timer
+)
+
+logger = logging.getLogger(__name__)
 
 # Global cache with 1-hour TTL
 _mls_cache = {
     "data": None,
+    "dataset": None,  # Indexed view of "data" for comparable selection
     "timestamp": None,
-    "ttl": 3600  # 1 hour
+    "ttl": 3600,  # 1 hour
+    "last_refresh": None  # Stats of the last successful refresh (admin status)
+}
+
+# Serializes forced refreshes from the admin endpoint
+_refresh_lock = threading.Lock()
+
+
+class DataLoading(Exception):
+    """
+    Nothing is loaded yet and the first load is running in the background.
+    """
+
+    def __init__(self, retry_after: int = MLS_LOADING_RETRY_AFTER_SECONDS):
+        super().__init__(f"MLS data is loading, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+STREET_SUFFIXES = {
+    "street": "st", "road": "rd", "avenue": "ave", "drive": "dr", "lane": "ln",
+    "court": "ct", "circle": "cir", "boulevard": "blvd", "place": "pl",
+    "parkway": "pkwy", "terrace": "ter", "trail": "trl", "highway": "hwy",
 }
+_ADDRESS_NOISE = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize_address(address) -> Optional[str]:
+    """
+    "1523 Monroe Road," -> "1523 monroe rd"
+    """
+    if not address:
+        return None
+    words = _ADDRESS_NOISE.sub(" ", str(address).lower()).split()
+    return " ".join(STREET_SUFFIXES.get(word, word) for word in words) or None
+
+
+def _canonical_rank(prop: Dict) -> Tuple:
+    # Closed sales first, then the latest close date
+    return ListingStatus.parse(prop.get("status")) == ListingStatus.CLOSED, str(prop.get("closeDate") or "")
+
+
+class DuplicateIndex:
+    """
+    Finds earlier rows of the same home: same listing key, else same
+    normalized address with the same zip, close price and close date.
+
+    Rows without a key are bucketed by (zip, price, close date, house
+    number) first; full addresses are normalized only for rows that share
+    a bucket, which keeps the check cheap for the common, unique row.
+    """
 
-def fetch_raw_properties() -> Dict[str, List]:
+    def __init__(self):
+        self._by_key: Dict[Hashable, int] = {}
+        self._by_sale: Dict[Tuple, object] = {}  # Position, or {address: position} once shared
+
+    def find_or_add(self, prop: Dict, position: int, rows: List[Dict]) -> Optional[int]:
+        """
+        Position of an earlier row of the same home, or None after
+        registering prop at position. Rows with no key or address are
+        never matched.
+        """
+        key = prop.get("listingKey")
+        if key:
+            earlier = self._by_key.get(key)
+            if earlier is None:
+                self._by_key[key] = position
+            return earlier
+        address = prop.get("address")
+        if not address:
+            return None
+
+        house_number = str(address).lstrip().partition(" ")[0]
+        sale = (prop.get("zip"), prop.get("price"), prop.get("closeDate"), house_number)
+        entry = self._by_sale.get(sale)
+        if entry is None:
+            self._by_sale[sale] = position
+            return None
+        if isinstance(entry, int):
+            entry = {normalize_address(rows[entry].get("address")): entry}
+            self._by_sale[sale] = entry
+        address = normalize_address(address)
+        if address in entry:
+            return entry[address]
+        entry[address] = position
+        return None
+
+
+def filter_properties(items: List[Dict]) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Drop records that are missing critical fields or look like errors or
+    commercial listings. Returns the kept records and skip counts by reason.
+
+    Rows of the same home (relists, status changes, repeats across relay
+    pages; see DuplicateIndex) collapse into one canonical record in
+    the same pass: the closed sale, and of equals the later row. It keeps
+    the first row's position; collapsed rows count as "duplicate".
+    """
+    filtered = []
+    duplicates = DuplicateIndex()
+    skipped = {
+        "missing_fields": 0,
+        "extreme_price": 0,
+        "extreme_size": 0,
+        "invalid_data": 0,
+        "duplicate": 0
+    }
+
+    for prop in items:
+        try:
+            # Skip if missing critical fields
+            if not all([
+                prop.get('city'),
+                prop.get('price'),
+                prop.get('areaSqft'),
+                prop.get('bedrooms'),
+                prop.get('bathrooms'),
+                prop.get('yearBuilt')
+            ]):
+                skipped["missing_fields"] += 1
+                continue
+
+            # Get values for validation
+            price = prop.get('price', 0)
+            sqft = prop.get('areaSqft', 0)
+            bedrooms = prop.get('bedrooms', 0)
+            bathrooms = prop.get('bathrooms', 0)
+
+            # Skip extreme/invalid prices (likely errors or commercial)
+            if price < 10000 or price > 2000000:
+                skipped["extreme_price"] += 1
+                continue
+
+            # Skip extreme sizes (likely errors or commercial)
+            if sqft < 300 or sqft > 10000:
+                skipped["extreme_size"] += 1
+                continue
+
+            # Skip invalid bedroom/bathroom counts
+            if bedrooms < 1 or bedrooms > 10 or bathrooms < 0.5 or bathrooms > 10:
+                skipped["invalid_data"] += 1
+                continue
+
+            # Property passed all filters - keep it, or the better of it and its duplicate
+            position = duplicates.find_or_add(prop, len(filtered), filtered)
+            if position is not None:
+                skipped["duplicate"] += 1
+                if _canonical_rank(prop) >= _canonical_rank(filtered[position]):
+                    filtered[position] = prop
+                continue
+            filtered.append(prop)
+
+        except Exception as e:
+            skipped["invalid_data"] += 1
+            continue
+
+    return filtered, skipped
+
+
+def fetch_raw_properties(force: bool = False) -> Dict[str, List]:
     """
     Fetch MLS properties with caching and memory optimization.
     Filters out invalid/extreme properties to reduce memory usage.
+    force=True refetches even if the cache is still fresh.
     """
     global _mls_cache
     
     RAW_DATA_API_URL = os.getenv("RAW_DATA_API_URL")
     
-    if not RAW_DATA_API_URL:
-        print("❌ Error: RAW_DATA_API_URL not set in environment!")
+    if MLS_SOURCE != "snapshot" and not RAW_DATA_API_URL:
+        logger.error("❌ Error: RAW_DATA_API_URL not set in environment!")
         return {"items": []}
     
     # Check cache first
     current_time = time.time()
     
-    if _mls_cache["data"] is not None and _mls_cache["timestamp"] is not None:
+    if not force and _mls_cache["data"] is not None and _mls_cache["timestamp"] is not None:
         time_since_cache = current_time - _mls_cache["timestamp"]
         if time_since_cache < _mls_cache["ttl"]:
-            print(f"✅ Using cached MLS data ({len(_mls_cache['data'])} properties)")
-            print(f"   Cache age: {int(time_since_cache/60)} minutes")
+            # Every request passes here; keep only a sample of these lines
+            logger.debug(
+                "✅ Using cached MLS data (%d properties, %d minutes old)",
+                len(_mls_cache['data']), int(time_since_cache / 60),
+                extra={"sampled": True}
+            )
+            return {"items": _mls_cache["data"]}
+        elif deadline.current() is not None:
+            # Inside a request: a refresh can take longer than its whole time
+            # budget, so serve the stale data and refresh in the background
+            if _refresh_lock.acquire(blocking=False):
+                logger.info("⏰ Cache expired (%d minutes old), refreshing in the background...", int(time_since_cache / 60))
+                threading.Thread(target=_refresh_in_background, name="mls-refresh", daemon=True).start()
             return {"items": _mls_cache["data"]}
         else:
-            print(f"⏰ Cache expired ({int(time_since_cache/60)} minutes old), refreshing...")
+            logger.info("⏰ Cache expired (%d minutes old), refreshing...", int(time_since_cache / 60))
+    elif _mls_cache["data"] is None and deadline.current() is not None:
+        # Inside a request with nothing loaded yet: the first load can take
+        # longer than the whole time budget, so it runs in the background
+        # and the request is told to retry
+        if _refresh_lock.acquire(blocking=False):
+            logger.info("🔵 No MLS data loaded yet, loading in the background...")
+            threading.Thread(target=_refresh_in_background, name="mls-refresh", daemon=True).start()
+        raise DataLoading()
     
     try:
-        print(f"🔵 Fetching MLS data from: {RAW_DATA_API_URL}")
-        print(f"⏳ Loading properties...")
-        
-        # Fetch all data with extended timeout
-        response = requests.get(RAW_DATA_API_URL, timeout=120)
-        response.raise_for_status()
-        
-        data = response.json()
+        if MLS_SOURCE == "snapshot":
+            # Local store kept current by python -m app.jobs.replicate_mlsgrid
+            store = open_store(read_only=True)
+            try:
+                logger.info("🔵 Loading MLS data from %s store: %s", MLS_STORE, store.path)
+                with stage_timer("mls_fetch"):
+                    data = store.records()
+            finally:
+                store.close()
+        else:
+            logger.info("🔵 Fetching MLS data from: %s", RAW_DATA_API_URL)
+
+            # Fetch all data with extended timeout
+            with stage_timer("mls_fetch"):
+                # Only forced refreshes get here inside a request: bounded by its budget
+                timeout = deadline.stage_timeout("mls_fetch", MLS_FETCH_TIMEOUT_SECONDS)
+                response = requests.get(RAW_DATA_API_URL, timeout=timeout)
+                response.raise_for_status()
+
+                data = response.json()
         
         # Handle different response formats
         if isinstance(data, dict):
@@ -51,114 +255,147 @@ def fetch_raw_properties() -> Dict[str, List]:
         elif isinstance(data, list):
             items = data
         else:
-            print(f"⚠️ Unexpected data format: {type(data)}")
+            logger.warning("⚠️ Unexpected data format: %s", type(data))
             items = []
         
-        print(f"✅ Loaded {len(items)} properties from API")
+        logger.info("✅ Loaded %d properties from API", len(items))
         
         # MEMORY OPTIMIZATION: Filter immediately to reduce RAM usage
-        print(f"🔧 Filtering for quality and memory optimization...")
-        
-        filtered = []
-        skipped = {
-            "missing_fields": 0,
-            "extreme_price": 0,
-            "extreme_size": 0,
-            "invalid_data": 0
-        }
-        
-        for prop in items:
-            try:
-                # Skip if missing critical fields
-                if not all([
-                    prop.get('city'),
-                    prop.get('price'),
-                    prop.get('areaSqft'),
-                    prop.get('bedrooms'),
-                    prop.get('bathrooms'),
-                    prop.get('yearBuilt')
-                ]):
-                    skipped["missing_fields"] += 1
-                    continue
-                
-                # Get values for validation
-                price = prop.get('price', 0)
-                sqft = prop.get('areaSqft', 0)
-                bedrooms = prop.get('bedrooms', 0)
-                bathrooms = prop.get('bathrooms', 0)
-                
-                # Skip extreme/invalid prices (likely errors or commercial)
-                if price < 10000 or price > 2000000:
-                    skipped["extreme_price"] += 1
-                    continue
-                
-                # Skip extreme sizes (likely errors or commercial)
-                if sqft < 300 or sqft > 10000:
-                    skipped["extreme_size"] += 1
-                    continue
-                
-                # Skip invalid bedroom/bathroom counts
-                if bedrooms < 1 or bedrooms > 10 or bathrooms < 0.5 or bathrooms > 10:
-                    skipped["invalid_data"] += 1
-                    continue
-                
-                # Property passed all filters - keep it
-                filtered.append(prop)
-                
-            except Exception as e:
-                skipped["invalid_data"] += 1
-                continue
+        filtered, skipped = filter_properties(items)
         
         # Log filtering results
         total_skipped = sum(skipped.values())
-        print(f"✅ Filtered to {len(filtered)} valid properties")
-        print(f"   Skipped {total_skipped} properties:")
-        for reason, count in skipped.items():
-            if count > 0:
-                print(f"     - {reason}: {count}")
-        
         memory_saved = ((len(items) - len(filtered)) / len(items) * 100) if items else 0
-        print(f"   Memory saved: ~{memory_saved:.1f}%")
+        logger.info(
+            "✅ Filtered to %d valid properties, skipped %d, %d duplicates collapsed (memory saved: ~%.1f%%)",
+            len(filtered), total_skipped - skipped["duplicate"], skipped["duplicate"], memory_saved,
+            extra={"skipped": {reason: count for reason, count in skipped.items() if count}}
+        )
         
+        # Build selection indexes once per refresh
+        with stage_timer("mls_index"):
+            dataset = MLSDataset(filtered)
+        logger.info("✅ Indexed %d cities", len(dataset.shards))
+
         # Update cache
         _mls_cache["data"] = filtered
+        _mls_cache["dataset"] = dataset
         _mls_cache["timestamp"] = current_time
         
-        print(f"✅ Cached {len(filtered)} properties (TTL: 1 hour)")
+        logger.info("✅ Cached %d properties (TTL: 1 hour)", len(filtered))
+
+        refresh_seconds = time.time() - current_time
+        _mls_cache["last_refresh"] = {
+            "refreshed_at": int(current_time),
+            "duration_seconds": round(refresh_seconds, 3),
+            "fetched": len(items),
+            "kept": len(filtered),
+            "skipped": skipped,
+            "duplicates_collapsed": skipped["duplicate"],
+        }
+
+        MLS_REFRESH_SECONDS.observe(refresh_seconds)
+        MLS_REFRESHES.inc(outcome="success")
+        MLS_DATASET_RECORDS.set(len(dataset))
+
+        # Selections from the previous dataset can never be hit again
+        selection_cache.clear()
+        if SELECTION_CACHE_PREWARM > 0:
+            threading.Thread(
+                target=_prewarm, args=(dataset, SELECTION_CACHE_PREWARM), daemon=True
+            ).start()
         
         return {"items": filtered}
         
+    except deadline.DeadlineExceeded:
+        # The request's budget is spent, not a data source failure
+        raise
+
     except requests.exceptions.Timeout:
-        print("❌ Timeout: Server took longer than 120 seconds")
+        logger.error("❌ Timeout: MLS data source did not answer in time")
+        MLS_REFRESHES.inc(outcome="timeout")
         
         # Return cached data if available (even if expired)
         if _mls_cache["data"] is not None:
-            print(f"⚠️ Using stale cache ({len(_mls_cache['data'])} properties)")
+            logger.warning("⚠️ Using stale cache (%d properties)", len(_mls_cache['data']))
             return {"items": _mls_cache["data"]}
         
         return {"items": []}
         
     except requests.exceptions.RequestException as e:
-        print(f"❌ Network error: {str(e)}")
+        logger.error("❌ Network error: %s", e)
+        MLS_REFRESHES.inc(outcome="network_error")
         
         # Return cached data if available
         if _mls_cache["data"] is not None:
-            print(f"⚠️ Using cached data due to network error ({len(_mls_cache['data'])} properties)")
+            logger.warning("⚠️ Using cached data due to network error (%d properties)", len(_mls_cache['data']))
             return {"items": _mls_cache["data"]}
         
         return {"items": []}
         
     except Exception as e:
-        print(f"❌ Unexpected error: {str(e)}")
+        logger.exception("❌ Unexpected error: %s", e)
+        MLS_REFRESHES.inc(outcome="error")
         
         # Return cached data if available
         if _mls_cache["data"] is not None:
-            print(f"⚠️ Using cached data due to error ({len(_mls_cache['data'])} properties)")
+            logger.warning("⚠️ Using cached data due to error (%d properties)", len(_mls_cache['data']))
             return {"items": _mls_cache["data"]}
         
         return {"items": []}
 
 
+def _refresh_in_background():
+    """
+    Refresh or first load started by a request (which holds _refresh_lock
+    for us). A new thread has no request deadline, so the fetch gets its
+    full timeout.
+    """
+    try:
+        fetch_raw_properties(force=True)
+    finally:
+        _refresh_lock.release()
+
+
+def _prewarm(dataset: MLSDataset, top_n: int):
+    """
+    Re-run selection for the most requested neighborhoods on the new dataset.
+    """
+    try:
+        started = time.time()
+        warmed = prewarm_selection_cache(dataset, top_n)
+        logger.info("✅ Pre-warmed %d selections in %.1fs", warmed, time.time() - started)
+    except Exception as e:
+        logger.exception("⚠️ Selection pre-warm failed: %s", e)
+
+
+def force_refresh() -> Optional[MLSDataset]:
+    """
+    Refetch and re-index now, regardless of the TTL. The current data
+    stays in place (and keeps being served) if the fetch fails.
+    """
+    with _refresh_lock:
+        fetch_raw_properties(force=True)
+    return _mls_cache["dataset"]
+
+
+def peek_dataset() -> Optional[MLSDataset]:
+    """
+    The currently loaded dataset, without checking the TTL or fetching.
+    """
+    return _mls_cache["dataset"]
+
+
+def get_dataset() -> Optional[MLSDataset]:
+    """
+    Return the indexed MLS dataset, refreshing the cache if needed.
+    None if no data could be loaded; raises DataLoading inside a request
+    while the first load is still running.
+    """
+    fetch_raw_properties()
+    return _mls_cache["dataset"]
+
+
 def clear_cache():
     """
     Manually clear the MLS data cache.
@@ -166,8 +403,10 @@ def clear_cache():
     """
     global _mls_cache
     _mls_cache["data"] = None
+    _mls_cache["dataset"] = None
     _mls_cache["timestamp"] = None
-    print("✅ MLS cache cleared")
+    selection_cache.clear()
+    logger.info("✅ MLS cache cleared")
 
 
 def get_cache_status() -> dict:
@@ -190,5 +429,7 @@ def get_cache_status() -> dict:
         "properties": len(_mls_cache["data"]),
         "age_seconds": int(age),
         "age_minutes": int(age / 60),
-        "ttl_remaining": int(_mls_cache["ttl"] - age)
+        "ttl_remaining": int(_mls_cache["ttl"] - age),
+        "last_refresh": _mls_cache["last_refresh"],
+        "selection_cache": selection_cache.stats()
     }
\ No newline at end of file
@@ -0,0 +1,398 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from app.config.settings import (
+    COMPARABLE_RADIUS_STEPS,
+    MIN_COMPARABLES,
+    MLS_SNAPSHOT_PATH,
+    MLS_SQLITE_PATH,
+    MLS_STORE,
+    ZIP_NEIGHBOR_RADIUS_MILES,
+)
+from app.services.mls_dataset import (
+    EARTH_RADIUS_MILES, DatasetColumns, ListingStatus, haversine_miles, normalize_city, parse_zip
+)
+
+
+class SnapshotStore:
+    """
+    Local MLS dataset: cleaned records by listing key plus the replication
+    watermark (newest ModificationTimestamp applied), in one JSON file.
+
+    Upserts and deletes happen in memory; save() writes the file
+    atomically, so a crashed replication leaves the previous snapshot and
+    watermark in place and the next run picks up from there.
+    """
+
+    def __init__(self, path: str = MLS_SNAPSHOT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        self.watermark: Optional[str] = None
+        self._records: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                payload = json.load(f)
+            self.watermark = payload.get("watermark")
+            self._records = payload.get("records", {})
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def upsert(self, items: Iterable[Tuple[str, Optional[Dict]]]) -> Tuple[int, int]:
+        """
+        Apply (listing key, cleaned record) pairs; None deletes the key.
+        Returns (upserted, deleted).
+        """
+        upserted = deleted = 0
+        with self._lock:
+            for key, record in items:
+                if record is None:
+                    deleted += self._records.pop(key, None) is not None
+                else:
+                    self._records[key] = record
+                    upserted += 1
+        return upserted, deleted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self.watermark = None
+
+    def records(self) -> List[Dict]:
+        with self._lock:
+            return list(self._records.values())
+
+    def save(self, watermark: Optional[str] = None) -> str:
+        with self._lock:
+            if watermark:
+                self.watermark = watermark
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"watermark": self.watermark, "records": self._records}, f)
+            os.replace(tmp_path, self.path)
+        return self.path
+
+    def rollback(self) -> None:
+        """
+        Drop the changes since the last save().
+        """
+        with self._lock:
+            self._load()
+
+    def close(self) -> None:
+        """
+        Nothing to release (the file is only open while loading or saving).
+        """
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    id INTEGER PRIMARY KEY,
+    listing_key TEXT NOT NULL UNIQUE,
+    city TEXT,
+    zip INTEGER,
+    status INTEGER,
+    latitude REAL,
+    longitude REAL,
+    bedrooms REAL,
+    bathrooms REAL,
+    sqft REAL,
+    year_built INTEGER,
+    price REAL,
+    record TEXT NOT NULL
+);
+-- Covers the comparable filters, equality columns first
+CREATE INDEX IF NOT EXISTS listings_search
+    ON listings (city, status, bedrooms, sqft, bathrooms, year_built, zip, latitude, longitude);
+CREATE INDEX IF NOT EXISTS listings_zip ON listings (zip, status);
+CREATE VIRTUAL TABLE IF NOT EXISTS listings_geo USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+"""
+
+_UPSERT = """
+INSERT INTO listings (listing_key, city, zip, status, latitude, longitude, bedrooms,
+                      bathrooms, sqft, year_built, price, record)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (listing_key) DO UPDATE SET
+    city = excluded.city, zip = excluded.zip, status = excluded.status,
+    latitude = excluded.latitude, longitude = excluded.longitude,
+    bedrooms = excluded.bedrooms, bathrooms = excluded.bathrooms, sqft = excluded.sqft,
+    year_built = excluded.year_built, price = excluded.price, record = excluded.record
+RETURNING id
+"""
+
+
+# Rows mls_service.filter_properties keeps (its address-level dedupe aside)
+_INGEST_FILTER = """
+    l.city IS NOT NULL AND l.price BETWEEN 10000 AND 2000000 AND l.sqft BETWEEN 300 AND 10000
+    AND l.bedrooms BETWEEN 1 AND 10 AND l.bathrooms BETWEEN 0.5 AND 10 AND l.year_built != 0
+"""
+
+# Ingested rows passing ComparableSelector.has_similar_features
+_COMPARABLE_FILTER = _INGEST_FILTER + """
+    AND l.city = :city AND l.status = :closed
+    AND l.bedrooms BETWEEN :beds - 1 AND :beds + 1
+    AND l.bathrooms BETWEEN :baths - 1 AND :baths + 1
+    AND l.sqft BETWEEN :sqft * 0.75 AND :sqft * 1.25
+    AND l.year_built BETWEEN :year - 20 AND :year + 20
+"""
+
+
+class SQLiteStore:
+    """
+    Local MLS dataset in SQLite: cleaned records by listing key, their
+    normalized fields (DatasetColumns rules) under a covering index, an
+    R*Tree over the coordinates and the replication watermark.
+    comparables() answers a selection from those indexes.
+
+    The file survives restarts and is written in WAL mode, so any number
+    of workers can open it read-only while replication applies changes.
+    Each upsert() batch is one transaction; save() records the watermark.
+    After clear() (a full reload) everything up to save() is a single
+    transaction instead: readers keep seeing the previous contents until
+    then, and rollback() discards the reload.
+    """
+
+    def __init__(self, path: str = MLS_SQLITE_PATH, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._reloading = False
+        if read_only:
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+        self._db.row_factory = sqlite3.Row
+
+    @contextmanager
+    def _write(self):
+        """
+        One transaction per call, or part of the open reload (see clear()).
+        """
+        with self._lock:
+            if self._reloading:
+                yield  # Committed by save()
+            else:
+                with self._db:
+                    yield
+
+    @property
+    def watermark(self) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'watermark'").fetchone()
+        return row["value"] if row else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM listings").fetchone()[0]
+
+    def upsert(self, items: Iterable[Tuple[str, Optional[Dict]]]) -> Tuple[int, int]:
+        """
+        Apply (listing key, cleaned record) pairs; None deletes the key.
+        Returns (upserted, deleted).
+        """
+        items = list(items)
+        columns = DatasetColumns()
+        for _, record in items:
+            columns.append_record(record or {})
+
+        upserted = deleted = 0
+        with self._write():
+            for position, (key, record) in enumerate(items):
+                if record is None:
+                    row = self._db.execute("DELETE FROM listings WHERE listing_key = ? RETURNING id", (key,)).fetchone()
+                    if row:
+                        self._db.execute("DELETE FROM listings_geo WHERE id = ?", (row["id"],))
+                        deleted += 1
+                    continue
+
+                values = _column_values(columns, position)
+                listing_id = self._db.execute(_UPSERT, (key, *values, json.dumps(record))).fetchone()["id"]
+                lat, lon = values[3], values[4]
+                if lat and lon:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO listings_geo VALUES (?, ?, ?, ?, ?)",
+                        (listing_id, lat, lat, lon, lon)
+                    )
+                else:
+                    self._db.execute("DELETE FROM listings_geo WHERE id = ?", (listing_id,))
+                upserted += 1
+        return upserted, deleted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._reloading = True
+            self._db.execute("DELETE FROM listings")
+            self._db.execute("DELETE FROM listings_geo")
+            self._db.execute("DELETE FROM meta WHERE name = 'watermark'")
+
+    def records(self) -> List[Dict]:
+        with self._lock:
+            return [json.loads(row[0]) for row in self._db.execute("SELECT record FROM listings ORDER BY id")]
+
+    def save(self, watermark: Optional[str] = None) -> str:
+        with self._lock, self._db:
+            if watermark:
+                self._db.execute(
+                    "INSERT INTO meta (name, value) VALUES ('watermark', ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                    (watermark,)
+                )
+            self._reloading = False
+        return self.path
+
+    def rollback(self) -> None:
+        """
+        Discard an unfinished reload (upsert batches outside one are
+        already committed).
+        """
+        with self._lock:
+            self._db.rollback()
+            self._reloading = False
+
+    def comparables(
+        self,
+        city: str,
+        bedrooms: float,
+        bathrooms: float,
+        square_footage: float,
+        year_built: int,
+        latitude: float = 0.0,
+        longitude: float = 0.0,
+        zip_code: Optional[str] = None,
+        radius_steps: Sequence[float] = COMPARABLE_RADIUS_STEPS,
+        min_comparables: int = MIN_COMPARABLES,
+        limit: int = 25
+    ) -> Tuple[List[Tuple[float, Dict]], Optional[float]]:
+        """
+        ComparableSelector's radius-mode selection answered by the indexes,
+        for readers that do not load the dataset: ([(distance, record)],
+        radius used).
+
+        With coordinates, the covering index and the R*Tree box around the
+        largest radius narrow the rows in one query (SQLite picks which
+        drives), and the radius widens over them until min_comparables are
+        within it, nearest first. The selector's zip rule never drops a row
+        inside the radius (see ZipAdjacency.zips_near), so it is skipped.
+        Without coordinates the search is city-wide over the subject zip's
+        neighbors (distance inf, radius None), served by the covering index
+        and ordered by sqft difference.
+
+        Rows are the ones ingest would keep, except that rows of the same
+        home under different listing keys are not collapsed.
+        """
+        params = {
+            "city": normalize_city(city), "closed": int(ListingStatus.CLOSED),
+            "beds": bedrooms, "baths": bathrooms, "sqft": square_footage, "year": year_built,
+        }
+        if not (latitude and longitude):
+            neighbors = self._zip_neighbors(parse_zip(zip_code))
+            zip_filter = ""
+            if neighbors is not None:
+                zip_filter = f"AND (l.zip = 0 OR l.zip IN ({', '.join(map(str, sorted(neighbors)))}))"
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT l.record FROM listings l WHERE {_COMPARABLE_FILTER} {zip_filter} "
+                    "ORDER BY abs(l.sqft - :sqft), l.id LIMIT :limit",
+                    dict(params, limit=limit)
+                ).fetchall()
+            return [(float("inf"), json.loads(row["record"])) for row in rows], None
+
+        # Same box as SpatialGrid.cells_within
+        lat_delta = math.degrees(max(radius_steps) / EARTH_RADIUS_MILES) * 1.01
+        lon_delta = lat_delta / max(math.cos(math.radians(latitude)), 0.01)
+        params.update({
+            "min_lat": latitude - lat_delta, "max_lat": latitude + lat_delta,
+            "min_lon": longitude - lon_delta, "max_lon": longitude + lon_delta,
+        })
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT l.id, l.latitude, l.longitude, l.record "
+                "FROM listings_geo g JOIN listings l ON l.id = g.id "
+                "WHERE g.max_lat >= :min_lat AND g.min_lat <= :max_lat "
+                "AND g.max_lon >= :min_lon AND g.min_lon <= :max_lon "
+                f"AND {_COMPARABLE_FILTER}",
+                params
+            ).fetchall()
+
+        # Insertion order for equal distances, like the dataset order
+        candidates = sorted(
+            (haversine_miles(latitude, longitude, row["latitude"], row["longitude"]), row["id"], row["record"])
+            for row in rows
+        )
+        radius_used = None
+        found = []
+        for radius in radius_steps:
+            radius_used = radius
+            found = [(distance, record) for distance, _, record in candidates if distance <= radius]
+            if len(found) >= min_comparables:
+                break
+        return [(distance, json.loads(record)) for distance, record in found[:limit]], radius_used
+
+    def _zip_neighbors(self, zip_code: int) -> Optional[set]:
+        """
+        ZipAdjacency.neighbors_of from per-zip sums over the zip index.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT l.zip, sum(l.latitude), sum(l.longitude), count(*) FROM listings l "
+                f"WHERE l.zip != 0 AND l.latitude != 0 AND l.longitude != 0 AND {_INGEST_FILTER} GROUP BY l.zip"
+            ).fetchall()
+        centroids = {row[0]: (row[1] / row[3], row[2] / row[3]) for row in rows}
+        if zip_code not in centroids:
+            return None
+        lat, lon = centroids[zip_code]
+        return {
+            other for other, (o_lat, o_lon) in centroids.items()
+            if haversine_miles(lat, lon, o_lat, o_lon) <= ZIP_NEIGHBOR_RADIUS_MILES
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def _column_values(columns: DatasetColumns, position: int) -> Tuple:
+    """
+    Normalized listings row (city .. price); NaN beds/baths become NULL.
+    """
+    beds = columns.bedrooms[position]
+    baths = columns.bathrooms[position]
+    return (
+        columns.city[position],
+        columns.zip[position],
+        columns.status[position],
+        columns.latitude[position],
+        columns.longitude[position],
+        beds if beds == beds else None,
+        baths if baths == baths else None,
+        columns.sqft[position],
+        columns.year_built[position],
+        columns.price[position],
+    )
+
+
+def open_store(read_only: bool = False) -> Union[SnapshotStore, SQLiteStore]:
+    """
+    The configured local store (MLS_STORE). Readers pass read_only=True.
+    """
+    if MLS_STORE == "sqlite":
+        return SQLiteStore(MLS_SQLITE_PATH, read_only=read_only)
+    return SnapshotStore(MLS_SNAPSHOT_PATH)
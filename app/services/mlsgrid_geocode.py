@@ -1,6 +1,13 @@
+import logging
 import requests
 from typing import Optional, Dict
 
+from app.config.settings import GEOCODE_TIMEOUT_SECONDS, MIN_STAGE_TIMEOUT_SECONDS, MLSGRID_ACCESS_TOKEN, MLSGRID_API_URL
+from app.services.deadline import cut_short, optional_timeout
+from app.services.metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
 def geocode_from_mlsgrid(address: str, city: str, state: str, zip_code: str) -> Optional[Dict]:
     """
     Use MLSGrid API to get coordinates for a specific address.
@@ -16,8 +23,10 @@ def geocode_from_mlsgrid(address: str, city: str, state: str, zip_code: str) ->
         {"latitude": float, "longitude": float} or None
     """
     
-    BASE_URL = "https://api.mlsgrid.com/v2/Property"
-    ACCESS_TOKEN = "97f05f8b677637436e09f6d4d20f455f3eb8b965"
+    BASE_URL = MLSGRID_API_URL
+    ACCESS_TOKEN = MLSGRID_ACCESS_TOKEN
+    if not ACCESS_TOKEN:
+        return None  # Not configured: Nominatim only
     
     try:
         # Try exact address match first
@@ -34,9 +43,14 @@ def geocode_from_mlsgrid(address: str, city: str, state: str, zip_code: str) ->
             "Accept": "application/json"
         }
         
-        print(f"🔵 MLSGrid: Searching for '{address}, {city}, {state}'...")
+        logger.debug("🔵 MLSGrid: Searching for '%s, %s, %s'...", address, city, state)
         
-        response = requests.get(BASE_URL, params=params, headers=headers, timeout=10)
+        # Geocoding is optional: without time left the search goes city-wide
+        timeout = optional_timeout("geocode", GEOCODE_TIMEOUT_SECONDS, MIN_STAGE_TIMEOUT_SECONDS)
+        if timeout is None:
+            return None
+        with stage_timer("geocode_mlsgrid"):
+            response = requests.get(BASE_URL, params=params, headers=headers, timeout=timeout)
         
         if response.status_code == 200:
             data = response.json()
@@ -47,19 +61,23 @@ def geocode_from_mlsgrid(address: str, city: str, state: str, zip_code: str) ->
                     "latitude": properties[0]["Latitude"],
                     "longitude": properties[0]["Longitude"]
                 }
-                print(f"✅ MLSGrid found: {coords['latitude']}, {coords['longitude']}")
+                logger.debug("✅ MLSGrid found: %s, %s", coords['latitude'], coords['longitude'])
                 return coords
             else:
-                print(f"⚠️ MLSGrid: Address found but no coordinates")
+                logger.info("⚠️ MLSGrid: Address found but no coordinates")
         
         # If exact match fails, try broader search (just city + zip)
-        print(f"⚠️ Trying broader search in {city} {zip_code}...")
+        logger.info("⚠️ Trying broader search in %s %s...", city, zip_code)
         
         filter_string = f"City eq '{city}' and PostalCode eq '{zip_code}'"
         params["$filter"] = filter_string
         params["$top"] = 5
         
-        response = requests.get(BASE_URL, params=params, headers=headers, timeout=10)
+        timeout = optional_timeout("geocode", GEOCODE_TIMEOUT_SECONDS, MIN_STAGE_TIMEOUT_SECONDS)
+        if timeout is None:
+            return None
+        with stage_timer("geocode_mlsgrid"):
+            response = requests.get(BASE_URL, params=params, headers=headers, timeout=timeout)
         
         if response.status_code == 200:
             data = response.json()
@@ -71,17 +89,20 @@ def geocode_from_mlsgrid(address: str, city: str, state: str, zip_code: str) ->
                     "latitude": properties[0].get("Latitude"),
                     "longitude": properties[0].get("Longitude")
                 }
-                print(f"✅ MLSGrid: Using approximate center of {city} {zip_code}")
-                print(f"   Coordinates: {coords['latitude']}, {coords['longitude']}")
+                logger.info(
+                    "✅ MLSGrid: Using approximate center of %s %s (%s, %s)",
+                    city, zip_code, coords['latitude'], coords['longitude']
+                )
                 return coords
         
-        print(f"⚠️ MLSGrid: No results for {city}, {state}")
+        logger.warning("⚠️ MLSGrid: No results for %s, %s", city, state)
         return None
         
     except requests.exceptions.Timeout:
-        print("⚠️ MLSGrid API timeout")
+        logger.warning("⚠️ MLSGrid API timeout")
+        cut_short("geocode")
         return None
         
     except Exception as e:
-        print(f"⚠️ MLSGrid error: {str(e)}")
+        logger.warning("⚠️ MLSGrid error: %s", e)
         return None
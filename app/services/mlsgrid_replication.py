@@ -0,0 +1,241 @@
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import requests
+
+from app.compliance.output_cleaner import FIELD_MAPPING, clean_pairs
+from app.config.settings import (
+    MLSGRID_ACCESS_TOKEN,
+    MLSGRID_API_URL,
+    MLSGRID_ORIGINATING_SYSTEM,
+    MLSGRID_PAGE_SIZE,
+    MLSGRID_REQUEST_INTERVAL,
+)
+from app.services.metrics import stage_timer
+from app.services.mls_store import SnapshotStore, SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Only what the cleaner maps, plus what replication itself needs
+REPLICATION_FIELDS = tuple(dict.fromkeys((*FIELD_MAPPING, "ListingKey", "ModificationTimestamp", "MlgCanView")))
+
+# Replication fields the cleaner does not map
+_FEED_FIELDS = frozenset(("ModificationTimestamp", "MlgCanView"))
+
+# nextLink sits at the end of each page; found without parsing the page
+_NEXT_LINK = re.compile(rb'"@odata\.nextLink"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+_DONE = object()
+QUEUE_PAGES = 4  # Pages buffered between stages
+
+
+def replication_query(watermark: Optional[str]) -> Dict[str, str]:
+    """
+    First-page query: projected fields, records modified after the watermark.
+    """
+    conditions = [f"OriginatingSystemName eq '{MLSGRID_ORIGINATING_SYSTEM}'"]
+    if watermark:
+        conditions.append(f"ModificationTimestamp gt {watermark}")
+    return {
+        "$select": ",".join(REPLICATION_FIELDS),
+        "$filter": " and ".join(conditions),
+        "$top": str(MLSGRID_PAGE_SIZE),
+    }
+
+
+def next_link(page: bytes) -> Optional[str]:
+    match = _NEXT_LINK.search(page, max(0, len(page) - 4096)) or _NEXT_LINK.search(page)
+    return json.loads(b'"' + match.group(1) + b'"') if match else None
+
+
+def fetch_pages(session: requests.Session, watermark: Optional[str]) -> Iterator[bytes]:
+    """
+    Raw page bodies, following @odata.nextLink, at most one request per
+    MLSGRID_REQUEST_INTERVAL. Honors Retry-After on 429.
+    """
+    url: Optional[str] = MLSGRID_API_URL
+    params: Optional[Dict] = replication_query(watermark)
+    last_request = 0.0
+
+    while url:
+        wait = MLSGRID_REQUEST_INTERVAL - (time.monotonic() - last_request)
+        if wait > 0:
+            time.sleep(wait)
+        last_request = time.monotonic()
+
+        with stage_timer("mlsgrid_page_fetch"):
+            response = session.get(url, params=params, timeout=120)
+        if response.status_code == 429:
+            retry_after = float(response.headers.get("Retry-After") or 5)
+            logger.warning("⚠️ MLS Grid rate limit hit, retrying in %.0fs", retry_after)
+            time.sleep(retry_after)
+            continue
+        response.raise_for_status()
+
+        page = response.content
+        yield page
+        # The nextLink already carries every query option
+        url, params = next_link(page), None
+
+
+def _decode_object(pairs: list):
+    """
+    json object_pairs_hook: each feed record becomes a (listing key,
+    timestamp, cleaned record or None for removed) tuple as soon as it is
+    decoded, so a page never holds its raw record dicts. Objects without a
+    listing key (the page itself) stay dicts.
+    """
+    cleaned = clean_pairs(pairs)
+    key = cleaned.get("listingKey")
+    if not key:
+        return dict(pairs)
+    feed = {field: value for field, value in pairs if field in _FEED_FIELDS}
+    # MlgCanView false: the listing left the feed and must be removed
+    return key, feed.get("ModificationTimestamp"), cleaned if feed.get("MlgCanView", True) else None
+
+
+def parse_page(page: bytes) -> Tuple[list, Optional[str]]:
+    """
+    (listing key, cleaned record or None for removed) pairs, newest timestamp.
+    """
+    items = []
+    newest = None
+    for record in json.loads(page, object_pairs_hook=_decode_object).get("value", []):
+        if not isinstance(record, tuple):
+            continue  # No listing key
+        key, timestamp, cleaned = record
+        if timestamp and (newest is None or timestamp > newest):
+            newest = timestamp
+        items.append((key, cleaned))
+    return items, newest
+
+
+def replicate(store: Union[SnapshotStore, SQLiteStore], full: bool = False, session: Optional[requests.Session] = None) -> Dict:
+    """
+    Pull Property changes since the store's watermark (everything with
+    full=True) and apply them to the store.
+
+    Three stages overlap: a fetch thread downloads pages (it only scans
+    each page's tail for the nextLink), a parse thread decodes and cleans
+    them, and the caller's thread applies them to the store. Bounded
+    queues between the stages keep at most a few pages in memory. The
+    watermark advances only after every page was applied. A full run
+    replaces the store's contents in one step at save(); if it fails the
+    store keeps its previous contents.
+
+    Raises ValueError before touching the store if MLSGRID_ACCESS_TOKEN
+    is not set.
+    """
+    if not MLSGRID_ACCESS_TOKEN:
+        raise ValueError("MLSGRID_ACCESS_TOKEN is not set; replication needs an MLS Grid access token")
+    session = session or requests.Session()
+    session.headers.update({
+        "Authorization": f"Bearer {MLSGRID_ACCESS_TOKEN}",
+        "Accept": "application/json",
+    })
+    if full:
+        store.clear()
+    watermark = store.watermark
+
+    pages: queue.Queue = queue.Queue(maxsize=QUEUE_PAGES)
+    parsed: queue.Queue = queue.Queue(maxsize=QUEUE_PAGES)
+    errors = []
+    stop = threading.Event()
+
+    # Only the caller's thread sets stop (when it is done or failed); the
+    # stage threads then give up on blocked puts and gets
+    def put(target: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(source: queue.Queue):
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def fetcher():
+        try:
+            for page in fetch_pages(session, watermark):
+                if not put(pages, page):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(pages, _DONE)
+
+    def parser():
+        try:
+            while True:
+                page = get(pages)
+                if page is _DONE:
+                    break
+                with stage_timer("mlsgrid_page_parse"):
+                    result = parse_page(page)
+                if not put(parsed, result):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(parsed, _DONE)
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=fetcher, name="mlsgrid-fetch", daemon=True),
+        threading.Thread(target=parser, name="mlsgrid-parse", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    stats = {"pages": 0, "records": 0, "upserted": 0, "deleted": 0}
+    newest = watermark
+    try:
+        while True:
+            result = parsed.get()
+            if result is _DONE:
+                break
+            items, page_newest = result
+            upserted, deleted = store.upsert(items)
+            stats["pages"] += 1
+            stats["records"] += len(items)
+            stats["upserted"] += upserted
+            stats["deleted"] += deleted
+            if page_newest and (newest is None or page_newest > newest):
+                newest = page_newest
+            logger.debug("✅ MLS Grid page %d applied (%d records)", stats["pages"], len(items), extra={"sampled": True})
+
+        # Stage errors are recorded before the stage passes _DONE on
+        if errors:
+            raise errors[0]
+        store.save(newest)
+    except BaseException:
+        store.rollback()
+        raise
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    stats.update({
+        "seconds": round(time.perf_counter() - started, 2),
+        "previous_watermark": watermark,
+        "watermark": newest,
+        "store_records": len(store),
+    })
+    logger.info(
+        "✅ MLS Grid replication: %d pages, %d upserted, %d deleted in %.1fs (watermark %s)",
+        stats["pages"], stats["upserted"], stats["deleted"], stats["seconds"], newest
+    )
+    return stats
@@ -1,12 +1,7 @@
-import os
 import json
 from typing import Dict, List
-from dotenv import load_dotenv
-from openai import OpenAI
 
-load_dotenv()
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from app.services.openai_service import get_client
 
 
 def analyze_price_with_openai(ai_input: Dict) -> Dict:
@@ -87,7 +82,7 @@ OUTPUT FORMAT (JSON only, no markdown):
 """
 
     try:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o-mini",  # ✅ Fixed model name
             messages=[
                 {
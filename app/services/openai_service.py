@@ -1,56 +1,122 @@
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
+import hashlib
+import threading
 
-load_dotenv()
+from app.config.settings import OPENAI_API_KEY, OPENAI_MIN_SECONDS, OPENAI_TIMEOUT_SECONDS, SUMMARY_CACHE_SIZE
+from app.services import deadline
+from app.services.admission import openai_limiter
+from app.services.cache import LRUCache
+from app.services.metrics import stage_timer
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Summaries by prompt hash. The prompt is the only part of the OpenAI
+# request that varies (model, temperature and system message are code and
+# the cache starts empty with each process), and it carries every subject
+# field and comparable statistic the summary describes: a changed comp set
+# changes the prompt and misses. Entries leave only by LRU eviction
+summary_cache = LRUCache(SUMMARY_CACHE_SIZE, name="summary")
 
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY is missing in .env file")
+_client = None
+_client_lock = threading.Lock()
+
+
+class SummaryUnavailable(Exception):
+    """
+    No AI summary within the request's time budget.
+    """
+
+
+def get_client():
+    """
+    Shared OpenAI client (thread-safe, keeps its connections alive).
+    The SDK is the slowest import in the app, so it is only imported
+    here: by the startup warm-up or the first summary.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not OPENAI_API_KEY:
+                    raise ValueError("OPENAI_API_KEY is missing in .env file")
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
 
 
 def generate_ai_summary(prompt: str) -> str:
     """
     Calls OpenAI API and returns a clean AI-generated summary.
     Updated to reflect 1-mile radius and distance-based weighting methodology.
+
+    Raises admission.Overloaded when OPENAI_QUEUE_SIZE calls are already
+    waiting, SummaryUnavailable when the request's deadline leaves too
+    little time (or the call runs out of it); the caller falls back to
+    the template summary. A prompt seen before is answered from
+    summary_cache without a call.
     """
+    cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Checked before queueing for a slot (no point waiting for one) and
+    # again once admitted: the wait itself spends the budget
+    if deadline.optional_timeout("ai_summary", OPENAI_TIMEOUT_SECONDS, OPENAI_MIN_SECONDS) is None:
+        raise SummaryUnavailable("not enough time left for an AI summary")
+    client = get_client()
+
+    import openai  # Loaded by get_client()
+
+    try:
+        with openai_limiter.slot():
+            timeout = deadline.optional_timeout("ai_summary", OPENAI_TIMEOUT_SECONDS, OPENAI_MIN_SECONDS)
+            if timeout is None:
+                raise SummaryUnavailable("not enough time left for an AI summary after waiting for a slot")
+
+            # No SDK retries under a deadline: a second attempt would not fit
+            options = {"timeout": timeout}
+            if deadline.current() is not None:
+                options["max_retries"] = 0
+            with stage_timer("openai_request"):
+                response = client.with_options(**options).chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": (
+                                "You are a professional real estate valuation assistant specializing in "
+                                "Comparative Market Analysis (CMA) using industry-standard methodology.\n\n"
+                        
+                                "IMPORTANT METHODOLOGY:\n"
+                                "- Comparables are selected from within a 1-mile radius of the subject property; "
+                                "when too few sales exist the radius is widened (up to 3 miles) and the prompt states the radius used\n"
+                                "- Properties closer to the subject property have greater influence on the valuation\n"
+                                "- Distance-based weighting is applied (closer properties weighted higher)\n"
+                                "- This ensures true neighborhood-level accuracy\n\n"
+                        
+                                "When explaining valuations:\n"
+                                "- Emphasize that comparables are local (within the stated search radius)\n"
+                                "- Mention that closer properties influence the estimate more\n"
+                                "- Note the number of comparables used\n"
+                                "- Explain how property condition affects value\n"
+                                "- Keep explanations clear and professional\n\n"
+                        
+                                "NEVER mention:\n"
+                                "- Specific MLS addresses or listing IDs\n"
+                                "- Individual property details from comparables\n"
+                                "- Database or technical implementation details\n\n"
+                        
+                                "Provide neutral, market-based explanations suitable for client-facing reports."
+                            ),
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.4,
+                )
+    except openai.APITimeoutError as e:
+        if deadline.current() is None:
+            raise
+        deadline.cut_short("ai_summary")
+        raise SummaryUnavailable(f"AI summary timed out after {timeout:.1f}s") from e
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a professional real estate valuation assistant specializing in "
-                    "Comparative Market Analysis (CMA) using industry-standard methodology.\n\n"
-                    
-                    "IMPORTANT METHODOLOGY:\n"
-                    "- All comparables are selected from within a 1-mile radius of the subject property\n"
-                    "- Properties closer to the subject property have greater influence on the valuation\n"
-                    "- Distance-based weighting is applied (closer properties weighted higher)\n"
-                    "- This ensures true neighborhood-level accuracy\n\n"
-                    
-                    "When explaining valuations:\n"
-                    "- Emphasize that comparables are local (within 1 mile)\n"
-                    "- Mention that closer properties influence the estimate more\n"
-                    "- Note the number of comparables used\n"
-                    "- Explain how property condition affects value\n"
-                    "- Keep explanations clear and professional\n\n"
-                    
-                    "NEVER mention:\n"
-                    "- Specific MLS addresses or listing IDs\n"
-                    "- Individual property details from comparables\n"
-                    "- Database or technical implementation details\n\n"
-                    
-                    "Provide neutral, market-based explanations suitable for client-facing reports."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.4,
-    )
-
-    return response.choices[0].message.content.strip()
+    summary = response.choices[0].message.content.strip()
+    summary_cache.put(cache_key, summary)
+    return summary
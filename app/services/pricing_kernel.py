@@ -0,0 +1,149 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def columns_from_records(comparables: Iterable[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build (prices, sqft, weights) arrays from comparable dicts.
+    Missing values become 0; weights default to 1.0.
+    """
+    rows = [
+        (comp.get("price") or 0, comp.get("areaSqft") or 0, comp.get("_weight", 1.0))
+        for comp in comparables
+    ]
+    if not rows:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty, empty
+    prices, sqft, weights = np.asarray(rows, dtype=np.float64).T
+    return prices, sqft, weights
+
+
+def condition_multiplier(condition_score: int) -> float:
+    """
+    Condition multiplier (industry standard: 3% per point from baseline of 5).
+    Example: Condition 8 = 1.09x multiplier (9% increase)
+    Example: Condition 3 = 0.94x multiplier (6% decrease)
+    """
+    return 1 + ((condition_score - 5) * 0.03)
+
+
+def price_range(price: float) -> Dict:
+    """
+    Price range: ±8% (industry standard confidence interval)
+    """
+    return {
+        "min": round(price * 0.92),  # -8%
+        "max": round(price * 1.08)   # +8%
+    }
+
+
+def weighted_mean(values: np.ndarray, weights: np.ndarray) -> float:
+    """
+    Weighted mean, falling back to the plain mean if the weights sum to zero.
+    """
+    total = weights.sum()
+    if total > 0:
+        return float(np.dot(values, weights) / total)
+    return float(values.mean())
+
+
+def weighted_median(values: np.ndarray, weights: np.ndarray) -> float:
+    """
+    Value at which half of the total weight lies on each side.
+    """
+    if weights.sum() <= 0:
+        return float(np.median(values))
+    order = np.argsort(values, kind="stable")
+    cumulative = np.cumsum(weights[order])
+    position = np.searchsorted(cumulative, cumulative[-1] / 2)
+    return float(values[order][position])
+
+
+def iqr_mask(values: np.ndarray, k: float = 1.5) -> np.ndarray:
+    """
+    True for values inside [Q1 - k*IQR, Q3 + k*IQR].
+    Fewer than 4 values are never filtered.
+    """
+    if len(values) < 4:
+        return np.ones(len(values), dtype=bool)
+    q1, q3 = np.percentile(values, [25, 75])
+    spread = k * (q3 - q1)
+    return (values >= q1 - spread) & (values <= q3 + spread)
+
+
+def trimmed_weighted_mean(values: np.ndarray, weights: np.ndarray, trim: float = 0.1) -> float:
+    """
+    Weighted mean after dropping `trim` of the total weight from each tail.
+    """
+    if weights.sum() <= 0:
+        weights = np.ones(len(values))
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    sorted_weights = weights[order]
+
+    total = sorted_weights.sum()
+    midpoints = np.cumsum(sorted_weights) - sorted_weights / 2
+    keep = (midpoints >= trim * total) & (midpoints <= (1 - trim) * total)
+    if not keep.any():
+        return weighted_median(values, weights)
+    return weighted_mean(sorted_values[keep], sorted_weights[keep])
+
+
+def price_features(
+    prices: np.ndarray,
+    sqft: np.ndarray,
+    weights: np.ndarray,
+    condition_score: int,
+    subject_sqft: Optional[float] = None
+) -> Optional[Dict]:
+    """
+    Price statistics for one set of comparables.
+
+    Comps without a price or square footage are ignored. Returns None
+    when nothing usable is left.
+
+    The headline estimate is the distance-weighted mean price with the
+    condition multiplier and ±8% band. Weighted median, IQR-filtered and
+    trimmed means and a $/sqft-based estimate are reported alongside
+    it as robustness checks.
+    """
+    valid = (prices != 0) & (sqft > 0)
+    prices = prices[valid]
+    sqft = sqft[valid]
+    weights = weights[valid]
+
+    if not len(prices):
+        return None
+
+    price_per_sqft = prices / sqft
+
+    # 🔥 Weighted average price - closer properties have MORE influence
+    avg_price = weighted_mean(prices, weights)
+    avg_price_sqft = weighted_mean(price_per_sqft, weights)
+
+    multiplier = condition_multiplier(condition_score)
+    adjusted_price = avg_price * multiplier
+
+    inliers = iqr_mask(price_per_sqft)
+    median_price_sqft = weighted_median(price_per_sqft, weights)
+
+    features = {
+        "total_comparables": len(prices),
+        "average_price": round(avg_price),
+        "average_price_per_sqft": round(avg_price_sqft, 2),
+        "condition_score": condition_score,
+        "condition_multiplier": round(multiplier, 2),
+        "adjusted_estimated_price": round(adjusted_price),
+        "price_range": price_range(adjusted_price),
+        "median_price": round(weighted_median(prices, weights)),
+        "median_price_per_sqft": round(median_price_sqft, 2),
+        "trimmed_average_price": round(trimmed_weighted_mean(prices, weights)),
+        "filtered_average_price": round(weighted_mean(prices[inliers], weights[inliers])),
+        "outliers_removed": int(len(prices) - inliers.sum()),
+    }
+
+    if subject_sqft:
+        features["price_per_sqft_estimate"] = round(median_price_sqft * subject_sqft * multiplier)
+
+    return features
@@ -0,0 +1,60 @@
+import cProfile
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import Request
+
+from app.config.logging_setup import request_id
+from app.config.settings import PROFILE_DIR
+from app.services.auth import admin_enabled, is_admin_token
+
+logger = logging.getLogger(__name__)
+
+# cProfile hooks the interpreter; profile one request at a time
+_profile_lock = threading.Lock()
+
+
+def profiling_requested(request: Request) -> bool:
+    """
+    True when the request asks for a profile (X-Profile: 1 or ?profile=1)
+    and carries the admin token in X-Admin-Token. Always False when
+    ADMIN_TOKEN is not configured.
+    """
+    flag = request.headers.get("x-profile") or request.query_params.get("profile")
+    if flag not in ("1", "true") or not admin_enabled():
+        return False
+    if not is_admin_token(request.headers.get("x-admin-token")):
+        logger.warning("⚠️ Profiling requested with an invalid admin token")
+        return False
+    return True
+
+
+def run_profiled(func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, Optional[str]]:
+    """
+    Run func under cProfile and write the stats to PROFILE_DIR.
+
+    Returns (result, path of the .prof file). If another request is being
+    profiled, func runs normally and the path is None. The file is also
+    written when func raises.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning("⚠️ Profiler busy - running request unprofiled")
+        return func(*args, **kwargs), None
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    # The request id comes from a header; keep it filename-safe
+    safe_id = re.sub(r"[^A-Za-z0-9_-]", "", request_id.get())[:64] or "request"
+    path = os.path.join(
+        PROFILE_DIR, f"valuation-{time.strftime('%Y%m%d-%H%M%S')}-{safe_id}.prof"
+    )
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs), path
+    finally:
+        profiler.dump_stats(path)
+        _profile_lock.release()
+        logger.info("✅ Profile written to %s", path)
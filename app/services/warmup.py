@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from typing import Dict, Tuple
+
+from app.config.settings import STARTUP_WARMUP, missing_settings
+from app.services import mls_service, openai_service
+from app.services.hedonic_model import HedonicModel
+
+logger = logging.getLogger(__name__)
+
+_state = {
+    "missing_settings": [],
+    "started_at": None,
+    "finished_at": None,
+    "steps": {},  # Step -> seconds
+    "error": None,
+}
+_done = threading.Event()
+
+
+def _warm_up():
+    """
+    Everything the first valuation would otherwise pay for: the MLS
+    dataset with its indexes, the hedonic model fitted for it and the
+    OpenAI SDK import.
+    """
+    steps = _state["steps"]
+    try:
+        started = time.perf_counter()
+        dataset = mls_service.get_dataset()
+        steps["mls_dataset"] = round(time.perf_counter() - started, 3)
+        if dataset is None:
+            raise RuntimeError("no MLS data could be loaded")
+
+        started = time.perf_counter()
+        HedonicModel.load(dataset.version)
+        steps["hedonic_model"] = round(time.perf_counter() - started, 3)
+
+        if "OPENAI_API_KEY" not in _state["missing_settings"]:
+            started = time.perf_counter()
+            openai_service.get_client()
+            steps["openai_client"] = round(time.perf_counter() - started, 3)
+
+        logger.info("✅ Warm-up done in %.1fs (%d records)", sum(steps.values()), len(dataset), extra={"steps": steps})
+    except Exception as e:
+        _state["error"] = str(e)
+        logger.exception("❌ Warm-up failed: %s", e)
+    finally:
+        _state["finished_at"] = time.time()
+        _done.set()
+
+
+def start():
+    """
+    Called from the app lifespan: validate the configuration (missing
+    settings are logged and keep /ready failing, they don't stop the
+    process) and start the warm-up in the background, so the server
+    accepts /health immediately.
+    """
+    _state["missing_settings"] = missing_settings()
+    for name in _state["missing_settings"]:
+        logger.error("❌ %s is not set; the service will not report ready", name)
+
+    _state["started_at"] = time.time()
+    if not STARTUP_WARMUP:
+        _state["finished_at"] = _state["started_at"]
+        _done.set()
+        return
+    threading.Thread(target=_warm_up, name="warmup", daemon=True).start()
+
+
+def readiness() -> Tuple[bool, Dict]:
+    """
+    (ready, details) for /ready: configuration complete and warm-up
+    finished without error.
+    """
+    warming = _state["started_at"] is not None and not _done.is_set()
+    ready = _done.is_set() and not _state["missing_settings"] and _state["error"] is None
+    return ready, {
+        "status": "ready" if ready else ("warming_up" if warming else "not_ready"),
+        "missing_settings": _state["missing_settings"],
+        "warmup": {
+            "enabled": STARTUP_WARMUP,
+            "finished": _done.is_set(),
+            "steps_seconds": dict(_state["steps"]),
+            "error": _state["error"],
+        },
+        "dataset_loaded": mls_service.peek_dataset() is not None,
+    }
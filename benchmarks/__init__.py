@@ -0,0 +1,9 @@
+"""
+Reproducible benchmarks on seeded synthetic MLS data.
+
+Usage:
+    python -m benchmarks [--size 50k|500k|2m] [--case NAME ...] [--record]
+
+Results are compared with benchmarks/baselines/<size>.json; --record
+writes the current numbers there instead.
+"""
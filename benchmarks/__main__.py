@@ -0,0 +1,121 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from benchmarks.cases import CASES, Workload
+from benchmarks.synthetic import SIZES
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+def measure(run, calls: int, repeat: int) -> Dict:
+    """
+    Time repeat runs with the GC paused; seconds per call.
+    """
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            times.append((time.perf_counter() - started) / max(calls, 1))
+    finally:
+        gc.enable()
+    return {
+        "calls": calls,
+        "min": float(f"{min(times):.4g}"),
+        "median": float(f"{statistics.median(times):.4g}"),
+        "max": float(f"{max(times):.4g}"),
+    }
+
+
+def baseline_path(size: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{size}.json")
+
+
+def load_baseline(size: str) -> Optional[Dict]:
+    path = baseline_path(size)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _format(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest and valuation hot paths")
+    parser.add_argument("--size", choices=sorted(SIZES), default="50k", help="Synthetic dataset size")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="Run only these cases")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--subjects", type=int, default=200, help="Subjects for per-subject cases")
+    parser.add_argument("--record", action="store_true", help="Save results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Median/baseline ratio reported as a regression")
+    args = parser.parse_args()
+
+    workload = Workload(SIZES[args.size], subject_count=args.subjects)
+    baseline = load_baseline(args.size)
+    baseline_cases = (baseline or {}).get("cases", {})
+
+    results = {}
+    regressions = []
+    print(f"📊 {args.size} records ({workload.size:,}), {args.repeat} runs per case")
+    for name in args.case or CASES:
+        setup_started = time.perf_counter()
+        run, calls = CASES[name](workload)
+        setup_seconds = time.perf_counter() - setup_started
+
+        result = results[name] = measure(run, calls, args.repeat)
+        line = f"{name:<18} {_format(result['median']):>10} per call (min {_format(result['min'])}, setup {setup_seconds:.1f}s)"
+
+        previous = baseline_cases.get(name)
+        if previous:
+            ratio = result["median"] / previous["median"]
+            line += f"  {ratio:.2f}x baseline"
+            if ratio > args.threshold:
+                regressions.append(name)
+                line += " ⚠️"
+        print(line)
+
+    if args.record:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        recorded = dict(baseline_cases)
+        recorded.update(results)
+        with open(baseline_path(args.size), "w") as f:
+            json.dump({
+                "size": workload.size,
+                "subjects": args.subjects,
+                "recorded_at": time.strftime("%Y-%m-%d", time.gmtime()),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": f"{platform.machine()} / {os.cpu_count()} CPU",
+                "cases": recorded,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Baseline saved to {baseline_path(args.size)}")
+    elif baseline is None:
+        print(f"ℹ️ No baseline for {args.size} yet - run with --record to save one")
+
+    if regressions:
+        print(f"❌ Slower than {args.threshold:.2f}x baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark cases for the ingest and valuation hot paths.
+
+Each case takes a Workload and returns (callable to time, calls per run);
+anything done before returning (building the dataset, picking comps) is
+setup and not measured, as in asv's setup()/time_*() split. Per-subject
+cases time one pass over all the workload's subjects, so a run makes one
+call per subject and the runner reports the time per call.
+"""
+from functools import cached_property
+from typing import Callable, Dict, List, Tuple
+
+from app.ai.prompt_builder import PromptBuilder
+from app.compliance.output_cleaner import clean_properties
+from app.services.comparable_selector import ComparableSelector, selection_cache
+from app.services.feature_builder import FeatureBuilder
+from app.services.mls_dataset import MLSDataset
+from app.services.mls_service import filter_properties
+from benchmarks import synthetic
+
+CASES: Dict[str, Callable[["Workload"], Tuple[Callable[[], None], int]]] = {}
+
+
+def case(name: str):
+    def register(func: Callable) -> Callable:
+        CASES[name] = func
+        return func
+    return register
+
+
+class Workload:
+    """
+    Lazily generated inputs for one dataset size, shared by all cases.
+    """
+
+    def __init__(self, size: int, subject_count: int = 200, seed: int = 42):
+        self.size = size
+        self.subject_count = subject_count
+        self.seed = seed
+
+    @cached_property
+    def relay(self) -> List[Dict]:
+        return synthetic.relay_records(self.size, self.seed)
+
+    @cached_property
+    def filtered(self) -> List[Dict]:
+        return filter_properties(self.relay)[0]
+
+    @cached_property
+    def reso(self) -> List[Dict]:
+        return synthetic.reso_records(self.size, self.seed)
+
+    @cached_property
+    def dataset(self) -> MLSDataset:
+        return MLSDataset(self.filtered)
+
+    @cached_property
+    def subjects(self):
+        return synthetic.subjects(self.subject_count)
+
+    @cached_property
+    def comparables(self) -> List:
+        """
+        (subject, selector, comps) for subjects that found comps.
+        """
+        selected = []
+        for subject in self.subjects:
+            selector = ComparableSelector(subject, mode="radius")
+            comps = selector.select(self.dataset)
+            if comps:
+                selected.append((subject, selector, comps))
+        return selected
+
+    @cached_property
+    def features(self) -> List:
+        return [
+            (subject, FeatureBuilder.build(
+                comparables=comps,
+                condition_score=subject.condition_score,
+                search_radius_miles=selector.radius_used,
+                subject_sqft=subject.square_footage,
+            ))
+            for subject, selector, comps in self.comparables
+        ]
+
+
+@case("ingest_filter")
+def ingest_filter(workload: Workload):
+    records = workload.relay
+    return lambda: filter_properties(records), 1
+
+
+@case("clean_properties")
+def clean_properties_case(workload: Workload):
+    records = workload.reso
+    return lambda: clean_properties(records), 1
+
+
+@case("dataset_build")
+def dataset_build(workload: Workload):
+    records = workload.filtered
+    return lambda: MLSDataset(records), 1
+
+
+def _select_all(workload: Workload, mode: str):
+    dataset = workload.dataset
+    subjects = workload.subjects
+
+    def run():
+        # Measure the search itself, not cache hits from the previous repeat
+        selection_cache.clear()
+        maxsize, selection_cache.maxsize = selection_cache.maxsize, 0
+        try:
+            for subject in subjects:
+                ComparableSelector(subject, mode=mode).select(dataset)
+        finally:
+            selection_cache.maxsize = maxsize
+    return run, len(subjects)
+
+
+@case("select_radius")
+def select_radius(workload: Workload):
+    return _select_all(workload, "radius")
+
+
+@case("select_knn")
+def select_knn(workload: Workload):
+    return _select_all(workload, "knn")
+
+
+@case("feature_build")
+def feature_build(workload: Workload):
+    selections = workload.comparables
+
+    def run():
+        for subject, selector, comps in selections:
+            FeatureBuilder.build(
+                comparables=comps,
+                condition_score=subject.condition_score,
+                search_radius_miles=selector.radius_used,
+                subject_sqft=subject.square_footage,
+            )
+    return run, len(selections)
+
+
+@case("prompt_build")
+def prompt_build(workload: Workload):
+    prompts = workload.features
+
+    def run():
+        for subject, features in prompts:
+            PromptBuilder.build(subject, features)
+    return run, len(prompts)
@@ -0,0 +1,247 @@
+"""
+Seeded synthetic MLS data for the Charlotte metro.
+
+Records are generated in the two shapes the app sees:
+- relay: the Wix relay feed that mls_service fetches and MLSDataset indexes
+  (city, zip, latitude, longitude, bedrooms, bathrooms, areaSqft, ...)
+- reso: raw MLS Grid (RESO) fields, the input of clean_properties
+
+Prices follow a simple hedonic shape (size, age, beds/baths, zip premium,
+log-normal noise), so selection and pricing see realistic spreads. A small
+share of records is deliberately dirty (missing fields, extreme prices or
+sizes, city spelling variants) to keep the ingest filter honest.
+The same seed and size always produce the same records.
+"""
+import math
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from app.models.subject_property import SubjectProperty
+
+SIZES = {"50k": 50_000, "500k": 500_000, "2m": 2_000_000}
+
+# City, state, center (lat, lon), zip codes, relative price level
+MARKETS: Tuple[Tuple[str, str, float, float, Tuple[int, ...], float], ...] = (
+    ("Charlotte", "NC", 35.2271, -80.8431, (
+        28202, 28203, 28204, 28205, 28206, 28207, 28208, 28209, 28210, 28211,
+        28212, 28213, 28214, 28215, 28216, 28217, 28226, 28227, 28262, 28269,
+        28270, 28273, 28277, 28278,
+    ), 1.00),
+    ("Matthews", "NC", 35.1168, -80.7237, (28104, 28105), 1.05),
+    ("Mint Hill", "NC", 35.1796, -80.6473, (28227,), 0.95),
+    ("Huntersville", "NC", 35.4107, -80.8429, (28078,), 1.05),
+    ("Cornelius", "NC", 35.4868, -80.8601, (28031,), 1.20),
+    ("Davidson", "NC", 35.4993, -80.8487, (28036,), 1.30),
+    ("Mooresville", "NC", 35.5849, -80.8101, (28115, 28117), 1.05),
+    ("Concord", "NC", 35.4088, -80.5795, (28025, 28027), 0.90),
+    ("Kannapolis", "NC", 35.4874, -80.6217, (28081, 28083), 0.80),
+    ("Harrisburg", "NC", 35.3238, -80.6578, (28075,), 1.00),
+    ("Gastonia", "NC", 35.2621, -81.1873, (28052, 28054, 28056), 0.75),
+    ("Belmont", "NC", 35.2429, -81.0373, (28012,), 1.00),
+    ("Mount Holly", "NC", 35.2982, -81.0159, (28120,), 0.85),
+    ("Pineville", "NC", 35.0833, -80.8923, (28134,), 0.90),
+    ("Indian Trail", "NC", 35.0768, -80.6692, (28079,), 0.95),
+    ("Monroe", "NC", 34.9854, -80.5495, (28110, 28112), 0.80),
+    ("Waxhaw", "NC", 34.9246, -80.7434, (28173,), 1.25),
+    ("Fort Mill", "SC", 35.0074, -80.9451, (29707, 29708, 29715), 1.10),
+    ("Tega Cay", "SC", 35.0243, -81.0279, (29708,), 1.15),
+    ("Rock Hill", "SC", 34.9249, -81.0251, (29730, 29732), 0.80),
+)
+
+# Market share by city, roughly following population
+_CITY_WEIGHTS = (40, 3, 2, 4, 2, 1, 4, 5, 3, 2, 5, 2, 1, 1, 3, 3, 2, 4, 1, 4)
+
+_STATUSES = ("Closed",) * 14 + ("Active", "Active", "Pending", "Active Under Contract",
+                                "Coming Soon", "Expired", "Withdrawn", "Canceled")
+
+_STREETS = ("Main St", "Oak Dr", "Queens Rd", "Providence Rd", "Park Rd", "Sharon Ln",
+            "Davis Park Rd", "Randolph Rd", "Trade St", "Tryon St", "Elm Ave", "Pine St",
+            "Hawthorne Ln", "Selwyn Ave", "Monroe Rd", "Albemarle Rd", "Harris Blvd")
+
+# "Today" for generated close dates, fixed so output does not depend on the clock
+FEED_DATE = date(2025, 6, 30)
+
+# Share of relay records that should fail the ingest filter
+DIRTY_FRACTION = 0.04
+
+
+def _zip_centers() -> Dict[Tuple[str, int], Tuple[float, float, float]]:
+    """
+    Center and price premium per (city, zip), scattered around the city center.
+    Fixed across seeds, so subjects land in the same places as the records.
+    """
+    rnd = random.Random(0)
+    centers = {}
+    for city, _, lat, lon, zips, _ in MARKETS:
+        spread = 0.06 if len(zips) > 3 else 0.025
+        for zip_code in zips:
+            centers[(city, zip_code)] = (
+                lat + rnd.uniform(-spread, spread),
+                lon + rnd.uniform(-spread, spread),
+                math.exp(rnd.gauss(0, 0.2)),
+            )
+    return centers
+
+
+def _homes(count: int, seed: int) -> Iterator[Dict]:
+    """
+    Clean home attributes shared by both record shapes.
+    """
+    rnd = random.Random(seed)
+    centers = _zip_centers()
+
+    for i in range(count):
+        city, state, _, _, zips, level = rnd.choices(MARKETS, weights=_CITY_WEIGHTS)[0]
+        zip_code = rnd.choice(zips)
+        zip_lat, zip_lon, premium = centers[(city, zip_code)]
+
+        bedrooms = min(8, max(1, int(round(rnd.gauss(3.2, 0.9)))))
+        sqft = int(min(9000, max(450, rnd.lognormvariate(math.log(550 + 420 * bedrooms), 0.25))))
+        full_baths = min(6, max(1, bedrooms - rnd.choice((0, 1, 1, 2))))
+        half_baths = rnd.choice((0, 0, 1))
+        year = int(min(FEED_DATE.year, max(1900, rnd.gauss(1992, 22))))
+        age = FEED_DATE.year - year
+
+        price = (
+            185 * sqft * level * premium
+            * (1 + 0.03 * (full_baths + 0.5 * half_baths - bedrooms + 1))
+            * math.exp(-0.004 * min(age, 80))  # Older than ~80 years reads as historic
+            * rnd.lognormvariate(0, 0.12)
+        )
+
+        yield {
+            "id": i,
+            "city": city,
+            "state": state,
+            "zip": zip_code,
+            "latitude": round(zip_lat + rnd.gauss(0, 0.012), 6),
+            "longitude": round(zip_lon + rnd.gauss(0, 0.014), 6),
+            "bedrooms": bedrooms,
+            "full_baths": full_baths,
+            "half_baths": half_baths,
+            "sqft": sqft,
+            "year": year,
+            "price": int(round(price, -3)),
+            "status": rnd.choice(_STATUSES),
+            "address": f"{rnd.randint(100, 19999)} {rnd.choice(_STREETS)}",
+            "close_days_ago": rnd.randint(1, 730),
+        }
+
+
+def _dirty(record: Dict, rnd: random.Random) -> Dict:
+    """
+    Break one thing about a relay record the way the live feed does.
+    """
+    problem = rnd.randrange(5)
+    if problem == 0:
+        record[rnd.choice(("price", "areaSqft", "bedrooms", "yearBuilt", "city"))] = None
+    elif problem == 1:
+        record["price"] = rnd.choice((1, 5_000, 4_500_000))
+    elif problem == 2:
+        record["areaSqft"] = rnd.choice((120, 25_000))
+    elif problem == 3:
+        record["bedrooms"] = 14
+    else:
+        record["latitude"] = record["longitude"] = None  # Kept, but not locatable
+    return record
+
+
+def relay_records(count: int, seed: int = 42) -> List[Dict]:
+    """
+    Records as served by the Wix relay (RAW_DATA_API_URL) "items".
+    """
+    rnd = random.Random(seed + 1)
+    records = []
+    for home in _homes(count, seed):
+        city = home["city"]
+        spelling = rnd.random()
+        if spelling < 0.03:
+            city = city.upper()
+        elif spelling < 0.05:
+            city = f" {city} "
+
+        record = {
+            "address": home["address"],
+            "city": city,
+            "state": home["state"],
+            "zip": str(home["zip"]),
+            "latitude": home["latitude"],
+            "longitude": home["longitude"],
+            "bedrooms": home["bedrooms"],
+            "bathrooms": home["full_baths"] + 0.5 * home["half_baths"],
+            "areaSqft": home["sqft"],
+            "yearBuilt": home["year"],
+            "price": home["price"],
+            "status": home["status"],
+        }
+        if rnd.random() < DIRTY_FRACTION:
+            record = _dirty(record, rnd)
+        records.append(record)
+    return records
+
+
+def reso_records(count: int, seed: int = 42) -> List[Dict]:
+    """
+    Raw MLS Grid Property resource records (RESO field names).
+    """
+    records = []
+    for home in _homes(count, seed):
+        closed = home["status"] == "Closed"
+        close_date = FEED_DATE - timedelta(days=home["close_days_ago"])
+        records.append({
+            "ListingKey": f"CAR{4000000 + home['id']}",
+            "ListingId": f"CAR{4000000 + home['id']}",
+            "UnparsedAddress": home["address"],
+            "City": home["city"],
+            "PostalCode": str(home["zip"]),
+            "StateOrProvince": home["state"],
+            "Latitude": home["latitude"],
+            "Longitude": home["longitude"],
+            "BedroomsTotal": home["bedrooms"],
+            "BathroomsFull": home["full_baths"],
+            "BathroomsHalf": home["half_baths"],
+            "LivingArea": home["sqft"],
+            "BuildingAreaTotal": home["sqft"] + 200,
+            "YearBuilt": home["year"],
+            "ListPrice": int(home["price"] * 1.02),
+            "ClosePrice": home["price"] if closed else None,
+            "CloseDate": close_date.isoformat() if closed else None,
+            "MlsStatus": home["status"],
+            "StandardStatus": home["status"],
+            "PropertyType": "Residential",
+            "ModificationTimestamp": f"{close_date.isoformat()}T12:00:00.000Z",
+        })
+    return records
+
+
+def subjects(count: int, seed: int = 7) -> List[SubjectProperty]:
+    """
+    Valuation subjects spread over the same markets. Most are located;
+    about one in five has no coordinates (and is not geocoded).
+    """
+    rnd = random.Random(seed)
+    centers = _zip_centers()
+    subjects = []
+    for i in range(count):
+        city, state, _, _, zips, _ = rnd.choices(MARKETS, weights=_CITY_WEIGHTS)[0]
+        zip_code = rnd.choice(zips)
+        zip_lat, zip_lon, _ = centers[(city, zip_code)]
+        located = rnd.random() > 0.2
+        bedrooms = rnd.randint(2, 5)
+        subjects.append(SubjectProperty(
+            address=f"{100 + i} {rnd.choice(_STREETS)}",
+            city=city,
+            state=state,
+            zip_code=str(zip_code),
+            bedrooms=bedrooms,
+            bathrooms=rnd.choice((1, 1.5, 2, 2.5, 3)),
+            square_footage=int(550 + 420 * bedrooms * rnd.uniform(0.8, 1.25)),
+            year_built=rnd.randint(1940, 2022),
+            condition_score=rnd.randint(3, 9),
+            email="benchmark@example.com",
+            # 0.0 rather than None: counts as "no location" without geocoding
+            latitude=round(zip_lat + rnd.gauss(0, 0.01), 6) if located else 0.0,
+            longitude=round(zip_lon + rnd.gauss(0, 0.01), 6) if located else 0.0,
+        ))
+    return subjects
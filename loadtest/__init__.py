@@ -0,0 +1,11 @@
+"""
+Offline end-to-end load test for /api/run-valuation.
+
+Usage:
+    python -m loadtest [--concurrency 1,2,4,8,16] [--duration 20]
+                       [--latency-ms openai=800] [--error-rate wix=0.01]
+
+Starts the stand-in services (loadtest.stubs), runs the API with its
+environment pointed at them, drives increasing concurrency and prints
+throughput, p50/p95/p99 and the per-stage breakdown from Server-Timing.
+"""
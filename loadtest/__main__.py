@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict
+
+import requests
+
+from loadtest.driver import format_report, run_level, valuation_payload
+from loadtest.stubs import SERVICES, StubConfig, app_environment, start_stubs
+
+
+def _per_service(values, cast=float) -> Dict:
+    """
+    ["openai=800", "wix=40"] -> {"openai": 800.0, "wix": 40.0}; a bare value applies to all.
+    """
+    parsed = {}
+    for value in values or []:
+        name, sep, number = value.rpartition("=")
+        for service in ([name] if sep else SERVICES):
+            if service not in SERVICES:
+                raise SystemExit(f"❌ Unknown service '{service}' (choose from {', '.join(SERVICES)})")
+            parsed[service] = cast(number)
+    return parsed
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("❌ API process exited during startup")
+        try:
+            if requests.get(f"{url}/ready", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("❌ API did not become ready in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test /api/run-valuation against local stand-ins for Wix, MLSGrid, Nominatim and OpenAI"
+    )
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated levels")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per level")
+    parser.add_argument("--latency-ms", action="append", metavar="[SERVICE=]MS",
+                        help="Mean stub latency, e.g. openai=800 (default: openai=600, others 40)")
+    parser.add_argument("--jitter-ms", action="append", metavar="[SERVICE=]MS", help="Latency std deviation")
+    parser.add_argument("--error-rate", action="append", metavar="[SERVICE=]RATE", help="Share of 503 responses")
+    parser.add_argument("--records", type=int, default=50_000, help="Records in the Wix relay feed")
+    parser.add_argument("--summary-chars", type=int, default=1200, help="Length of the OpenAI stub summary")
+    parser.add_argument("--app-url", help="Use an already running API instead of starting one "
+                                          "(it must be configured with the printed environment)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the API started by the harness")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started API")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    latency = {"wix": 40.0, "mlsgrid": 40.0, "nominatim": 40.0, "openai": 600.0}
+    latency.update(_per_service(args.latency_ms))
+    jitter = {service: value / 4 for service, value in latency.items()}
+    jitter.update(_per_service(args.jitter_ms))
+    errors = _per_service(args.error_rate)
+
+    configs = {
+        service: StubConfig(
+            latency_ms=latency[service],
+            jitter_ms=jitter[service],
+            error_rate=errors.get(service, 0.0),
+            records=args.records,
+            summary_chars=args.summary_chars,
+        )
+        for service in SERVICES
+    }
+    print(f"🔵 Starting stand-ins ({args.records:,} relay records)...")
+    servers = start_stubs(configs)
+    env = app_environment(servers)
+    for name, value in env.items():
+        print(f"   {name}={value}")
+
+    process = None
+    url = args.app_url
+    if not url:
+        url = f"http://127.0.0.1:{args.port}"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(args.port), "--workers", str(args.workers), "--no-access-log"],
+            env={**os.environ, "LOG_LEVEL": "WARNING", **env},
+        )
+
+    try:
+        if process:
+            _wait_ready(url, process)
+
+        # The API's own warm-up loaded the feed; this fills the remaining caches
+        print("🔵 Warming up...")
+        warmup = requests.post(f"{url}/api/run-valuation", json=valuation_payload(random.Random(0)), timeout=300)
+        if not warmup.ok:
+            print(f"⚠️ Warm-up request returned {warmup.status_code}: {warmup.text[:200]}")
+
+        results = []
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            print(f"🔵 Concurrency {concurrency} for {args.duration:g}s...")
+            level = run_level(f"{url}/api/run-valuation", concurrency, args.duration, seed=concurrency)
+            results.append(level.summary())
+
+        print()
+        print(format_report(results))
+        print()
+        print("Stub traffic: " + ", ".join(
+            f"{name} {server.requests} ({server.errors} failed)" for name, server in servers.items()
+        ))
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"configs": {name: vars(config) for name, config in configs.items()},
+                           "levels": results}, f, indent=2)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        for server in servers.values():
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
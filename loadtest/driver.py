@@ -0,0 +1,157 @@
+"""
+Closed-loop load driver for /api/run-valuation.
+
+Each worker thread sends a request, waits for the answer and sends the
+next one, for a fixed duration per concurrency level. Latency percentiles
+come from the client side; the per-stage breakdown is parsed from the
+Server-Timing header the API returns.
+"""
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import requests
+
+from benchmarks.synthetic import MARKETS
+
+_STREETS = ("Sharon Rd", "Park Rd", "Queens Rd", "Selwyn Ave", "Providence Rd", "Hawthorne Ln")
+
+
+def valuation_payload(rnd: random.Random) -> Dict:
+    """
+    A form submission with a fresh address (so geocoding is not cached).
+    """
+    city, state, _, _, zips, _ = rnd.choice(MARKETS)
+    bedrooms = rnd.randint(2, 5)
+    return {
+        "address": f"{rnd.randint(100, 99999)} {rnd.choice(_STREETS)}",
+        "city": city,
+        "state": state,
+        "zip_code": str(rnd.choice(zips)),
+        "bedrooms": bedrooms,
+        "bathrooms": rnd.randint(1, 3),
+        "square_footage": int(550 + 420 * bedrooms * rnd.uniform(0.8, 1.25)),
+        "year_built": rnd.randint(1940, 2022),
+        "condition_score": rnd.randint(3, 9),
+        "user_notes": "load test",
+        "email": "loadtest@example.com",
+    }
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """
+    "select;dur=3.2, openai;dur=812.0" -> {"select": 3.2, "openai": 812.0} (ms).
+    Repeated stages (e.g. two geocode calls) are summed.
+    """
+    stages: Dict[str, float] = defaultdict(float)
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        if params.startswith("dur="):
+            stages[name] += float(params[4:])
+    return stages
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[position]
+
+
+class LevelResult:
+    """
+    Outcome of one concurrency level.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.duration = 0.0
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float, status: int, timing: Optional[str]):
+        with self._lock:
+            self.statuses[status] += 1
+            if status == 200:
+                self.latencies.append(latency)
+                for stage, ms in parse_server_timing(timing or "").items():
+                    self.stages[stage].append(ms)
+
+    def summary(self) -> Dict:
+        latencies = sorted(self.latencies)
+        total = sum(self.statuses.values())
+        return {
+            "concurrency": self.concurrency,
+            "requests": total,
+            "ok": len(latencies),
+            "statuses": dict(self.statuses),
+            "throughput_rps": round(len(latencies) / self.duration, 2) if self.duration else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "stages_ms": {
+                stage: {
+                    "mean": round(sum(values) / len(values), 1),
+                    "p95": round(percentile(sorted(values), 95), 1),
+                }
+                for stage, values in sorted(self.stages.items())
+            },
+        }
+
+
+def run_level(url: str, concurrency: int, duration: float, seed: int = 0, timeout: float = 120) -> LevelResult:
+    """
+    Keep `concurrency` requests in flight for `duration` seconds.
+    """
+    result = LevelResult(concurrency)
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        rnd = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.post(url, json=valuation_payload(rnd), timeout=timeout)
+                status, timing = response.status_code, response.headers.get("Server-Timing")
+            except requests.RequestException:
+                status, timing = 0, None  # Connection error or client timeout
+            result.add(time.perf_counter() - started, status, timing)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def format_report(results: List[Dict]) -> str:
+    """
+    One line per level, then the stage breakdown (mean ms) per level.
+    """
+    lines = [f"{'conc':>5} {'reqs':>6} {'ok':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  errors"]
+    for level in results:
+        errors = {status: count for status, count in level["statuses"].items() if status != 200}
+        lines.append(
+            f"{level['concurrency']:>5} {level['requests']:>6} {level['ok']:>6} "
+            f"{level['throughput_rps']:>8.2f} {level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} "
+            f"{level['p99_ms']:>9.1f}  {errors or '-'}"
+        )
+
+    stages = sorted({stage for level in results for stage in level["stages_ms"]})
+    if stages:
+        lines.append("")
+        lines.append("Stage mean ms " + " ".join(f"{stage:>14}" for stage in stages))
+        for level in results:
+            cells = " ".join(
+                f"{level['stages_ms'].get(stage, {}).get('mean', 0.0):>14.1f}" for stage in stages
+            )
+            lines.append(f"  conc {level['concurrency']:>5}  {cells}")
+    return "\n".join(lines)
@@ -0,0 +1,243 @@
+"""
+Local stand-ins for the third parties the valuation pipeline calls.
+
+- wix: GET /mls-data (relay feed of synthetic records), POST /clean-data
+- mlsgrid: GET /v2/Property (OData; geocode lookups, and replication
+  queries paged with @odata.nextLink and filtered by ModificationTimestamp)
+- nominatim: GET /search
+- openai: POST /v1/chat/completions
+
+Each runs on its own port in a ThreadingHTTPServer, with configurable
+latency (mean and jitter), error rate (HTTP 503) and payload size.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from benchmarks.synthetic import MARKETS, relay_records, reso_records
+
+SERVICES = ("wix", "mlsgrid", "nominatim", "openai")
+
+_CITY_CENTERS = {city.lower(): (lat, lon) for city, _, lat, lon, _, _ in MARKETS}
+
+
+@dataclass
+class StubConfig:
+    """
+    Behaviour of one stand-in service.
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    records: int = 50_000   # wix: items in the relay feed; mlsgrid: replicated records
+    summary_chars: int = 1200  # openai: length of the returned summary
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, handler, name: str, config: StubConfig):
+        super().__init__(address, handler)
+        self.name = name
+        self.config = config
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self.routes: Dict[Tuple[str, str], Callable] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real services
+    server: StubServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        config = self.server.config
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        if delay:
+            time.sleep(delay)
+
+        route = self.server.routes.get((method, parts.path))
+        failed = random.random() < config.error_rate
+        with self.server._lock:
+            self.server.requests += 1
+            self.server.errors += failed
+
+        if route is None:
+            self._send(404, {"error": f"no stub for {method} {parts.path}"})
+        elif failed:
+            self._send(503, {"error": "injected failure"})
+        else:
+            self._send(200, route(parse_qs(parts.query), body))
+
+    def _send(self, status: int, payload):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (e.g. its deadline-derived timeout ran out)
+
+
+def _city_point(text: str) -> Tuple[float, float]:
+    """
+    A point near the named city's center (Charlotte when unknown).
+    """
+    text = text.lower()
+    lat, lon = next(
+        (center for city, center in _CITY_CENTERS.items() if city in text),
+        _CITY_CENTERS["charlotte"]
+    )
+    return lat + random.uniform(-0.03, 0.03), lon + random.uniform(-0.03, 0.03)
+
+
+def _wix_routes(server: StubServer) -> Dict:
+    config = server.config
+    # Serialized once: the relay serves the same feed to every refresh
+    feed = json.dumps({"items": relay_records(config.records)}).encode()
+    return {
+        ("GET", "/mls-data"): lambda query, body: feed,
+        ("POST", "/clean-data"): lambda query, body: {"_id": uuid.uuid4().hex},
+    }
+
+
+def _mlsgrid_routes(server: StubServer) -> Dict:
+    config = server.config
+    replica = []  # Generated on the first replication request
+    replica_lock = threading.Lock()
+
+    def replication_page(query, filter_text: str) -> Dict:
+        with replica_lock:
+            if not replica:
+                records = reso_records(config.records)
+                for record in records:
+                    record["MlgCanView"] = True
+                replica.extend(sorted(records, key=lambda r: r["ModificationTimestamp"]))
+
+        # "... and ModificationTimestamp gt 2025-06-01T12:00:00.000Z"
+        watermark = filter_text.partition("ModificationTimestamp gt ")[2].split(" ")[0]
+        rows = [r for r in replica if r["ModificationTimestamp"] > watermark] if watermark else replica
+        top = int(query.get("$top", ["1000"])[0])
+        skip = int(query.get("$skip", ["0"])[0])
+        fields = query.get("$select", [""])[0].split(",")
+
+        page = {"@odata.context": "https://api.mlsgrid.com/v2/$metadata#Property"}
+        page["value"] = [
+            {field: row.get(field) for field in fields} if fields != [""] else row
+            for row in rows[skip:skip + top]
+        ]
+        if skip + top < len(rows):
+            next_query = {key: values[0] for key, values in query.items()}
+            next_query["$skip"] = str(skip + top)
+            page["@odata.nextLink"] = f"{server.url}/v2/Property?{urlencode(next_query)}"
+        return page
+
+    def property_search(query, body):
+        filter_text = query.get("$filter", [""])[0]
+        if filter_text.startswith("OriginatingSystemName"):
+            return replication_page(query, filter_text)
+        # Geocode: "UnparsedAddress eq '...' and City eq '...'" or "City eq ... and PostalCode eq ..."
+        lat, lon = _city_point(filter_text)
+        return {
+            "@odata.context": "https://api.mlsgrid.com/v2/$metadata#Property",
+            "value": [{"Latitude": lat, "Longitude": lon, "UnparsedAddress": "stub"}],
+        }
+    return {("GET", "/v2/Property"): property_search}
+
+
+def _nominatim_routes(server: StubServer) -> Dict:
+    def search(query, body):
+        lat, lon = _city_point(query.get("q", [""])[0])
+        return [{"lat": f"{lat:.6f}", "lon": f"{lon:.6f}", "display_name": "stub"}]
+    return {("GET", "/search"): search}
+
+
+def _openai_routes(server: StubServer) -> Dict:
+    config = server.config
+    sentence = (
+        "Based on recent comparable sales near the subject property, the estimated "
+        "value reflects local market conditions and the home's size and condition. "
+    )
+    summary = (sentence * (config.summary_chars // len(sentence) + 1))[:config.summary_chars]
+
+    def chat_completion(query, body):
+        request = json.loads(body or b"{}")
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": summary},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 400, "completion_tokens": len(summary) // 4, "total_tokens": 400 + len(summary) // 4},
+        }
+    return {("POST", "/v1/chat/completions"): chat_completion}
+
+
+_ROUTES = {
+    "wix": _wix_routes,
+    "mlsgrid": _mlsgrid_routes,
+    "nominatim": _nominatim_routes,
+    "openai": _openai_routes,
+}
+
+
+def start_stub(name: str, config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> StubServer:
+    """
+    Start one stand-in in a background thread (port 0 = any free port).
+    """
+    server = StubServer((host, port), StubHandler, name, config)
+    server.routes = _ROUTES[name](server)
+    threading.Thread(target=server.serve_forever, name=f"stub-{name}", daemon=True).start()
+    return server
+
+
+def start_stubs(configs: Dict[str, StubConfig], host: str = "127.0.0.1") -> Dict[str, StubServer]:
+    return {name: start_stub(name, configs.get(name, StubConfig()), host) for name in SERVICES}
+
+
+def app_environment(servers: Dict[str, StubServer], base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Environment that points the API at the stand-ins.
+    """
+    env = dict(base or {})
+    env.update({
+        "RAW_DATA_API_URL": f"{servers['wix'].url}/mls-data",
+        "CLEAN_DATA_POST_URL": f"{servers['wix'].url}/clean-data",
+        "MLSGRID_API_URL": f"{servers['mlsgrid'].url}/v2/Property",
+        "MLSGRID_ACCESS_TOKEN": "stub",
+        "NOMINATIM_URL": f"{servers['nominatim'].url}/search",
+        "OPENAI_BASE_URL": f"{servers['openai'].url}/v1",
+        "OPENAI_API_KEY": "stub",
+    })
+    return env
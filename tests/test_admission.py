@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import deadline, mls_service, mlsgrid_geocode
+from app.services.admission import Overloaded, StageLimiter, valuation_limiter
+
+VALUATION = {
+    "address": "1 Tryon St", "city": "Charlotte", "state": "NC", "zip_code": "28202",
+    "bedrooms": 3, "bathrooms": 2, "square_footage": 2000, "year_built": 2000,
+    "condition_score": 5, "user_notes": "", "email": "test@example.com",
+}
+
+
+@pytest.fixture(autouse=True)
+def no_deadline():
+    yield
+    deadline._current.set(None)
+
+
+def hold_slot(limiter: StageLimiter):
+    """
+    Occupy one slot from another thread until the returned event is set.
+    """
+    entered = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with limiter.slot():
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder, daemon=True)
+    thread.start()
+    entered.wait(5)
+    return release, thread
+
+
+def test_rejects_beyond_concurrency_and_queue():
+    limiter = StageLimiter("test", concurrency=1, queue_size=0)
+
+    with limiter.slot():
+        with pytest.raises(Overloaded) as rejected:
+            with limiter.slot():
+                pass
+
+    assert rejected.value.stage == "test"
+    assert rejected.value.retry_after >= 1
+    assert limiter.stats() == {"concurrency": 1, "queue_size": 0, "active": 0, "waiting": 0, "rejected": 1}
+    with limiter.slot():
+        pass
+
+
+def test_queued_caller_gets_the_released_slot():
+    limiter = StageLimiter("test", concurrency=1, queue_size=1, max_wait=5)
+    release, holder = hold_slot(limiter)
+    threading.Timer(0.1, release.set).start()
+
+    started = time.monotonic()
+    with limiter.slot():
+        waited = time.monotonic() - started
+    holder.join()
+
+    assert 0.05 < waited < 5
+    assert limiter.rejected == 0
+
+
+def test_wait_is_capped_by_the_request_deadline():
+    limiter = StageLimiter("test", concurrency=1, queue_size=1, max_wait=10)
+    release, holder = hold_slot(limiter)
+    deadline.start(0.2)
+
+    started = time.monotonic()
+    with pytest.raises(Overloaded):
+        with limiter.slot():
+            pass
+    release.set()
+    holder.join()
+
+    assert time.monotonic() - started < 2
+
+
+def test_valuations_beyond_the_limit_get_429_with_cors_headers(monkeypatch):
+    monkeypatch.setattr(valuation_limiter, "active", valuation_limiter.concurrency)
+
+    response = TestClient(app).post(
+        "/api/run-valuation", json=VALUATION, headers={"Origin": "https://example.com"}
+    )
+
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.headers["access-control-allow-origin"] == "https://example.com"
+
+
+def test_valuation_before_the_first_mls_load_gets_503(monkeypatch):
+    monkeypatch.setenv("RAW_DATA_API_URL", "http://127.0.0.1:9/mls-data")  # Refused: the load fails fast
+    monkeypatch.setattr(mls_service, "_mls_cache", dict(mls_service._mls_cache, data=None, dataset=None, timestamp=None))
+    monkeypatch.setattr(mlsgrid_geocode, "geocode_from_mlsgrid", lambda *address: {"latitude": 35.227, "longitude": -80.843})
+
+    response = TestClient(app).post("/api/run-valuation", json=VALUATION)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(mls_service.MLS_LOADING_RETRY_AFTER_SECONDS)
+    # The background load took the refresh lock; wait for it to give up
+    assert mls_service._refresh_lock.acquire(timeout=10)
+    mls_service._refresh_lock.release()
@@ -0,0 +1,158 @@
+import copy
+
+import pytest
+
+from app.models.subject_property import SubjectProperty
+from app.services import comparable_selector
+from app.services.comparable_selector import (
+    ComparableSelector, HotSubjects, prewarm_selection_cache, selection_cache
+)
+from app.services.mls_dataset import MLSDataset
+
+LAT, LON = 35.2270, -80.8430
+MILES_PER_DEGREE_LAT = 69.05
+
+
+def sale(i, sqft=2000, lat_offset_miles=0.0, **fields):
+    record = {
+        "address": f"{100 + i} Tryon St", "city": "Charlotte", "state": "NC", "zip": "28202",
+        "latitude": LAT + lat_offset_miles / MILES_PER_DEGREE_LAT, "longitude": LON + i * 0.0002,
+        "bedrooms": 3, "bathrooms": 2.0, "areaSqft": sqft, "yearBuilt": 2000,
+        "price": 400000 + 1000 * i, "status": "Closed", "closeDate": "2025-04-01",
+    }
+    record.update(fields)
+    return record
+
+
+def subject(sqft=2000, lat=LAT, lon=LON, **fields):
+    values = dict(
+        address="1 Tryon St", city="Charlotte", state="NC", zip_code="28202",
+        bedrooms=3, bathrooms=2.0, square_footage=sqft, year_built=2000,
+        condition_score=5, email="test@example.com", latitude=lat, longitude=lon,
+    )
+    values.update(fields)
+    return SubjectProperty(**values)
+
+
+@pytest.fixture(autouse=True)
+def empty_selection_cache():
+    selection_cache.clear()
+    yield
+    selection_cache.clear()
+
+
+@pytest.mark.parametrize("mode", ["radius", "knn"])
+@pytest.mark.parametrize("located", [True, False], ids=["located", "no-coordinates"])
+def test_select_leaves_the_records_untouched(mode, located):
+    records = [sale(i, sqft=1800 + 50 * i, lat_offset_miles=0.1 * i) for i in range(8)] + [sale(8, status="Active")]
+    original = copy.deepcopy(records)
+    dataset = MLSDataset(records)
+    lat, lon = (LAT, LON) if located else (0.0, 0.0)
+
+    for source in (dataset, dataset, records):  # Search, cache hit, plain list
+        comparables = ComparableSelector(subject(lat=lat, lon=lon), mode=mode).select(source)
+        assert comparables
+        assert all(match["_weight"] == match.weight for match in comparables)
+
+    assert records == original
+    assert all(record is dataset.records[i] for i, record in enumerate(records))
+
+
+def test_radius_selection_applies_the_property_filters():
+    records = [sale(i, lat_offset_miles=0.1 * i) for i in range(5)] + [
+        sale(5, sqft=2600),  # Beyond +25%
+        sale(6, bedrooms=5),  # Beds off by 2
+        sale(7, status="Active"),
+        sale(8, yearBuilt=1970),  # 30 years older
+        sale(9, city="Concord"),
+    ]
+    comparables = ComparableSelector(subject()).select(MLSDataset(records))
+
+    assert sorted(match.index for match in comparables) == [0, 1, 2, 3, 4]
+    assert [match.distance for match in comparables] == sorted(match.distance for match in comparables)
+
+
+def test_radius_widens_until_min_comparables():
+    records = [sale(0, lat_offset_miles=0.5), sale(1, lat_offset_miles=1.2), sale(2, lat_offset_miles=1.8)]
+    selector = ComparableSelector(subject(), radius_steps=(1, 1.5, 2, 3), min_comparables=3)
+
+    assert len(selector.select(MLSDataset(records))) == 3
+    assert selector.radius_used == 2
+
+
+def test_cache_hit_drops_matches_outside_this_subjects_bands():
+    # The second subject shares the first one's cache key (same grid cell
+    # and sqft bucket) but not its sqft band or exact location
+    records = [sale(i, sqft=1900 + 40 * i, lat_offset_miles=0.05 * i) for i in range(6)] + [
+        sale(6, sqft=2520),  # Inside 2024 * 1.25, outside 2000 * 1.25
+        sale(7, lat_offset_miles=-0.99),  # Within 1 mile of the first subject only
+    ]
+    dataset = MLSDataset(records)
+    first = ComparableSelector(subject(sqft=2024))
+    assert len(first.select(dataset)) == 8
+
+    second = ComparableSelector(subject(sqft=2000, lat=LAT + 0.0004))
+    assert second.cache_key(dataset, 25) == first.cache_key(dataset, 25)
+    comparables = second.select(dataset)
+
+    assert second.cache_hit
+    assert sorted(match.index for match in comparables) == [0, 1, 2, 3, 4, 5]
+    assert all(match.distance <= second.radius_used for match in comparables)
+
+
+def test_cache_hit_reselects_when_too_few_survive():
+    records = [sale(0), sale(1), sale(2, sqft=2520), sale(3, lat_offset_miles=1.3)]
+    dataset = MLSDataset(records)
+    first = ComparableSelector(subject(sqft=2024), min_comparables=3)
+    assert sorted(match.index for match in first.select(dataset)) == [0, 1, 2]
+
+    second = ComparableSelector(subject(sqft=2000), min_comparables=3)
+    comparables = second.select(dataset)
+
+    assert not second.cache_hit
+    assert sorted(match.index for match in comparables) == [0, 1, 3]
+    assert second.radius_used == 1.5
+
+
+def test_exclude_bypasses_the_cache():
+    dataset = MLSDataset([sale(i) for i in range(4)])
+    ComparableSelector(subject()).select(dataset)
+
+    selector = ComparableSelector(subject(), exclude=[0])
+    comparables = selector.select(dataset)
+
+    assert not selector.cache_hit
+    assert 0 not in {match.index for match in comparables}
+
+
+def test_prewarm_does_not_count_towards_hot_subjects(monkeypatch):
+    hot = HotSubjects(capacity=8)
+    monkeypatch.setattr(comparable_selector, "hot_subjects", hot)
+    for sqft in (2000, 2000, 2000, 1600):
+        ComparableSelector(subject(sqft=sqft)).select(MLSDataset([sale(i) for i in range(4)]))
+    counts = dict(hot._counts)
+
+    refreshed = MLSDataset([sale(i, price=500000) for i in range(4)])
+    assert prewarm_selection_cache(refreshed, top_n=2) == 2
+    assert prewarm_selection_cache(refreshed, top_n=2) == 2
+
+    assert hot._counts == counts
+    selector = ComparableSelector(subject(sqft=1600))
+    selector.select(refreshed)
+    assert selector.cache_hit
+
+
+@pytest.mark.parametrize("status", ["Closed", "closed", " CLOSED "])
+def test_status_is_matched_like_the_dataset_index(status):
+    record = sale(0, status=status)
+    selector = ComparableSelector(subject())
+
+    assert selector.has_similar_features(record)
+    assert [match.index for match in selector.select([record, sale(1, status="Active")])] == [0]
+
+
+def test_non_closed_statuses_are_rejected():
+    selector = ComparableSelector(subject())
+
+    for status in ("Active", "Active Under Contract", "Pending", None, ""):
+        assert not selector.has_similar_features(sale(0, status=status))
@@ -0,0 +1,85 @@
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from app.services import deadline, openai_service
+from app.services.admission import openai_limiter
+
+
+@pytest.fixture(autouse=True)
+def no_deadline(monkeypatch):
+    monkeypatch.setattr(deadline, "DEADLINE_RESERVE_SECONDS", 4.0)
+    monkeypatch.setattr(deadline, "MIN_STAGE_TIMEOUT_SECONDS", 1.0)
+    yield
+    deadline._current.set(None)
+
+
+def test_outside_a_request_stages_keep_their_own_limits():
+    assert deadline.current() is None
+    assert deadline.stage_timeout("wix_post", 30) == 30
+    assert deadline.optional_timeout("ai_summary", 30, 3) == 30
+    deadline.cut_short("ai_summary")  # No-op
+
+
+def test_required_stage_gets_what_is_left():
+    request_deadline = deadline.start(10)
+
+    assert 9 < deadline.stage_timeout("wix_post", 30) <= 10
+    assert deadline.stage_timeout("geocode", 5) == 5
+    assert request_deadline.cut_short == []
+
+
+def test_required_stage_is_not_started_without_time():
+    request_deadline = deadline.start(0.5)
+
+    with pytest.raises(deadline.DeadlineExceeded) as exceeded:
+        deadline.stage_timeout("wix_post", 30)
+
+    assert exceeded.value.stage == "wix_post"
+    assert request_deadline.cut_short == ["wix_post"]
+
+
+def test_optional_stage_leaves_the_reserve():
+    deadline.start(20)
+
+    assert 15 < deadline.optional_timeout("ai_summary", 30, 3) <= 16
+    assert deadline.optional_timeout("geocode", 5, 1) == 5
+
+
+def test_optional_stage_is_skipped_when_too_little_is_left():
+    request_deadline = deadline.start(6)  # 2s after the reserve
+
+    assert deadline.optional_timeout("ai_summary", 30, 3) is None
+    assert request_deadline.cut_short == ["ai_summary"]
+
+
+def test_cut_short_lists_each_stage_once():
+    request_deadline = deadline.start(10)
+
+    deadline.cut_short("ai_summary")
+    deadline.cut_short("ai_summary")
+    deadline.cut_short("wix_post")
+
+    assert request_deadline.cut_short == ["ai_summary", "wix_post"]
+
+
+def test_ai_summary_timeout_is_taken_after_the_slot_wait(monkeypatch):
+    class Client:
+        def with_options(self, **options):
+            raise AssertionError("OpenAI called without enough time left")
+
+    @contextmanager
+    def slow_slot():
+        time.sleep(1.5)
+        yield
+
+    monkeypatch.setattr(openai_service, "_client", Client())
+    monkeypatch.setattr(openai_service, "OPENAI_MIN_SECONDS", 3.0)
+    monkeypatch.setattr(openai_limiter, "slot", slow_slot)
+    request_deadline = deadline.start(8)  # 4s available before the wait, 2.5s after
+
+    with pytest.raises(openai_service.SummaryUnavailable):
+        openai_service.generate_ai_summary("test_ai_summary_timeout_is_taken_after_the_slot_wait")
+
+    assert request_deadline.cut_short == ["ai_summary"]
@@ -0,0 +1,72 @@
+import pytest
+
+from app.services.mls_service import filter_properties, normalize_address
+
+
+def row(address="1523 Monroe Road", **fields):
+    record = {
+        "address": address, "city": "Charlotte", "zip": "28205", "price": 350000,
+        "areaSqft": 1800, "bedrooms": 3, "bathrooms": 2.0, "yearBuilt": 1995,
+        "status": "Closed", "closeDate": "2025-03-14",
+    }
+    record.update(fields)
+    return record
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("1523 Monroe Road,", "1523 monroe rd"),
+    ("1523  MONROE RD.", "1523 monroe rd"),
+    ("900 Queens Road West", "900 queens rd west"),
+    ("12 E. Trade Street #4", "12 e trade st 4"),
+    ("", None), (None, None), ("--", None),
+])
+def test_normalize_address(address, expected):
+    assert normalize_address(address) == expected
+
+
+def test_same_listing_key_keeps_the_closed_row_at_the_first_position():
+    active = row(listingKey="K1", status="Active", closeDate=None)
+    other = row("77 Elm St", listingKey="K2")
+    closed = row(listingKey="K1", status="closed")
+
+    filtered, skipped = filter_properties([active, other, closed])
+
+    assert filtered == [closed, other]
+    assert skipped["duplicate"] == 1
+
+
+def test_closed_row_is_not_replaced_by_a_later_active_relist():
+    closed = row(listingKey="K1")
+    relist = row(listingKey="K1", status="Active", closeDate=None)
+
+    filtered, _ = filter_properties([closed, relist])
+
+    assert filtered == [closed]
+
+
+def test_address_variants_of_the_same_sale_collapse():
+    first = row("1523 Monroe Road,")
+    repeat = row("1523 monroe rd")
+
+    filtered, skipped = filter_properties([first, row("1525 Monroe Road"), repeat])
+
+    assert len(filtered) == 2
+    assert filtered[0] is repeat
+    assert skipped["duplicate"] == 1
+
+
+@pytest.mark.parametrize("change", [
+    {"closeDate": "2023-06-01"}, {"price": 299000}, {"zip": "28204"}, {"address": "1523 Monroe Ct"},
+], ids=["close-date", "price", "zip", "street"])
+def test_different_sales_are_kept(change):
+    filtered, skipped = filter_properties([row(), row(**change)])
+
+    assert len(filtered) == 2
+    assert skipped["duplicate"] == 0
+
+
+def test_rows_without_key_or_address_are_never_collapsed():
+    filtered, skipped = filter_properties([row(None), row(None)])
+
+    assert len(filtered) == 2
+    assert skipped["duplicate"] == 0
@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app.services import hedonic_model
+from app.services.hedonic_model import HedonicModel
+
+
+def write_model(directory, version, fitted_at):
+    path = HedonicModel.path_for(version, str(directory))
+    with open(path, "w") as f:
+        json.dump({
+            "dataset_version": version,
+            "fitted_at": fitted_at,
+            "reference_year": 2025,
+            "features": list(hedonic_model.FEATURES),
+            "markets": {},
+        }, f)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def nothing_loaded(monkeypatch):
+    monkeypatch.setattr(hedonic_model, "_loaded", None)
+
+
+def test_loads_the_model_fitted_on_this_version(tmp_path):
+    now = int(time.time())
+    write_model(tmp_path, "v1", now - 60)
+    write_model(tmp_path, "v2", now)
+
+    model = HedonicModel.load("v1", str(tmp_path))
+
+    assert model.dataset_version == "v1"
+    assert not model.stale
+
+
+def test_newest_model_stands_in_until_this_version_is_fitted(tmp_path):
+    now = int(time.time())
+    write_model(tmp_path, "v1", now - 7200)
+    write_model(tmp_path, "v2", now - 3600)
+
+    model = HedonicModel.load("v3", str(tmp_path))
+    assert model.dataset_version == "v2"
+    assert model.stale
+    assert model.status()["stale"]
+
+    write_model(tmp_path, "v3", now)
+    model = HedonicModel.load("v3", str(tmp_path))
+    assert model.dataset_version == "v3"
+    assert not model.stale
+
+
+def test_models_past_the_staleness_limit_are_not_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(hedonic_model, "HEDONIC_MAX_STALE_HOURS", 24)
+    write_model(tmp_path, "v1", int(time.time()) - 25 * 3600)
+
+    assert HedonicModel.load("v2", str(tmp_path)) is None
+
+
+def test_no_models(tmp_path):
+    assert HedonicModel.load("v1", str(tmp_path)) is None
+
+
+def test_concurrent_loads_across_a_version_change(tmp_path):
+    now = int(time.time())
+    write_model(tmp_path, "v1", now - 60)
+    write_model(tmp_path, "v2", now)
+    failures = []
+
+    def requests(version):
+        try:
+            for _ in range(200):
+                assert HedonicModel.load(version, str(tmp_path)).dataset_version == version
+        except Exception as e:
+            failures.append(e)
+
+    threads = [threading.Thread(target=requests, args=(f"v{1 + i % 2}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failures == []
@@ -0,0 +1,72 @@
+import logging
+import queue
+import threading
+from logging.handlers import QueueListener
+
+from app.config.logging_setup import DeferredQueueHandler, RequestIdFilter, request_id
+
+
+class ThreadRecordingFormatter(logging.Formatter):
+    """
+    Notes which thread formatted each record.
+    """
+
+    def __init__(self):
+        super().__init__("[%(request_id)s] %(message)s")
+        self.threads = []
+
+    def format(self, record):
+        self.threads.append(threading.current_thread())
+        return super().format(record)
+
+
+class Collect(logging.Handler):
+    def __init__(self, formatter):
+        super().__init__()
+        self.setFormatter(formatter)
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def test_records_are_formatted_in_the_listener_thread():
+    formatter = ThreadRecordingFormatter()
+    output = Collect(formatter)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(RequestIdFilter())
+    logger = logging.getLogger("test.deferred")
+    logger.propagate = False
+    logger.addHandler(handler)
+    listener = QueueListener(log_queue, output)
+
+    token = request_id.set("req-1")
+    try:
+        logger.warning("kept %d of %s", 3, "five", extra={"sampled": False})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+    finally:
+        request_id.reset(token)
+        logger.removeHandler(handler)
+
+    assert formatter.threads == []  # Nothing formatted on the logging thread
+    listener.start()
+    listener.stop()
+
+    assert output.lines[0] == "[req-1] kept 3 of five"
+    assert output.lines[1].startswith("[req-1] failed\nTraceback")
+    assert "ValueError: boom" in output.lines[1]
+    assert threading.current_thread() not in formatter.threads
+
+
+def test_prepare_keeps_the_record_as_logged():
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "%s sales", (12,), None)
+
+    prepared = DeferredQueueHandler(queue.SimpleQueue()).prepare(record)
+
+    assert prepared is not record
+    assert (prepared.msg, prepared.args) == ("%s sales", (12,))
+    assert not hasattr(prepared, "message")
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from app.services.knn_index import KDTree
+from app.services.mls_dataset import ListingStatus, MLSDataset, haversine_miles, parse_zip
+
+MILES_PER_DEGREE_LAT = 69.05
+
+
+def sale(zip_code, lat, lon, **fields):
+    record = {
+        "address": "1 Main St", "city": "Charlotte", "state": "NC", "zip": zip_code,
+        "latitude": lat, "longitude": lon, "bedrooms": 3, "bathrooms": 2.0,
+        "areaSqft": 2000, "yearBuilt": 2000, "price": 400000, "status": "Closed",
+    }
+    record.update(fields)
+    return record
+
+
+@pytest.fixture(scope="module")
+def three_zips():
+    # 28202 and 28203 about 2 miles apart, 28105 about 30 miles away
+    north = 2 / MILES_PER_DEGREE_LAT
+    far = 30 / MILES_PER_DEGREE_LAT
+    return MLSDataset([
+        sale("28202", 35.20, -80.84),
+        sale("28202", 35.21, -80.84),
+        sale("28203", 35.20 + north, -80.84),
+        sale("28105", 35.20 + far, -80.84),
+        sale("28106", 0, 0),  # No coordinates: not in the table
+    ])
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("28202", 28202), (28202, 28202), ("28202-1234", 28202), (" 28202 ", 28202),
+    (None, 0), ("", 0), ("n/a", 0),
+])
+def test_parse_zip(value, expected):
+    assert parse_zip(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Closed", ListingStatus.CLOSED), ("closed", ListingStatus.CLOSED),
+    ("Active Under Contract", ListingStatus.ACTIVE_UNDER_CONTRACT),
+    ("Cancelled", ListingStatus.CANCELED), ("Sold?", ListingStatus.UNKNOWN), (None, ListingStatus.UNKNOWN),
+])
+def test_listing_status_parse(value, expected):
+    assert ListingStatus.parse(value) == expected
+
+
+def test_zip_neighbors_are_centroids_within_the_radius(three_zips):
+    adjacency = three_zips.zip_adjacency
+
+    assert set(adjacency.centroids) == {28202, 28203, 28105}
+    assert adjacency.neighbors_of(28202) == {28202, 28203}
+    assert adjacency.neighbors_of(28105) == {28105}
+    assert adjacency.neighbors_of(28106) is None
+
+
+def test_zips_near_never_excludes_a_record_within_the_radius(three_zips):
+    adjacency = three_zips.zip_adjacency
+    lat, lon = 35.215, -80.84
+
+    near = adjacency.zips_near(lat, lon, 1)
+    for record in three_zips.records:
+        if record["latitude"] and haversine_miles(lat, lon, record["latitude"], record["longitude"]) <= 1:
+            assert parse_zip(record["zip"]) in near
+    assert 28105 not in near
+
+
+def brute_force(points, point, k, weights, max_distance=np.inf):
+    distances = ((points - point) ** 2 * weights).sum(axis=1)
+    order = np.lexsort((np.arange(len(points)), distances))
+    order = order[distances[order] <= max_distance ** 2][:k]
+    return order, np.sqrt(distances[order])
+
+
+@pytest.mark.parametrize("weights", [
+    np.ones(6), np.array([0.0, 0.0, 1.0, 1.0, 1.0, 1.0]), np.array([2.0, 0.5, 1.0, 3.0, 0.0, 1.0]),
+], ids=["unweighted", "no-location", "mixed"])
+@pytest.mark.parametrize("k", [1, 10, 200])
+def test_kd_tree_matches_brute_force(weights, k):
+    rng = np.random.default_rng(7)
+    points = rng.normal(size=(3000, 6))
+    points[::50] = points[0]  # Exact ties
+    tree = KDTree(points, leaf_size=16)
+
+    for point in (rng.normal(size=6), points[0], points[1234]):
+        positions, distances = tree.query(point, k, weights)
+        expected_positions, expected_distances = brute_force(points, point, k, weights)
+
+        np.testing.assert_allclose(distances, expected_distances)
+        np.testing.assert_array_equal(positions, expected_positions)
+
+
+def test_kd_tree_respects_max_distance():
+    rng = np.random.default_rng(11)
+    points = rng.uniform(-1, 1, size=(500, 6))
+    tree = KDTree(points)
+    point = np.zeros(6)
+
+    positions, distances = tree.query(point, 100, max_distance=0.8)
+    expected_positions, _ = brute_force(points, point, 100, np.ones(6), max_distance=0.8)
+
+    assert (distances <= 0.8).all()
+    np.testing.assert_array_equal(positions, expected_positions)
+
+
+def test_knn_index_holds_only_complete_closed_sales(three_zips):
+    dataset = MLSDataset(three_zips.records + [
+        sale("28202", 35.20, -80.84, status="Active"),
+        sale("28202", 35.20, -80.84, areaSqft=0),
+    ])
+    knn = dataset.shard("Charlotte").knn
+
+    assert sorted(knn.rows.tolist()) == [0, 1, 2, 3, 4]
+    indices, _ = knn.query(35.20, -80.84, 2000, 3, 2.0, 2000, k=10)
+    assert set(indices.tolist()) == {0, 1, 2, 3, 4}
@@ -0,0 +1,201 @@
+import json
+
+import pytest
+
+from app.services import mlsgrid_replication
+from app.services.comparable_selector import ComparableSelector, selection_cache
+from app.services.mls_dataset import MLSDataset
+from app.services.mls_service import filter_properties
+from app.services.mls_store import SnapshotStore, SQLiteStore
+from app.services.mlsgrid_replication import parse_page, replicate, replication_query
+from benchmarks.synthetic import relay_records, subjects
+
+
+def raw(key, modified, can_view=True, **fields):
+    record = {
+        "ListingKey": key, "ModificationTimestamp": modified, "MlgCanView": can_view,
+        "City": "Charlotte", "PostalCode": "28202", "StateOrProvince": "NC",
+        "Latitude": 35.2271, "Longitude": -80.8431, "BedroomsTotal": 3,
+        "BathroomsFull": 2, "BathroomsHalf": 1, "LivingArea": 2000, "YearBuilt": 2001,
+        "ClosePrice": 410000, "MlsStatus": "Closed", "CloseDate": "2025-04-01",
+    }
+    record.update(fields)
+    return record
+
+
+class Response:
+    status_code = 200
+    headers: dict = {}
+
+    def __init__(self, body: dict):
+        self.content = json.dumps(body).encode()
+
+    def raise_for_status(self):
+        pass
+
+
+class FeedSession:
+    """
+    Serves one replication run as pages linked by @odata.nextLink.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.headers = {}
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requests.append((url, params))
+        number = len(self.requests)
+        body = {"value": self.pages[number - 1]}
+        if number < len(self.pages):
+            body["@odata.nextLink"] = f"https://feed.test/Property?page={number + 1}"
+        return Response(body)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def open_store(request, tmp_path):
+    """
+    Opens the same store file again on each call.
+    """
+    if request.param == "json":
+        return lambda: SnapshotStore(str(tmp_path / "snapshot.json"))
+    return lambda: SQLiteStore(str(tmp_path / "mls.sqlite3"))
+
+
+@pytest.fixture(autouse=True)
+def feed_settings(monkeypatch):
+    monkeypatch.setattr(mlsgrid_replication, "MLSGRID_REQUEST_INTERVAL", 0)
+    monkeypatch.setattr(mlsgrid_replication, "MLSGRID_ACCESS_TOKEN", "test-token")
+
+
+def test_parse_page_cleans_records_and_marks_removals():
+    page = json.dumps({"value": [
+        raw("A", "2025-05-01T10:00:00.000Z"),
+        raw("B", "2025-05-03T10:00:00.000Z", can_view=False),
+        raw(None, "2025-05-09T10:00:00.000Z"),  # No key: skipped
+    ]}).encode()
+
+    items, newest = parse_page(page)
+
+    assert [key for key, _ in items] == ["A", "B"]
+    assert items[0][1]["bathrooms"] == 2.5 and items[0][1]["price"] == 410000
+    assert items[1][1] is None
+    assert newest == "2025-05-03T10:00:00.000Z"
+
+
+def test_upsert_deletes_and_watermark_persist(open_store):
+    store = open_store()
+    assert store.upsert([("A", {"city": "Charlotte", "price": 1}), ("B", {"city": "Concord", "price": 2})]) == (2, 0)
+    assert store.upsert([("A", {"city": "Charlotte", "price": 3}), ("B", None), ("C", None)]) == (1, 1)
+    store.save("2025-05-01T10:00:00.000Z")
+    store.close()
+
+    reopened = open_store()
+    assert reopened.watermark == "2025-05-01T10:00:00.000Z"
+    assert reopened.records() == [{"city": "Charlotte", "price": 3}]
+    reopened.close()
+
+
+def test_incremental_runs_start_from_the_watermark(open_store):
+    store = open_store()
+    first = FeedSession([
+        [raw("A", "2025-05-01T10:00:00.000Z"), raw("B", "2025-05-02T10:00:00.000Z")],
+        [raw("C", "2025-05-03T10:00:00.000Z")],
+    ])
+    stats = replicate(store, session=first)
+
+    assert (stats["pages"], stats["upserted"], stats["deleted"]) == (2, 3, 0)
+    assert stats["watermark"] == "2025-05-03T10:00:00.000Z"
+    assert "ModificationTimestamp" not in first.requests[0][1]["$filter"]
+    assert first.requests[1][1] is None  # The nextLink carries the query
+
+    second = FeedSession([[raw("B", "2025-05-04T10:00:00.000Z", can_view=False)]])
+    stats = replicate(store, session=second)
+
+    assert "ModificationTimestamp gt 2025-05-03T10:00:00.000Z" in second.requests[0][1]["$filter"]
+    assert (stats["upserted"], stats["deleted"], stats["store_records"]) == (0, 1, 2)
+    assert store.watermark == "2025-05-04T10:00:00.000Z"
+    store.close()
+
+
+def test_replication_refuses_to_start_without_a_token(open_store, monkeypatch):
+    store = open_store()
+    replicate(store, session=FeedSession([[raw("A", "2025-05-01T10:00:00.000Z")]]))
+    monkeypatch.setattr(mlsgrid_replication, "MLSGRID_ACCESS_TOKEN", None)
+    session = FeedSession([[raw("B", "2025-06-01T10:00:00.000Z")]])
+
+    with pytest.raises(ValueError, match="MLSGRID_ACCESS_TOKEN"):
+        replicate(store, full=True, session=session)
+
+    assert session.requests == []
+    assert len(store) == 1 and store.watermark == "2025-05-01T10:00:00.000Z"
+    store.close()
+
+
+def test_failed_full_run_keeps_the_previous_contents(open_store, monkeypatch):
+    store = open_store()
+    replicate(store, session=FeedSession([[raw("A", "2025-05-01T10:00:00.000Z"), raw("B", "2025-05-02T10:00:00.000Z")]]))
+
+    def failing_parse(page):
+        items, newest = parse_page(page)
+        if items[0][0] == "Z":
+            raise ValueError("bad page")
+        return items, newest
+
+    monkeypatch.setattr(mlsgrid_replication, "parse_page", failing_parse)
+    with pytest.raises(ValueError):
+        replicate(store, full=True, session=FeedSession([
+            [raw("C", "2025-06-01T10:00:00.000Z")],
+            [raw("Z", "2025-06-02T10:00:00.000Z")],
+        ]))
+
+    assert len(store) == 2
+    assert store.watermark == "2025-05-02T10:00:00.000Z"
+    store.close()
+
+
+def test_full_sqlite_reload_is_invisible_to_readers_until_saved(tmp_path):
+    path = str(tmp_path / "mls.sqlite3")
+    writer = SQLiteStore(path)
+    writer.upsert([("A", {"price": 1}), ("B", {"price": 2})])
+    writer.save("2025-05-01T10:00:00.000Z")
+    reader = SQLiteStore(path, read_only=True)
+
+    writer.clear()
+    writer.upsert([("C", {"price": 3})])
+    assert len(reader) == 2 and reader.watermark == "2025-05-01T10:00:00.000Z"
+
+    writer.save("2025-06-01T10:00:00.000Z")
+    assert reader.records() == [{"price": 3}]
+    assert reader.watermark == "2025-06-01T10:00:00.000Z"
+    reader.close()
+    writer.close()
+
+
+def test_sqlite_comparables_match_the_in_memory_selector(tmp_path):
+    records = [dict(record, listingKey=f"K{i}") for i, record in enumerate(relay_records(4000, seed=9))]
+    store = SQLiteStore(str(tmp_path / "mls.sqlite3"))
+    store.upsert((record["listingKey"], record) for record in records)
+    dataset = MLSDataset(filter_properties(store.records())[0])
+    selection_cache.clear()
+
+    for subject in subjects(150, seed=4):
+        selector = ComparableSelector(subject, mode="radius")
+        expected = selector.select(dataset)
+        found, radius_used = store.comparables(
+            subject.city, subject.bedrooms, subject.bathrooms, subject.square_footage, subject.year_built,
+            subject.latitude, subject.longitude, subject.zip_code
+        )
+
+        assert radius_used == selector.radius_used
+        assert [record["listingKey"] for _, record in found] == [match["listingKey"] for match in expected]
+        assert [distance for distance, _ in found] == pytest.approx([match.distance for match in expected])
+    store.close()
+
+
+def test_replication_selects_each_field_once():
+    select = replication_query(None)["$select"].split(",")
+
+    assert len(select) == len(set(select))
+    assert {"ListingKey", "ModificationTimestamp", "MlgCanView"} <= set(select)
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai.prompt_builder import PromptBuilder
+from app.models.subject_property import SubjectProperty
+from app.services import openai_service
+from app.services.openai_service import generate_ai_summary, summary_cache
+
+SUBJECT = SubjectProperty(
+    address="510 Martha Ave", city="Charlotte", state="NC", zip_code="28202",
+    bedrooms=3, bathrooms=2, square_footage=1800, year_built=1995,
+    condition_score=6, email="test@example.com", latitude=35.2, longitude=-80.8,
+)
+
+
+def features(**changes):
+    values = {
+        "total_comparables": 8, "search_radius_miles": 1.0, "average_price": 402000,
+        "average_price_per_sqft": 221.5, "condition_multiplier": 1.0,
+        "price_range": {"min": 380000, "max": 420000},
+    }
+    values.update(changes)
+    return values
+
+
+class Client:
+    """
+    OpenAI client stand-in: numbered summaries, one per call.
+    """
+
+    def __init__(self):
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def with_options(self, **options):
+        return self
+
+    def create(self, messages, **kwargs):
+        self.prompts.append(messages[-1]["content"])
+        content = f" Summary {len(self.prompts)} "
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = Client()
+    monkeypatch.setattr(openai_service, "_client", client)
+    summary_cache.clear()
+    yield client
+    summary_cache.clear()
+
+
+def test_identical_prompts_share_one_summary(client):
+    prompt = PromptBuilder.build(SUBJECT, features())
+
+    assert generate_ai_summary(prompt) == "Summary 1"
+    assert generate_ai_summary(PromptBuilder.build(SUBJECT, features())) == "Summary 1"
+    assert len(client.prompts) == 1
+
+
+@pytest.mark.parametrize("changes", [
+    {"total_comparables": 9}, {"search_radius_miles": 1.5}, {"average_price": 398000},
+    {"price_range": {"min": 380000, "max": 425000}},
+], ids=["comp-count", "radius", "average", "range"])
+def test_a_changed_comp_set_gets_a_new_summary(client, changes):
+    generate_ai_summary(PromptBuilder.build(SUBJECT, features()))
+
+    assert generate_ai_summary(PromptBuilder.build(SUBJECT, features(**changes))) == "Summary 2"
+    assert len(client.prompts) == 2
+
+
+def test_a_changed_subject_gets_a_new_summary(client):
+    generate_ai_summary(PromptBuilder.build(SUBJECT, features()))
+    other = SUBJECT.model_copy(update={"condition_score": 8})
+
+    assert generate_ai_summary(PromptBuilder.build(other, features())) == "Summary 2"
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from app.compliance.output_cleaner import clean_pairs, clean_property
+from app.services.mlsgrid_replication import parse_page
+from benchmarks.synthetic import reso_records
+
+EDGE_CASES = [
+    {},
+    {"ListPrice": 1, "UnparsedAddress": "1 Main St"},  # Nothing mapped
+    {"BathroomsFull": 2, "BathroomsHalf": 1},
+    {"BathroomsFull": None, "BathroomsHalf": None},
+    {"BathroomsFull": 3},
+    {"BathroomsHalf": 1},  # Half baths alone stay as they are
+    {"LivingArea": 0, "BuildingAreaTotal": 2200},
+    {"LivingArea": None, "BuildingAreaTotal": None},
+    {"LivingArea": None},
+    {"LivingArea": 1800, "BuildingAreaTotal": 2000},
+    {"BuildingAreaTotal": 2000},
+    {"ClosePrice": None, "CloseDate": None, "MlsStatus": "Active", "ListingKey": "K1"},
+]
+
+
+@pytest.mark.parametrize("raw", EDGE_CASES)
+def test_clean_pairs_matches_clean_property(raw):
+    assert clean_pairs(list(raw.items())) == clean_property(raw)
+
+
+def test_clean_pairs_matches_clean_property_on_synthetic_feed():
+    for raw in reso_records(2000, seed=3):
+        assert clean_pairs(raw.items()) == clean_property(raw)
+
+
+def test_parse_page_matches_cleaning_the_decoded_page():
+    records = reso_records(500, seed=5)
+    records[3]["MlgCanView"] = False
+    records[4]["MlgCanView"] = None
+    records[5]["ListingKey"] = None
+    page = json.dumps({"@odata.context": "Property", "value": records, "@odata.nextLink": "next"}).encode()
+
+    items, newest = parse_page(page)
+
+    expected = [
+        (raw["ListingKey"], clean_property(raw) if raw.get("MlgCanView", True) else None)
+        for raw in records if raw["ListingKey"]
+    ]
+    assert items == expected
+    assert newest == max(raw["ModificationTimestamp"] for raw in records if raw["ListingKey"])
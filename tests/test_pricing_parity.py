@@ -0,0 +1,217 @@
+"""
+The pricing kernel against the formulas it replaced: FeatureBuilder and
+the local analyzer used to compute everything in plain Python loops, and
+the robust statistics are checked against straightforward definitions.
+"""
+import statistics
+
+import numpy as np
+import pytest
+
+from app.models.subject_property import SubjectProperty
+from app.services import pricing_kernel
+from app.services.comparable_selector import ComparableSelector
+from app.services.feature_builder import FeatureBuilder
+from app.services.local_price_analyzer import analyze_price_locally
+from app.services.mls_dataset import MLSDataset
+
+COMPARABLES = [
+    {"price": 412000, "areaSqft": 2010, "_weight": 10.0},
+    {"price": 389500, "areaSqft": 1875, "_weight": 8.0},
+    {"price": 455000, "areaSqft": 2240, "_weight": 6.0},
+    {"price": 401000, "areaSqft": 1990, "_weight": 6.0},
+    {"price": 1250000, "areaSqft": 2100, "_weight": 2.0},  # $/sqft outlier
+    {"price": 372000, "areaSqft": 1800, "_weight": 4.0},
+    {"price": 430000, "areaSqft": 2150, "_weight": 2.0},
+    {"price": None, "areaSqft": 2000, "_weight": 10.0},  # No price: ignored
+    {"price": 420000, "areaSqft": 0, "_weight": 10.0},  # No sqft: ignored by FeatureBuilder
+    {"price": 398000, "areaSqft": 1950},  # Weight defaults to 1.0
+]
+
+UNWEIGHTED = [dict(comp, _weight=0.0) for comp in COMPARABLES]
+
+
+def legacy_features(comparables, condition_score, search_radius_miles=None):
+    """
+    FeatureBuilder.build before the pricing kernel.
+    """
+    prices = []
+    weights = []
+    price_per_sqft = []
+    for comp in comparables:
+        price = comp.get("price")
+        sqft = comp.get("areaSqft")
+        weight = comp.get("_weight", 1.0)
+        if price and sqft and sqft > 0:
+            prices.append(price)
+            weights.append(weight)
+            price_per_sqft.append(price / sqft)
+
+    if weights and sum(weights) > 0:
+        avg_price = sum(p * w for p, w in zip(prices, weights)) / sum(weights)
+        avg_price_sqft = sum(pps * w for pps, w in zip(price_per_sqft, weights)) / sum(weights)
+    else:
+        avg_price = statistics.mean(prices)
+        avg_price_sqft = statistics.mean(price_per_sqft)
+
+    condition_multiplier = 1 + ((condition_score - 5) * 0.03)
+    adjusted_price = avg_price * condition_multiplier
+    return {
+        "total_comparables": len(prices),
+        "search_radius_miles": search_radius_miles,
+        "average_price": round(avg_price),
+        "average_price_per_sqft": round(avg_price_sqft, 2),
+        "condition_score": condition_score,
+        "condition_multiplier": round(condition_multiplier, 2),
+        "adjusted_estimated_price": round(adjusted_price),
+        "price_range": {
+            "min": round(adjusted_price * 0.92),
+            "max": round(adjusted_price * 1.08)
+        }
+    }
+
+
+def legacy_local_range(comparables, condition_score):
+    """
+    analyze_price_locally's range before the pricing kernel.
+    """
+    prices = []
+    weights = []
+    for comp in comparables:
+        price = comp.get("price")
+        weight = comp.get("_weight", 1.0)
+        if price and price > 0:
+            prices.append(price)
+            weights.append(weight)
+
+    if weights and sum(weights) > 0:
+        avg_price = sum(p * w for p, w in zip(prices, weights)) / sum(weights)
+    else:
+        avg_price = sum(prices) / len(prices)
+
+    estimated_price = avg_price * (1 + ((condition_score - 5) * 0.03))
+    return round(estimated_price * 0.92), round(estimated_price * 1.08)
+
+
+def reference_weighted_median(values, weights):
+    """
+    Smallest value with at least half of the total weight at or below it.
+    """
+    pairs = sorted(zip(values, weights), key=lambda pair: pair[0])
+    half = sum(weights) / 2
+    cumulative = 0.0
+    for value, weight in pairs:
+        cumulative += weight
+        if cumulative >= half:
+            return value
+
+
+def reference_iqr_filter(values, k=1.5):
+    q1, _, q3 = statistics.quantiles(values, n=4, method="inclusive")
+    spread = k * (q3 - q1)
+    return [value for value in values if q1 - spread <= value <= q3 + spread]
+
+
+def reference_trimmed_mean(values, weights, trim=0.1):
+    """
+    Weighted mean of the values whose weight midpoint lies inside the
+    central (1 - 2 * trim) of the total weight.
+    """
+    pairs = sorted(zip(values, weights), key=lambda pair: pair[0])
+    total = sum(weights)
+    kept = []
+    cumulative = 0.0
+    for value, weight in pairs:
+        midpoint = cumulative + weight / 2
+        cumulative += weight
+        if trim * total <= midpoint <= (1 - trim) * total:
+            kept.append((value, weight))
+    return sum(v * w for v, w in kept) / sum(w for _, w in kept)
+
+
+def usable(comparables):
+    rows = [
+        (comp["price"], comp["areaSqft"], comp.get("_weight", 1.0))
+        for comp in comparables
+        if comp["price"] and comp["areaSqft"] and comp["areaSqft"] > 0
+    ]
+    return [list(column) for column in zip(*rows)]
+
+
+@pytest.mark.parametrize("comparables", [COMPARABLES, UNWEIGHTED], ids=["weighted", "zero-weights"])
+@pytest.mark.parametrize("condition_score", [1, 5, 8])
+@pytest.mark.parametrize("radius", [1.0, None])
+def test_feature_builder_matches_legacy_formulas(comparables, condition_score, radius):
+    features = FeatureBuilder.build(comparables, condition_score, search_radius_miles=radius)
+
+    expected = legacy_features(comparables, condition_score, radius)
+    assert {key: features[key] for key in expected} == expected
+
+
+@pytest.mark.parametrize("comparables", [COMPARABLES, UNWEIGHTED], ids=["weighted", "zero-weights"])
+@pytest.mark.parametrize("condition_score", [2, 5, 9])
+def test_local_analyzer_matches_legacy_formulas(comparables, condition_score):
+    result = analyze_price_locally({
+        "comparables": comparables,
+        "subject": {"condition_score": condition_score},
+        "search_radius_miles": 1,
+    })
+
+    assert (result["price_min"], result["price_max"]) == legacy_local_range(comparables, condition_score)
+
+
+def test_local_analyzer_without_prices():
+    result = analyze_price_locally({"comparables": [{"price": None, "areaSqft": 1800}]})
+
+    assert result["price_min"] is None and result["price_max"] is None
+
+
+def test_robust_statistics_match_reference_definitions():
+    prices, sqft, weights = usable(COMPARABLES)
+    price_per_sqft = [price / area for price, area in zip(prices, sqft)]
+    features = FeatureBuilder.build(COMPARABLES, 5, subject_sqft=2000)
+
+    assert features["median_price"] == round(reference_weighted_median(prices, weights))
+    median_pps = reference_weighted_median(price_per_sqft, weights)
+    assert features["median_price_per_sqft"] == round(median_pps, 2)
+    assert features["price_per_sqft_estimate"] == round(median_pps * 2000)
+    assert features["trimmed_average_price"] == round(reference_trimmed_mean(prices, weights))
+
+    inliers = reference_iqr_filter(price_per_sqft)
+    assert features["outliers_removed"] == len(price_per_sqft) - len(inliers) == 1
+    kept = [(price, weight) for price, weight, pps in zip(prices, weights, price_per_sqft) if pps in inliers]
+    assert features["filtered_average_price"] == round(
+        sum(p * w for p, w in kept) / sum(w for _, w in kept)
+    )
+
+
+def test_iqr_leaves_small_samples_alone():
+    values = np.array([100.0, 200.0, 10000.0])
+
+    assert pricing_kernel.iqr_mask(values).all()
+
+
+def test_comparable_set_columns_match_record_dicts():
+    # Closed sales around one point; the selector's ComparableSet is read
+    # as column arrays, the same matches as dicts go through the record path
+    records = [
+        {
+            "address": f"{100 + i} Main St", "city": "Charlotte", "state": "NC", "zip": "28202",
+            "latitude": 35.2271 + i * 0.001, "longitude": -80.8431 - i * 0.001,
+            "bedrooms": 3, "bathrooms": 2.0, "areaSqft": 1900 + 20 * i, "yearBuilt": 1995,
+            "price": 350000 + 7500 * i, "status": "Closed", "closeDate": "2025-03-01",
+        }
+        for i in range(8)
+    ]
+    subject = SubjectProperty(
+        address="1 Main St", city="Charlotte", state="NC", zip_code="28202",
+        bedrooms=3, bathrooms=2.0, square_footage=2000, year_built=1995,
+        condition_score=7, email="test@example.com", latitude=35.2271, longitude=-80.8431,
+    )
+    comparables = ComparableSelector(subject).select(MLSDataset(records))
+
+    assert len(comparables) == len(records)
+    from_columns = FeatureBuilder.build(comparables, 7, subject_sqft=2000)
+    from_dicts = FeatureBuilder.build([dict(match) for match in comparables], 7, subject_sqft=2000)
+    assert from_columns == from_dicts
+    assert {key: from_columns[key] for key in legacy_features(comparables, 7)} == legacy_features(comparables, 7)
@@ -0,0 +1,78 @@
+import pytest
+import requests
+
+from app.models.subject_property import SubjectProperty, geocode_cache
+from app.services import mlsgrid_geocode
+
+SUBJECT = dict(
+    address="510 Martha Ave", city="Charlotte", state="NC", zip_code="28202",
+    bedrooms=3, bathrooms=2, square_footage=1800, year_built=1995,
+    condition_score=6, email="test@example.com",
+)
+
+
+class Geocoder:
+    """
+    MLS Grid geocoder stand-in: records calls, answers with result.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.result = {"latitude": 35.2, "longitude": -80.8}
+
+    def __call__(self, address, city, state, zip_code):
+        self.calls.append(address)
+        return self.result
+
+
+class NoResults:
+    status_code = 200
+
+    def json(self):
+        return []
+
+
+@pytest.fixture
+def geocoder(monkeypatch):
+    geocoder = Geocoder()
+    monkeypatch.setattr(mlsgrid_geocode, "geocode_from_mlsgrid", geocoder)
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: NoResults())  # Nominatim finds nothing
+    geocode_cache.clear()
+    yield geocoder
+    geocode_cache.clear()
+
+
+def test_address_variants_share_one_geocode(geocoder):
+    first = SubjectProperty(**SUBJECT)
+    second = SubjectProperty(**dict(SUBJECT, address=" 510  martha AVE", city="charlotte ", state="nc"))
+
+    assert (first.latitude, first.longitude) == (35.2, -80.8)
+    assert (second.latitude, second.longitude) == (35.2, -80.8)
+    assert geocoder.calls == ["510 Martha Ave"]
+
+
+def test_failed_geocodes_are_retried(geocoder):
+    geocoder.result = None
+    assert SubjectProperty(**SUBJECT).latitude is None
+
+    geocoder.result = {"latitude": 35.2, "longitude": -80.8}
+    assert SubjectProperty(**SUBJECT).latitude == 35.2
+    assert len(geocoder.calls) == 2
+
+
+def test_given_coordinates_skip_the_cache(geocoder):
+    SubjectProperty(**SUBJECT)
+
+    subject = SubjectProperty(**SUBJECT, latitude=35.3, longitude=-80.9)
+
+    assert (subject.latitude, subject.longitude) == (35.3, -80.9)
+    assert geocoder.calls == ["510 Martha Ave"]
+
+
+def test_mlsgrid_geocoding_is_skipped_without_a_token(monkeypatch):
+    calls = []
+    monkeypatch.setattr(mlsgrid_geocode, "MLSGRID_ACCESS_TOKEN", None)
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: calls.append(args))
+
+    assert mlsgrid_geocode.geocode_from_mlsgrid("510 Martha Ave", "Charlotte", "NC", "28202") is None
+    assert calls == []